@@ -0,0 +1,246 @@
+"""
+🧮 Amendment Optimizer for Nutrify AI
+What-if search for the cheapest (or smallest) N/P/K/pH change that clears
+every predicted deficiency and reaches a target soil health score; all
+candidate changes are scored in one model batch, or in two (coarse, then
+fine) on predictors that score through the compiled tree engine
+
+NUTRIFY_AMENDMENT_BUDGET_MS is the interactive latency budget (default 500 ms).
+
+Usage: python amendments.py --N 20 --P 15 --K 20 --ph 5.2 [--objective cost|change] [--target-health 0.6]
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from feature_engineering import RAW_FEATURES, INPUT_RANGES, engineer_features
+from instrumentation import metrics
+
+# Candidate changes per input, and the organic source and indicative ₹/acre per unit
+# for raising and lowering it; N/P/K are only ever added
+AMENDMENTS = {
+    'N': {'steps': np.arange(0, 101, 10), 'unit': 'kg/ha',
+          'raise': ('vermicompost or farmyard manure', 60.0), 'lower': None},
+    'P': {'steps': np.arange(0, 61, 5), 'unit': 'kg/ha',
+          'raise': ('rock phosphate or bone meal', 80.0), 'lower': None},
+    'K': {'steps': np.arange(0, 101, 10), 'unit': 'kg/ha',
+          'raise': ('wood ash or potash-rich compost', 50.0), 'lower': None},
+    'ph': {'steps': np.round(np.arange(-1.5, 1.51, 0.25), 2), 'unit': 'pH',
+           'raise': ('agricultural lime', 3000.0), 'lower': ('elemental sulphur with acidic compost', 4000.0)}
+}
+
+# The plan rules stop recommending soil health improvement at 0.6
+DEFAULT_TARGET_HEALTH = 0.6
+OBJECTIVES = ('cost', 'change')
+LATENCY_BUDGET_MS = float(os.getenv('NUTRIFY_AMENDMENT_BUDGET_MS', '500'))
+HEALTH_TARGET = 'soil_health_score'
+
+SEARCHES = ('grid', 'coarse')
+# The compiled engine (the mapped layout) scores about 30k rows/sec, too slow for the
+# full grid within the budget: a coarse search scores every COARSE_STRIDE-th step, then
+# the full steps around its REFINE_SEEDS best candidates, about 2,000 rows in all
+COARSE_STRIDE = 2
+REFINE_SEEDS = 8
+
+
+def step_indices(amendments=AMENDMENTS, stride=1):
+    """Every combination of the amendments' step indices (each stride-th step), one row per candidate"""
+    mesh = np.meshgrid(*[np.arange(0, len(a['steps']), stride) for a in amendments.values()], indexing='ij')
+    return np.column_stack([m.ravel() for m in mesh])
+
+
+def refine_indices(seeds, amendments=AMENDMENTS, stride=COARSE_STRIDE):
+    """Step indices within one coarse step of each seed, leaving out those the coarse pass scored"""
+    sizes = np.array([len(a['steps']) for a in amendments.values()])
+    offsets = np.meshgrid(*[np.arange(1 - stride, stride)] * len(sizes), indexing='ij')
+    around = np.column_stack([m.ravel() for m in offsets])
+    rows = np.unique((seeds[:, None, :] + around).reshape(-1, len(sizes)), axis=0)
+    keep = ((rows >= 0) & (rows < sizes)).all(axis=1) & (rows % stride != 0).any(axis=1)
+    return rows[keep]
+
+
+def candidate_grid(raw, amendments=AMENDMENTS, indices=None):
+    """The adjustments applied to one sample's 7 raw inputs, every combination by default
+
+    indices: rows of step indices (step_indices) to build instead of the full grid.
+    Returns the adjusted input names, each candidate's effective change (after
+    clipping to the form's input ranges) and the candidates' raw inputs.
+    """
+    names = list(amendments)
+    columns = [RAW_FEATURES.index(name) for name in names]
+    if indices is None:
+        indices = step_indices(amendments)
+    steps = np.column_stack([amendments[name]['steps'][indices[:, i]] for i, name in enumerate(names)]).astype(float)
+
+    raw = np.asarray(raw, dtype=float)[:len(RAW_FEATURES)]
+    candidates = np.repeat(raw[None, :], len(steps), axis=0)
+    low = [INPUT_RANGES[name][0] for name in names]
+    high = [INPUT_RANGES[name][1] for name in names]
+    candidates[:, columns] = np.clip(raw[columns] + steps, low, high)
+    return names, candidates[:, columns] - raw[columns], candidates
+
+
+def adjustment_costs(names, deltas, amendments=AMENDMENTS):
+    """Indicative ₹/acre of each candidate; infinite where an input cannot be moved that way"""
+    cost = np.zeros(len(deltas))
+    for i, name in enumerate(names):
+        delta = deltas[:, i]
+        for direction, moved in (('raise', delta > 0), ('lower', delta < 0)):
+            source = amendments[name][direction]
+            cost[moved] += np.abs(delta[moved]) * source[1] if source else np.inf
+    return cost
+
+
+def adjustment_sizes(names, deltas):
+    """Size of each candidate's change, as the summed share of every input's range"""
+    widths = np.array([INPUT_RANGES[name][1] - INPUT_RANGES[name][0] for name in names])
+    return (np.abs(deltas) / widths).sum(axis=1)
+
+
+def score_candidates(predictor, raw, indices, amendments=AMENDMENTS, target_health=DEFAULT_TARGET_HEALTH):
+    """Model outputs, deficiencies left and costs of the given candidates, scored in one batch"""
+    names, deltas, candidates = candidate_grid(raw, amendments, indices)
+    outputs = {target_name: np.asarray(preds) for target_name, preds in
+               predictor.predict_targets(engineer_features(candidates), call='batch').items()}
+
+    deficiencies = sum((preds == 1).astype(int)
+                       for target_name, preds in outputs.items() if target_name != HEALTH_TARGET)
+    health = outputs[HEALTH_TARGET].astype(float) if HEALTH_TARGET in outputs else None
+    clears = deficiencies == 0
+    if health is not None:
+        clears &= health >= target_health
+    return {
+        'names': names, 'indices': indices, 'deltas': deltas, 'candidates': candidates,
+        'outputs': outputs, 'deficiencies': deficiencies, 'health': health, 'clears': clears,
+        'cost': adjustment_costs(names, deltas, amendments), 'size': adjustment_sizes(names, deltas)
+    }
+
+
+def combine_scores(first, second):
+    """Both passes' candidates as one scored set"""
+    combined = {}
+    for key, value in first.items():
+        if key == 'names' or value is None:
+            combined[key] = value
+        elif key == 'outputs':
+            combined[key] = {t: np.concatenate([preds, second[key][t]]) for t, preds in value.items()}
+        else:
+            combined[key] = np.concatenate([value, second[key]])
+    return combined
+
+
+def rank_candidates(scored, objective, target_health=DEFAULT_TARGET_HEALTH):
+    """Candidate positions, best first: the clearing ones by the objective, else the closest"""
+    primary, secondary = ((scored['cost'], scored['size']) if objective == 'cost'
+                          else (scored['size'], scored['cost']))
+    clears = scored['clears']
+    if clears.any():
+        feasible = np.flatnonzero(clears)
+        return feasible[np.lexsort((secondary[feasible], primary[feasible]))]
+    # Fewest deficiencies left, then reaching the health target, then the objective
+    health = scored['health']
+    short = health < target_health if health is not None else np.zeros(len(clears), dtype=bool)
+    return np.lexsort((secondary, primary, short, scored['deficiencies']))
+
+
+def find_amendment(predictor, raw, objective='cost', target_health=DEFAULT_TARGET_HEALTH,
+                   amendments=AMENDMENTS, search=None):
+    """The best adjustment of one sample
+
+    objective: 'cost' for the cheapest candidate, 'change' for the smallest. When no
+    candidate clears every deficiency, the closest one is returned with feasible=False.
+    search: 'grid' scores every candidate in one batch; 'coarse' scores a coarse grid,
+    then the full steps around its best candidates. The default is 'coarse' for
+    predictors backed by the compiled engine and 'grid' otherwise.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective '{objective}' (use one of: {', '.join(OBJECTIVES)})")
+    if search is None:
+        search = 'coarse' if getattr(predictor, 'engine', None) is not None else 'grid'
+    if search not in SEARCHES:
+        raise ValueError(f"Unknown search '{search}' (use one of: {', '.join(SEARCHES)})")
+    start = time.perf_counter()
+
+    with metrics.stage('amendment_search', call='single', search=search):
+        if search == 'grid':
+            scored = score_candidates(predictor, raw, step_indices(amendments), amendments, target_health)
+        else:
+            coarse = score_candidates(predictor, raw, step_indices(amendments, COARSE_STRIDE),
+                                      amendments, target_health)
+            seeds = coarse['indices'][rank_candidates(coarse, objective, target_health)[:REFINE_SEEDS]]
+            fine = score_candidates(predictor, raw, refine_indices(seeds, amendments), amendments, target_health)
+            scored = combine_scores(coarse, fine)
+        pick = rank_candidates(scored, objective, target_health)[0]
+
+    names, deltas, health = scored['names'], scored['deltas'], scored['health']
+    steps = []
+    for i, name in enumerate(names):
+        delta = float(deltas[pick, i])
+        if delta == 0:
+            continue
+        direction = 'raise' if delta > 0 else 'lower'
+        source, unit_cost = amendments[name][direction]
+        steps.append({'input': name, 'change': delta, 'unit': amendments[name]['unit'],
+                      'direction': direction, 'source': source, 'cost': abs(delta) * unit_cost})
+
+    seconds = time.perf_counter() - start
+    return {
+        'feasible': bool(scored['clears'][pick]),
+        'objective': objective,
+        'search': search,
+        'target_health': target_health,
+        'steps': steps,
+        'cost': float(scored['cost'][pick]),
+        'adjusted_inputs': dict(zip(RAW_FEATURES, scored['candidates'][pick].tolist())),
+        'predictions': {target_name: int(preds[pick]) for target_name, preds in scored['outputs'].items()
+                        if target_name != HEALTH_TARGET},
+        'soil_health_predicted': float(health[pick]) if health is not None else None,
+        'candidates': len(scored['candidates']),
+        'feasible_candidates': int(scored['clears'].sum()),
+        'seconds': seconds,
+        'within_budget': seconds * 1000 <= LATENCY_BUDGET_MS
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the cheapest organic amendment that clears a sample's deficiencies")
+    defaults = {'N': 20.0, 'P': 15.0, 'K': 20.0, 'ph': 5.2, 'temperature': 25.0, 'humidity': 70.0, 'rainfall': 100.0}
+    for name in RAW_FEATURES:
+        parser.add_argument(f"--{name}", type=float, default=defaults[name])
+    parser.add_argument("--objective", choices=OBJECTIVES, default='cost')
+    parser.add_argument("--target-health", type=float, default=DEFAULT_TARGET_HEALTH)
+    parser.add_argument("--search", choices=SEARCHES, default=None,
+                        help="Default: coarse for the mapped layout, grid otherwise")
+    args = parser.parse_args()
+
+    from predictor import load_predictor, MODEL_PATH
+
+    predictor = load_predictor(MODEL_PATH)
+    raw = [getattr(args, name) for name in RAW_FEATURES]
+    find_amendment(predictor, raw, args.objective, args.target_health, search=args.search)  # warm-up
+    result = find_amendment(predictor, raw, args.objective, args.target_health, search=args.search)
+
+    before = predictor.predict_targets(engineer_features(raw))
+    detected = [t for t, preds in before.items() if t != HEALTH_TARGET and preds[0] == 1]
+    print(f"Sample: {dict(zip(RAW_FEATURES, raw))}")
+    print(f"Now: {', '.join(detected) or 'no deficiency'}; soil health {float(before[HEALTH_TARGET][0]):.3f}")
+    print(f"\n{'✅ Clears every deficiency' if result['feasible'] else '⚠️ Nothing clears every deficiency; closest'} "
+          f"(objective: {result['objective']}, ₹{result['cost']:,.0f}/acre):")
+    for step in result['steps'] or [{'input': '-', 'change': 0, 'unit': '', 'source': 'no change needed', 'cost': 0}]:
+        print(f"  {step['input']:>3} {step['change']:+7.2f} {step['unit']:6} {step['source']:40} ₹{step['cost']:,.0f}")
+    left = [t for t, pred in result['predictions'].items() if pred == 1]
+    print(f"After: {', '.join(left) or 'no deficiency'}; soil health {result['soil_health_predicted']:.3f}")
+    print(f"\n{result['candidates']:,} candidates ({result['feasible_candidates']:,} clear, {result['search']} search) scored in "
+          f"{result['seconds'] * 1000:.0f} ms (budget {LATENCY_BUDGET_MS:.0f} ms)")
+    if not result['within_budget']:
+        print("⚠️ Over the latency budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,185 +4,25 @@ Simple Streamlit App with AI Integration and Multi-language Support
 """
 
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import joblib
-import json
+import functools
 import os
 import sys
+import tempfile
 
 # Add current directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-# Import custom modules
+# Only light modules are imported up front; pandas, numpy, plotly and the
+# model stack are imported by the pages that first need them
+from startup_profile import profiler
+from instrumentation import metrics
+from prediction_log import prediction_log, DEFICIENCY_TARGETS, VOLUME_HOURS
 from gemini_client import GeminiAIClient
+from chat_history import ChatHistory, CHAT_WINDOW
 from translations import TranslationManager
 
-# Define the missing class that was used to save the model
-class CompleteSustainableAgriculturePredictor:
-    """Complete production-ready ML system with all necessary functionality"""
-    
-    def __init__(self):
-        self.models = {}
-        self.scalers = {}
-        self.results = {}
-        self.feature_importance = {}
-        
-        # Complete organic treatments database
-        self.organic_treatments = {
-            'zinc_deficiency': {
-                'solutions': [
-                    'Apply zinc-rich vermicompost (5-10 kg/acre)',
-                    'Use seaweed extract foliar spray (2-3 times/season)',
-                    'Incorporate zinc-accumulating legume cover crops (cowpea, chickpea)',
-                    'Apply bone meal organic fertilizer (2-3 kg/acre)',
-                    'Use organic mulching with zinc-rich materials',
-                    'Implement crop rotation with zinc-efficient varieties'
-                ],
-                'cost': '₹2,000-4,000/acre', 'timeline': '3-6 months', 'severity_weight': 25
-            },
-            'iron_deficiency': {
-                'solutions': [
-                    'Apply iron-rich kitchen waste compost',
-                    'Use mycorrhizal fungi inoculation for better iron uptake',
-                    'Foliar spray with organic iron chelate solution',
-                    'Apply blood meal organic fertilizer (1-2 kg/acre)',
-                    'Improve soil drainage to prevent waterlogging',
-                    'Use green manure crops rich in iron'
-                ],
-                'cost': '₹1,500-3,500/acre', 'timeline': '2-4 months', 'severity_weight': 20
-            },
-            'multiple_deficiency': {
-                'solutions': [
-                    'Comprehensive organic soil restoration program',
-                    'Apply aged farmyard manure (10-15 tons/hectare)',
-                    'Implement diverse crop rotation with nitrogen-fixing legumes',
-                    'Use biochar for soil structure and nutrient improvement',
-                    'Establish permanent organic matter cycling system',
-                    'Apply rock phosphate and potash for long-term nutrition'
-                ],
-                'cost': '₹8,000-15,000/acre', 'timeline': '6-12 months', 'severity_weight': 40
-            },
-            'soil_health_improvement': {
-                'solutions': [
-                    'Increase organic matter through systematic composting',
-                    'Apply premium vermicompost (2-3 tons/hectare)',
-                    'Use effective microorganisms (EM) soil solution',
-                    'Implement no-till or minimal tillage practices',
-                    'Apply organic biofertilizers (Rhizobium, Azotobacter)',
-                    'Create permanent mulch cover system'
-                ],
-                'cost': '₹3,000-6,000/acre', 'timeline': '4-8 months', 'severity_weight': 15
-            }
-        }
-    
-    def classify_severity(self, predictions, soil_health_score=None):
-        """Complete severity classification - all levels"""
-        severity_score = 0
-        
-        # Complete severity calculation
-        for deficiency, pred in predictions.items():
-            if pred == 1 and deficiency in self.organic_treatments:
-                severity_score += self.organic_treatments[deficiency]['severity_weight']
-        
-        # Complete soil health factor
-        if soil_health_score is not None:
-            if soil_health_score < 0.4: severity_score += 20
-            elif soil_health_score < 0.6: severity_score += 10
-        
-        # Complete severity classification (all 4 levels)
-        if severity_score >= 50: return "Severe"
-        elif severity_score >= 25: return "Moderate"
-        elif severity_score >= 10: return "Mild"
-        else: return "None"
-    
-    def generate_complete_treatment_plan(self, predictions, soil_health_score=None):
-        """Complete treatment plan generation - all treatments"""
-        primary_concern = None
-        
-        # Complete priority system
-        if predictions.get('multiple_deficiency', 0) == 1:
-            primary_concern = 'multiple_deficiency'
-        elif predictions.get('zinc_deficiency', 0) == 1:
-            primary_concern = 'zinc_deficiency'
-        elif predictions.get('iron_deficiency', 0) == 1:
-            primary_concern = 'iron_deficiency'
-        elif soil_health_score and soil_health_score < 0.6:
-            primary_concern = 'soil_health_improvement'
-        
-        severity = self.classify_severity(predictions, soil_health_score)
-        
-        # Complete treatment recommendation
-        if primary_concern:
-            treatment = self.organic_treatments[primary_concern]
-            return {
-                'primary_concern': primary_concern.replace('_', ' ').title(),
-                'severity': severity,
-                'organic_solutions': treatment['solutions'],
-                'cost_estimate': treatment['cost'],
-                'timeline': treatment['timeline'],
-                'sustainability_score': 95,
-                'farmer_friendly': True,
-                'chemical_free': True
-            }
-        else:
-            return {
-                'primary_concern': 'None - Soil in excellent condition',
-                'severity': 'None',
-                'organic_solutions': [
-                    'Continue sustainable farming practices',
-                    'Regular soil testing and monitoring',
-                    'Maintain organic matter levels through composting'
-                ],
-                'cost_estimate': '₹500-1,500/acre (maintenance)',
-                'timeline': 'Ongoing maintenance',
-                'sustainability_score': 100,
-                'farmer_friendly': True,
-                'chemical_free': True
-            }
-    
-    def predict_complete_analysis(self, soil_sample, feature_names):
-        """Complete prediction system - all functionality"""
-        results = {'predictions': {}, 'soil_health_predicted': None, 'success': False}
-        
-        try:
-            # Complete prediction pipeline
-            for target_name, model in self.models.items():
-                scaler = self.scalers.get(target_name)
-                sample_input = scaler.transform(soil_sample) if scaler else soil_sample
-                pred = model.predict(sample_input)[0]
-                
-                if target_name == 'soil_health_score':
-                    results['soil_health_predicted'] = pred
-                else:
-                    results['predictions'][target_name] = pred
-            
-            # Complete treatment plan generation
-            treatment_plan = self.generate_complete_treatment_plan(
-                results['predictions'], results['soil_health_predicted']
-            )
-            
-            results['treatment_plan'] = treatment_plan
-            results['severity'] = treatment_plan['severity']
-            results['success'] = True
-            
-        except Exception as e:
-            results['error'] = str(e)
-        
-        return results
-
-# Page configuration
-st.set_page_config(
-    page_title="🌱 Nutrify AI - Soil Nutrition Analysis",
-    page_icon="🌱",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
 # Custom CSS
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .main-header {
         background: linear-gradient(90deg, #2E8B57, #32CD32);
@@ -214,25 +54,72 @@ st.markdown("""
         margin: 0.5rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Week 1 training data rates, the reference for logged traffic
+TRAINING_RATES = {
+    'any_deficiency': 0.266,
+    'zinc_deficiency': 0.213,
+    'iron_deficiency': 0.006,
+    'multiple_deficiency': 0.069,
+    'soil_health_score': 0.549
+}
+
+def format_rate(value):
+    return "-" if value is None else f"{value:.1%}"
+
+def configure_page():
+    """Page configuration and styles (must run before any other st call)"""
+    st.set_page_config(
+        page_title="🌱 Nutrify AI - Soil Nutrition Analysis",
+        page_icon="🌱",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+# Set while the whole script runs; a fragment rerun calls its section outside of it.
+# Every run executes this file in a fresh module, so a fragment sees the flag of the
+# run that defined it, reset once that run finished.
+full_run = False
+
+def section_fragment(section):
+    """st.fragment for a page section, timing every run of it as one interaction
+    
+    A widget inside the section reruns only the section ('fragment' runs); when the whole
+    app reruns the section runs with it ('full' runs).
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            call = 'full' if full_run else 'fragment'
+            with metrics.stage('interaction', call=call, section=section):
+                return func(*args, **kwargs)
+        return st.fragment(timed)
+    return decorate
+
+@st.cache_resource
+def get_gemini_client():
+    """Gemini client shared by all sessions"""
+    return GeminiAIClient()
 
 class NutrifyAIApp:
     def __init__(self):
-        self.load_models()
+        # Models are loaded by the pages that need them, not on every rerun
+        self.predictor = None
         self.setup_translations()
         self.setup_gemini()
         
     def load_models(self):
         """Load the trained ML models"""
+        if self.predictor is not None:
+            return
         try:
-            # Load the main predictor
-            model_path = "../WEEK-2/complete_sustainable_agriculture_system/complete_agriculture_predictor.joblib"
-            self.predictor = joblib.load(model_path)
-            
-            # Load feature configuration
-            config_path = "../WEEK-2/complete_sustainable_agriculture_system/complete_feature_config.json"
-            with open(config_path, 'r') as f:
-                self.feature_config = json.load(f)
+            # Loaded once per process by the registry, reloaded only if the files change
+            with profiler.phase("load models"):
+                model_registry = profiler.lazy_import("model_registry")
+                self.predictor = model_registry.get_predictor()
+                self.feature_config = model_registry.get_feature_config()
             
             self.feature_names = self.feature_config['feature_names']
             self.target_variables = self.feature_config['target_variables']
@@ -245,11 +132,14 @@ class NutrifyAIApp:
     
     def setup_translations(self):
         """Setup multi-lingual support"""
-        self.translations = TranslationManager()
+        # Language choice is per session, so the manager lives in session state
+        if "translations" not in st.session_state:
+            st.session_state.translations = TranslationManager()
+        self.translations = st.session_state.translations
     
     def setup_gemini(self):
         """Setup Gemini AI client"""
-        self.gemini_client = GeminiAIClient()
+        self.gemini_client = get_gemini_client()
     
     def render_header(self):
         """Render the main header"""
@@ -267,7 +157,7 @@ class NutrifyAIApp:
         # Language selection
         language = st.sidebar.selectbox(
             "🌐 Select Language / भाषा चुनें",
-            options=["English", "Hindi"],
+            options=self.translations.languages,
             index=0
         )
         
@@ -277,14 +167,31 @@ class NutrifyAIApp:
         # Navigation
         page = st.sidebar.radio(
             "Choose a page:",
-            ["🏠 Home", "🔬 Soil Analysis", "🤖 AI Assistant", "📊 Analytics"]
+            ["🏠 Home", "🔬 Soil Analysis", "📦 Bulk Analysis", "🗂️ Field History", "🤖 AI Assistant", "📊 Analytics"]
         )
         
-        # Quick stats
+        # Quick stats from the prediction log's running aggregates
+        aggregates = prediction_log.refresh()
         st.sidebar.markdown("### 📊 Quick Stats")
-        st.sidebar.metric("Deficiency Rate", "26.6%")
+        st.sidebar.metric("Predictions", f"{aggregates.rows:,}")
+        st.sidebar.metric("Deficiency Rate", format_rate(aggregates.rate('any_deficiency')))
         st.sidebar.metric("Organic Solutions", "24+")
-        st.sidebar.metric("Accuracy", "99.9%")
+        
+        # Model registry status (only once the model stack has been imported)
+        with st.sidebar.expander("⚙️ Model Registry"):
+            if "model_registry" not in sys.modules:
+                st.caption("Models load when an analysis page is first opened.")
+            else:
+                registry = sys.modules["model_registry"].registry
+                prediction_cache = profiler.lazy_import("prediction_cache").prediction_cache
+                for entry in registry.stats():
+                    st.markdown(f"**{entry['artifact']}** (v{entry['version']}, `{entry['sha256']}`)  \n"
+                                f"Load: {entry['load_seconds'] * 1000:.0f} ms · "
+                                f"Memory: {entry['memory_bytes'] / 1e6:.1f} MB · Hits: {entry['hits']}")
+                cache = prediction_cache.stats()
+                st.markdown(f"**Prediction cache**: {cache['size']}/{cache['maxsize']} · "
+                            f"Hit rate: {cache['hit_rate']:.0%} ({cache['hits']} hits, {cache['misses']} misses) · "
+                            f"Evictions: {cache['evictions']}")
         
         return page
     
@@ -334,75 +241,106 @@ class NutrifyAIApp:
                 st.session_state.page = "Soil Analysis"
                 st.rerun()
     
+    @section_fragment("soil_analysis")
     def render_soil_analysis_page(self):
         """Render the soil analysis page"""
         st.title("🔬 Soil Analysis")
+        self.load_models()
+        engineer_features = profiler.lazy_import("feature_engineering").engineer_features
+        text = self.translations.page("soil_analysis")
         
-        # Create input form
+        # Create input form (keys keep the widgets stable when the language changes)
         with st.form("soil_analysis_form"):
-            st.markdown("### 📊 Enter Soil Parameters")
+            st.markdown(f"### 📊 {text['enter_soil_params']}")
             
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                st.markdown("#### 🌱 Basic Nutrients")
-                N = st.number_input("Nitrogen (N) - kg/hectare", min_value=0.0, max_value=300.0, value=50.0, step=1.0)
-                P = st.number_input("Phosphorus (P) - kg/hectare", min_value=0.0, max_value=200.0, value=50.0, step=1.0)
-                K = st.number_input("Potassium (K) - kg/hectare", min_value=0.0, max_value=300.0, value=50.0, step=1.0)
+                st.markdown(f"#### 🌱 {text['basic_nutrients']}")
+                N = st.number_input(text['nitrogen'], min_value=0.0, max_value=300.0, value=50.0, step=1.0,
+                                    key="soil_form_N")
+                P = st.number_input(text['phosphorus'], min_value=0.0, max_value=200.0, value=50.0, step=1.0,
+                                    key="soil_form_P")
+                K = st.number_input(text['potassium'], min_value=0.0, max_value=300.0, value=50.0, step=1.0,
+                                    key="soil_form_K")
             
             with col2:
-                st.markdown("#### 🧪 Soil Properties")
-                ph = st.number_input("pH Level", min_value=3.0, max_value=10.0, value=6.5, step=0.1)
-                temperature = st.number_input("Temperature (°C)", min_value=5.0, max_value=50.0, value=25.0, step=1.0)
-                humidity = st.number_input("Humidity (%)", min_value=10.0, max_value=100.0, value=70.0, step=1.0)
+                st.markdown(f"#### 🧪 {text['soil_properties']}")
+                ph = st.number_input(text['ph_level'], min_value=3.0, max_value=10.0, value=6.5, step=0.1,
+                                     key="soil_form_ph")
+                temperature = st.number_input(text['temperature'], min_value=5.0, max_value=50.0, value=25.0, step=1.0,
+                                              key="soil_form_temperature")
+                humidity = st.number_input(text['humidity'], min_value=10.0, max_value=100.0, value=70.0, step=1.0,
+                                           key="soil_form_humidity")
             
             with col3:
-                st.markdown("#### 🌧️ Environmental")
-                rainfall = st.number_input("Rainfall (mm)", min_value=0.0, max_value=500.0, value=100.0, step=10.0)
+                st.markdown(f"#### 🌧️ {text['environmental']}")
+                rainfall = st.number_input(text['rainfall'], min_value=0.0, max_value=500.0, value=100.0, step=10.0,
+                                           key="soil_form_rainfall")
                 
-                # Calculate ratios and soil health score
-                N_P_ratio = N / (P + 1) if P > 0 else 0
-                N_K_ratio = N / (K + 1) if K > 0 else 0
-                P_K_ratio = P / (K + 1) if K > 0 else 0
-                soil_health_score = min(1.0, (N/200 + P/80 + K/90 + (1 - abs(ph - 7)/3))/4)
+                st.markdown(f"#### 📍 {text['field_optional']}")
+                village = st.text_input(text['village'], key="soil_form_village")
+                farmer_id = st.text_input(text['farmer_id'], key="soil_form_farmer_id")
+                field_id = st.text_input(text['field_id'], help=text['field_id_help'], key="soil_form_field_id")
             
-            submitted = st.form_submit_button("🔍 Analyze Soil", type="primary")
+            submitted = st.form_submit_button(f"🔍 {text['analyze_soil']}", type="primary")
             
             if submitted:
-                # Prepare input data
-                soil_sample = np.array([[
-                    N, P, K, ph, temperature, humidity, rainfall,
-                    N_P_ratio, N_K_ratio, P_K_ratio, soil_health_score
-                ]])
+                # Prepare input data (ratios and soil health score as in training)
+                soil_sample = engineer_features([N, P, K, ph, temperature, humidity, rainfall])
                 
-                # Make predictions
+                # Make predictions (repeat inputs are served from the shared cache)
                 try:
-                    results = self.predictor.predict_complete_analysis(soil_sample, self.feature_names)
+                    prediction_cache = profiler.lazy_import("prediction_cache").prediction_cache
+                    registry = profiler.lazy_import("model_registry").registry
+                    MODEL_PATH = profiler.lazy_import("predictor").MODEL_PATH
+                    results = prediction_cache.get_or_compute(
+                        [N, P, K, ph, temperature, humidity, rainfall],
+                        lambda: self.predictor.predict_complete_analysis(soil_sample, self.feature_names),
+                        model_version=registry.version(MODEL_PATH)
+                    )
                     
                     if results['success']:
-                        self.display_analysis_results(results, soil_sample[0])
+                        prediction_log.log_results(results, source='app')
+                        if farmer_id.strip() and field_id.strip():
+                            # Queued for the history writer; the page never waits on the insert
+                            profiler.lazy_import("soil_history").soil_history.record(
+                                farmer_id.strip(), field_id.strip(), [N, P, K, ph, temperature, humidity, rainfall],
+                                results, village=village.strip() or None)
+                        # Kept for the reruns that opening a result tab triggers
+                        st.session_state.soil_analysis = (results, soil_sample[0])
                     else:
+                        st.session_state.pop("soil_analysis", None)
                         st.error(f"❌ Analysis failed: {results.get('error', 'Unknown error')}")
                         
                 except Exception as e:
+                    st.session_state.pop("soil_analysis", None)
                     st.error(f"❌ Error during analysis: {str(e)}")
+        
+        if "soil_analysis" in st.session_state:
+            with metrics.stage('render', call='single'):
+                self.display_analysis_results(*st.session_state.soil_analysis)
     
+    @section_fragment("analysis_results")
     def display_analysis_results(self, results, soil_data):
         """Display the analysis results"""
-        st.markdown("### 📊 Analysis Results")
+        pd = profiler.lazy_import("pandas")
+        text = self.translations.page("results")
+        st.markdown(f"### 📊 {text['analysis_results']}")
         
         # Create tabs
-        tab1, tab2, tab3 = st.tabs(["🔍 Deficiency Analysis", "🌿 Treatment Plan", "📈 Visualizations"])
+        tab1, tab2, tab3 = st.tabs([f"🔍 {text['deficiency_analysis']}", f"🌿 {text['treatment_plan']}",
+                                    f"📈 {text['visualizations']}"])
         
         with tab1:
             # Deficiency status
             deficiencies = []
             for deficiency, pred in results['predictions'].items():
-                status = "🚨 DETECTED" if pred == 1 else "✅ Normal"
+                status = f"🚨 {text['detected']}" if pred == 1 else f"✅ {text['normal']}"
                 deficiencies.append({
-                    'Deficiency': deficiency.replace('_', ' ').title(),
-                    'Status': status,
-                    'Severity': 'High' if pred == 1 else 'None'
+                    text['deficiency']: text.get(deficiency, deficiency.replace('_', ' ').title()),
+                    text['status']: status,
+                    text['severity']: text['high'] if pred == 1 else text['none']
                 })
             
             df_deficiencies = pd.DataFrame(deficiencies)
@@ -411,7 +349,7 @@ class NutrifyAIApp:
             # Soil health prediction
             if results['soil_health_predicted']:
                 health_score = results['soil_health_predicted']
-                health_status = "Excellent" if health_score > 0.8 else "Good" if health_score > 0.6 else "Fair" if health_score > 0.4 else "Poor"
+                health_status = "excellent" if health_score > 0.8 else "good" if health_score > 0.6 else "fair" if health_score > 0.4 else "poor"
                 
                 # Determine color based on health status
                 if health_score > 0.8:
@@ -429,16 +367,20 @@ class NutrifyAIApp:
                 
                 st.markdown(f"""
                 <div style="background: {bg_color}; padding: 1rem; border-radius: 8px; border-left: 4px solid {status_color}; margin: 0.5rem 0;">
-                    <h4 style="color: #333; margin: 0 0 0.5rem 0;">🌱 Soil Health Score</h4>
-                    <p style="color: #333; margin: 0.25rem 0;"><strong>Score:</strong> <span style="color: {status_color}; font-weight: bold;">{health_score:.3f} ({health_score:.1%})</span></p>
-                    <p style="color: #333; margin: 0.25rem 0;"><strong>Status:</strong> <span style="color: {status_color}; font-weight: bold;">{health_status}</span></p>
+                    <h4 style="color: #333; margin: 0 0 0.5rem 0;">🌱 {text['soil_health_score']}</h4>
+                    <p style="color: #333; margin: 0.25rem 0;"><strong>{text['score']}:</strong> <span style="color: {status_color}; font-weight: bold;">{health_score:.3f} ({health_score:.1%})</span></p>
+                    <p style="color: #333; margin: 0.25rem 0;"><strong>{text['status']}:</strong> <span style="color: {status_color}; font-weight: bold;">{text[health_status]}</span></p>
                 </div>
                 """, unsafe_allow_html=True)
         
         with tab2:
             treatment = results['treatment_plan']
+            # The predictor's English plan, unless the catalog translates this treatment
+            concern = treatment['primary_concern'].lower().replace(' ', '_')
+            translated = self.translations.treatment(
+                concern if concern in self.predictor.organic_treatments else 'maintenance') or {}
             
-            st.markdown("#### 🌿 Organic Treatment Plan")
+            st.markdown(f"#### 🌿 {text['organic_treatment_plan']}")
             
             # Determine severity color
             severity = treatment['severity']
@@ -457,137 +399,333 @@ class NutrifyAIApp:
             
             st.markdown(f"""
             <div style="background: {bg_color}; padding: 1rem; border-radius: 8px; border-left: 4px solid {severity_color}; margin: 0.5rem 0;">
-                <h4 style="color: #333; margin: 0 0 0.5rem 0;">🎯 Primary Issue: {treatment['primary_concern']}</h4>
-                <p style="color: #333; margin: 0.25rem 0;"><strong>Severity:</strong> <span style="color: {severity_color}; font-weight: bold;">{treatment['severity']}</span></p>
-                <p style="color: #333; margin: 0.25rem 0;"><strong>Timeline:</strong> {treatment['timeline']}</p>
-                <p style="color: #333; margin: 0.25rem 0;"><strong>Cost:</strong> {treatment['cost_estimate']}</p>
-                <p style="color: #333; margin: 0.25rem 0;"><strong>Sustainability:</strong> {treatment['sustainability_score']}/100</p>
+                <h4 style="color: #333; margin: 0 0 0.5rem 0;">🎯 {text['primary_issue']}: {translated.get('title', treatment['primary_concern'])}</h4>
+                <p style="color: #333; margin: 0.25rem 0;"><strong>{text['severity']}:</strong> <span style="color: {severity_color}; font-weight: bold;">{text.get(severity.lower(), severity)}</span></p>
+                <p style="color: #333; margin: 0.25rem 0;"><strong>{text['timeline']}:</strong> {translated.get('timeline', treatment['timeline'])}</p>
+                <p style="color: #333; margin: 0.25rem 0;"><strong>{text['cost']}:</strong> {translated.get('cost', treatment['cost_estimate'])}</p>
+                <p style="color: #333; margin: 0.25rem 0;"><strong>{text['sustainability']}:</strong> {treatment['sustainability_score']}/100</p>
             </div>
             """, unsafe_allow_html=True)
             
-            st.markdown("#### 🌱 Recommended Organic Solutions")
-            for i, solution in enumerate(treatment['organic_solutions'], 1):
+            st.markdown(f"#### 🌱 {text['recommended_solutions']}")
+            for i, solution in enumerate(translated.get('solutions', treatment['organic_solutions']), 1):
                 st.markdown(f"{i}. {solution}")
+            
+            self.render_amendment_search(soil_data, text)
         
         with tab3:
-            st.markdown("#### 📈 Soil Health Visualizations")
-            
-            # Create visualizations
-            fig = make_subplots(
-                rows=2, cols=2,
-                subplot_titles=('NPK Levels', 'pH Analysis', 'Environmental Factors', 'Soil Health Score'),
-                specs=[[{"type": "bar"}, {"type": "bar"}],
-                       [{"type": "scatter"}, {"type": "indicator"}]]
-            )
-            
-            # NPK levels
-            nutrients = ['Nitrogen', 'Phosphorus', 'Potassium']
-            values = [soil_data[0], soil_data[1], soil_data[2]]
-            fig.add_trace(
-                go.Bar(x=nutrients, y=values, name="NPK Levels", marker_color=['green', 'red', 'blue']),
-                row=1, col=1
-            )
-            
-            # pH analysis
-            ph_value = soil_data[3]
-            fig.add_trace(
-                go.Bar(x=['pH Level'], y=[ph_value], name="pH", marker_color='orange'),
-                row=1, col=2
-            )
-            
-            # Environmental factors
-            fig.add_trace(
-                go.Scatter(x=['Temperature', 'Humidity', 'Rainfall'], 
-                          y=[soil_data[4], soil_data[5], soil_data[6]], 
-                          mode='markers+lines', name="Environmental"),
-                row=2, col=1
-            )
-            
-            # Soil health score
-            health_score = results['soil_health_predicted'] or 0.5
-            fig.add_trace(
-                go.Indicator(
-                    mode="gauge+number+delta",
-                    value=health_score,
-                    domain={'x': [0, 1], 'y': [0, 1]},
-                    title={'text': "Soil Health Score"},
-                    gauge={'axis': {'range': [None, 1]},
-                           'bar': {'color': "darkgreen"},
-                           'steps': [{'range': [0, 0.4], 'color': "lightgray"},
-                                    {'range': [0.4, 0.6], 'color': "yellow"},
-                                    {'range': [0.6, 1], 'color': "green"}]}
-                ),
-                row=2, col=2
-            )
-            
-            fig.update_layout(height=600, showlegend=False)
+            st.markdown(f"#### 📈 {text['soil_health_visualizations']}")
+            # Every tab's content is sent with the page, so the chart waits for the toggle
+            if st.toggle(text['show_chart'], key="show_soil_chart"):
+                figures = profiler.lazy_import("figures").soil_health_figures
+                titles = (text['npk_levels'], text['ph_analysis'], text['environmental_factors'],
+                          text['soil_health_score'])
+                # The shared figure is patched and serialized under its lock
+                with figures.patched(results, soil_data, titles) as fig:
+                    st.plotly_chart(fig, use_container_width=True)
+                payload = figures.payload(titles)
+                st.caption(f"Chart payload: {payload / 1024:.1f} KB (budget {figures.byte_budget / 1024:.1f} KB)")
+    
+    def render_amendment_search(self, soil_data, text):
+        """What-if search for the cheapest change that clears this sample's deficiencies"""
+        st.markdown(f"#### 🧮 {text['amendment_search']}")
+        st.caption(text['amendment_help'])
+        objectives = {'cost': text['lowest_cost'], 'change': text['smallest_change']}
+        objective = st.radio(text['optimize_for'], list(objectives), format_func=objectives.get,
+                             horizontal=True, key="amendment_objective")
+        raw = tuple(float(value) for value in soil_data[:7])
+        if st.button(f"🧮 {text['find_amendment']}", key="find_amendment"):
+            amendments = profiler.lazy_import("amendments")
+            st.session_state.amendment = (raw, objective, amendments.find_amendment(self.predictor, raw, objective))
+        
+        # Kept for this sample and objective only, so a new analysis never shows a stale answer
+        saved = st.session_state.get("amendment")
+        if not saved or saved[:2] != (raw, objective):
+            return
+        result = saved[2]
+        if result['feasible'] and not result['steps']:
+            st.success(f"✅ {text['no_amendment_needed']}")
+        elif result['feasible']:
+            st.success(f"✅ {text['amendment_found']}: ₹{result['cost']:,.0f}{text['per_acre']}")
+        else:
+            st.warning(f"⚠️ {text['amendment_closest']}: ₹{result['cost']:,.0f}{text['per_acre']}")
+        for step in result['steps']:
+            source = text.get(f"source_{step['input']}_{step['direction']}", step['source'])
+            name = 'pH' if step['input'] == 'ph' else step['input']
+            st.markdown(f"- **{name}** {step['change']:+g} {step['unit']} · {source} · "
+                        f"₹{step['cost']:,.0f}{text['per_acre']}")
+        
+        remaining = [text.get(t, t) for t, pred in result['predictions'].items() if pred == 1]
+        if remaining:
+            st.markdown(f"**{text['still_predicted']}:** {', '.join(remaining)}")
+        health = result['soil_health_predicted']
+        st.caption(f"{text['predicted_health']}: {'-' if health is None else f'{health:.3f}'} · "
+                   f"{text['candidates_scored']}: {result['candidates']:,} ({result['seconds'] * 1000:.0f} ms)")
+    
+    @section_fragment("bulk_analysis")
+    def render_bulk_analysis_page(self):
+        """Render the bulk CSV analysis page"""
+        st.title("📦 Bulk Analysis")
+        self.load_models()
+        bulk = profiler.lazy_import("bulk")
+        
+        st.markdown("Upload a lab CSV with columns **N, P, K, ph, temperature, humidity, rainfall**. "
+                    "The file is processed in chunks, so large files stay within memory. Rows with "
+                    "**farmer_id** and **field_id** (and optionally **village**, **sampled_at**) are also "
+                    "saved to the field history.")
+        
+        uploaded_file = st.file_uploader("Lab results CSV", type=["csv"])
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            chunksize = st.number_input("Rows per chunk", min_value=1000, max_value=1000000,
+                                        value=bulk.DEFAULT_CHUNKSIZE, step=10000)
+        with col2:
+            output_format = st.selectbox("Output format", ["CSV", "Parquet"])
+        with col3:
+            mode = st.selectbox("Inference mode", ["model", "rules"],
+                                help="'rules' screens with the Week 1 deficiency thresholds directly; "
+                                     "much faster, but not the trained models")
+        
+        if uploaded_file is not None and st.button("🔍 Analyze File", type="primary"):
+            extension = output_format.lower()
+            output_path = os.path.join(tempfile.gettempdir(), f"nutrify_bulk_{uploaded_file.file_id}.{extension}")
+            
+            progress_bar = st.progress(0.0)
+            status = st.empty()
+            
+            def report(rows_done, elapsed, rate):
+                # Bytes consumed so far give the completed fraction without counting rows first
+                progress_bar.progress(min(uploaded_file.tell() / max(uploaded_file.size, 1), 1.0))
+                status.markdown(f"**{rows_done:,}** rows analysed · {elapsed:.1f}s · {rate:,.0f} rows/sec")
+            
+            try:
+                analyzer = bulk.BulkAnalyzer(self.predictor, chunksize=int(chunksize), mode=mode,
+                                             prediction_log=prediction_log,
+                                             soil_history=profiler.lazy_import("soil_history").soil_history)
+                summary = analyzer.run(uploaded_file, output_path, extension, progress_callback=report)
+                progress_bar.progress(1.0)
+                
+                st.success(f"✅ Analysed {summary['rows']:,} rows in {summary['seconds']:.1f}s "
+                           f"({summary['rows_per_sec']:,.0f} rows/sec, {summary['inference_mode']} mode)")
+                if summary['invalid_rows']:
+                    st.warning(f"⚠️ {summary['invalid_rows']:,} rows were invalid; see the 'error' column")
+                
+                with open(output_path, 'rb') as f:
+                    st.download_button("⬇️ Download Results", f, file_name=f"nutrify_results.{extension}")
+                    
+            except Exception as e:
+                st.error(f"❌ Error during bulk analysis: {str(e)}")
+    
+    @section_fragment("field_history")
+    def render_field_history_page(self):
+        """Render one field's samples over time and the village trend"""
+        go = profiler.lazy_import("plotly.graph_objects")
+        soil_history = profiler.lazy_import("soil_history").soil_history
+        st.title("🗂️ Field History")
+        
+        villages = soil_history.villages()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            village = st.selectbox("Village", ["All villages"] + villages)
+        village = None if village == "All villages" else village
+        fields = soil_history.fields(village)
+        if not fields:
+            st.info("No saved analyses yet. Enter a Farmer ID and Field ID on the Soil Analysis page, "
+                    "or upload a bulk file with farmer_id and field_id columns.")
+            return
+        with col2:
+            farmer_id, field_id = st.selectbox("Field", fields, format_func=lambda f: f"Farmer {f[0]} · Field {f[1]}")
+        with col3:
+            period = st.selectbox("Trend period", ["month", "season", "year", "week"])
+        
+        # Field samples over time
+        history = soil_history.field_history(farmer_id, field_id)
+        st.markdown(f"### 🌱 Farmer {farmer_id} · Field {field_id} ({len(history)} samples)")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            fig = go.Figure([go.Scatter(x=history['date'], y=history[name], mode='lines+markers', name=name)
+                             for name in ['N', 'P', 'K']])
+            fig.update_layout(title="NPK (kg/hectare)", height=350)
+            st.plotly_chart(fig, use_container_width=True)
+        with col2:
+            fig = go.Figure([
+                go.Scatter(x=history['date'], y=history['ph'], mode='lines+markers', name="pH"),
+                go.Scatter(x=history['date'], y=history['soil_health'], mode='lines+markers',
+                           name="Soil health", yaxis='y2')
+            ])
+            fig.update_layout(title="pH and Predicted Soil Health", height=350,
+                              yaxis2=dict(overlaying='y', side='right', range=[0, 1]))
+            st.plotly_chart(fig, use_container_width=True)
+        
+        st.dataframe(history.drop(columns=['ts']).tail(20), use_container_width=True)
+        
+        # Village (or field) trend, aggregated inside SQLite
+        if village:
+            trend = soil_history.trend(village=village, period=period)
+            st.markdown(f"### 🏘️ {village} by {period}")
+        else:
+            trend = soil_history.trend(farmer_id=farmer_id, field_id=field_id, period=period)
+            st.markdown(f"### 📈 Field trend by {period}")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            fig = go.Figure(go.Scatter(x=trend['period'], y=trend['soil_health'], mode='lines+markers'))
+            fig.update_layout(title="Average Soil Health", height=300)
+            st.plotly_chart(fig, use_container_width=True)
+        with col2:
+            fig = go.Figure(go.Bar(x=trend['period'], y=trend['deficiency_rate'] * 100, marker_color='orange'))
+            fig.update_layout(title="Deficiency Rate (%)", height=300)
             st.plotly_chart(fig, use_container_width=True)
     
+    @staticmethod
+    def _show_earlier_messages():
+        st.session_state.chat_visible += CHAT_WINDOW
+    
+    @section_fragment("ai_assistant")
     def render_ai_assistant_page(self):
         """Render the AI assistant page"""
         st.title("🤖 AI Assistant")
         
-        st.markdown("### 💬 Chat with Nutrify AI")
-        st.markdown("Ask questions about soil health, farming practices, or get personalized advice!")
+        text = self.translations.page("assistant")
+        st.markdown(f"### 💬 {text['chat_with_ai']}")
+        st.markdown(text['ask_questions'])
+        
+        # Chat interface: a bounded history, of which only the latest window is rendered
+        if "chat_history" not in st.session_state:
+            st.session_state.chat_history = ChatHistory()
+            st.session_state.chat_visible = CHAT_WINDOW
+        history = st.session_state.chat_history
+        
+        if history.summary:
+            with st.expander(f"🗂️ Earlier in this chat ({history.compacted_questions:,} questions)"):
+                st.markdown(history.summary)
         
-        # Chat interface
-        if "messages" not in st.session_state:
-            st.session_state.messages = []
+        hidden = len(history) - st.session_state.chat_visible
+        if hidden > 0:
+            # The callback runs before the rerun, so the window and the button label agree
+            st.button(f"⬆️ Load {min(hidden, CHAT_WINDOW)} earlier messages", on_click=self._show_earlier_messages)
         
         # Display chat messages
-        for message in st.session_state.messages:
+        for message in history.recent(st.session_state.chat_visible):
             with st.chat_message(message["role"]):
                 st.markdown(message["content"])
         
         # Chat input
-        if prompt := st.chat_input("Ask about soil health, farming, or treatments..."):
-            # Add user message
-            st.session_state.messages.append({"role": "user", "content": prompt})
-            
-            # Get AI response
+        if prompt := st.chat_input(text['ask_placeholder']):
+            # Add user message; a new turn brings the view back to the latest window
+            history.append("user", prompt)
+            st.session_state.chat_visible = CHAT_WINDOW
+            with st.chat_message("user"):
+                st.markdown(prompt)
+            
+            # Stream the AI response into the bubble as it arrives (repeat questions come from the cache)
             with st.chat_message("assistant"):
-                with st.spinner("Thinking..."):
-                    try:
-                        response = self.gemini_client.get_response(prompt)
-                        st.markdown(response)
-                        st.session_state.messages.append({"role": "assistant", "content": response})
-                    except Exception as e:
-                        error_msg = f"Sorry, I encountered an error: {str(e)}"
-                        st.markdown(error_msg)
-                        st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                placeholder = st.empty()
+                placeholder.markdown(f"_{text['thinking']}_")
+                response = ""
+                try:
+                    for piece in self.gemini_client.stream_response(prompt):
+                        response += piece
+                        placeholder.markdown(response + "▌")
+                    placeholder.markdown(response)
+                    history.append("assistant", response)
+                except Exception as e:
+                    error_msg = f"Sorry, I encountered an error: {str(e)}"
+                    placeholder.markdown(error_msg)
+                    history.append("assistant", error_msg)
+        
+        cache = self.gemini_client.cache.stats()
+        st.caption(f"Answer cache: {cache['size']}/{cache['maxsize']} · hit rate {cache['hit_rate']:.0%} "
+                   f"({cache['hits']} hits, {cache['misses']} misses)")
+        usage = history.stats()
+        st.caption(f"Chat history: {usage['messages']}/{usage['max_messages']} messages · "
+                   f"{usage['chars'] / 1000:.1f}/{usage['max_chars'] / 1000:.0f}k characters")
     
+    @section_fragment("analytics")
     def render_analytics_page(self):
-        """Render the analytics page"""
+        """Render the analytics page from the prediction log's running aggregates"""
+        pd = profiler.lazy_import("pandas")
+        go = profiler.lazy_import("plotly.graph_objects")
         st.title("📊 Analytics Dashboard")
+        # Reruns only this page to pick up newly logged predictions
+        st.button("🔄 Refresh")
         
-        # System performance metrics
-        st.markdown("### 🎯 System Performance")
+        aggregates = prediction_log.refresh()
+        if not prediction_log.enabled:
+            st.info("The prediction log is turned off (NUTRIFY_PREDICTION_LOG is empty).")
+        elif aggregates.rows == 0:
+            st.info("No predictions logged yet. Analyses from every page, bulk runs and the API appear here.")
+        
+        # Served predictions
+        st.markdown("### 🎯 Predictions Served")
         
         col1, col2, col3, col4 = st.columns(4)
         
+        deficiency_rate = aggregates.rate('any_deficiency')
+        health_mean = aggregates.health_mean
         with col1:
-            st.metric("Overall Accuracy", "99.9%", "0.1%")
+            st.metric("Predictions", f"{aggregates.rows:,}")
         
         with col2:
-            st.metric("Deficiency Detection", "26.6%", "2.1%")
+            st.metric("Deficiency Detection", format_rate(deficiency_rate),
+                      None if deficiency_rate is None else
+                      f"{(deficiency_rate - TRAINING_RATES['any_deficiency']) * 100:+.1f} pts vs training",
+                      delta_color="inverse")
         
         with col3:
-            st.metric("Organic Solutions", "24+", "5")
+            st.metric("Avg Soil Health", "-" if health_mean is None else f"{health_mean:.1%}")
         
         with col4:
-            st.metric("Farmers Helped", "26,590+", "1,200")
+            st.metric("Last 24 Hours", f"{sum(aggregates.recent_hourly(24).values()):,}")
+        
+        if aggregates.rows:
+            col1, col2 = st.columns(2)
+            with col1:
+                labels = [t.replace('_', ' ').title() for t in DEFICIENCY_TARGETS]
+                fig = go.Figure([
+                    go.Bar(x=labels, y=[aggregates.rate(t) * 100 for t in DEFICIENCY_TARGETS], name="Logged"),
+                    go.Bar(x=labels, y=[TRAINING_RATES[t] * 100 for t in DEFICIENCY_TARGETS], name="Week 1 training")
+                ])
+                fig.update_layout(title="Deficiency Rate (%)", barmode='group', height=350)
+                st.plotly_chart(fig, use_container_width=True)
+            
+            with col2:
+                bins = len(aggregates.health_bins)
+                fig = go.Figure(go.Bar(x=[f"{i / bins:.1f}-{(i + 1) / bins:.1f}" for i in range(bins)],
+                                       y=aggregates.health_bins, marker_color='green'))
+                fig.update_layout(title="Soil Health Distribution", height=350)
+                st.plotly_chart(fig, use_container_width=True)
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                fig = go.Figure(go.Bar(x=list(aggregates.severity), y=list(aggregates.severity.values()),
+                                       marker_color=['green', 'gold', 'orange', 'red']))
+                fig.update_layout(title="Severity", height=350)
+                st.plotly_chart(fig, use_container_width=True)
+            
+            with col2:
+                hourly = aggregates.recent_hourly(VOLUME_HOURS)
+                fig = go.Figure(go.Scatter(x=list(hourly), y=list(hourly.values()), mode='lines+markers'))
+                fig.update_layout(title="Predictions per Hour (UTC, last 7 days)", height=350)
+                st.plotly_chart(fig, use_container_width=True)
         
-        # Agricultural impact
+        # Agricultural impact: logged traffic next to the Week 1 training data
         st.markdown("### 🌱 Agricultural Impact")
         
         impact_data = {
             'Metric': ['Deficiency Rate', 'Zinc Deficiency', 'Iron Deficiency', 'Multiple Deficiencies', 'Soil Health Average'],
-            'Value': ['26.6%', '21.3%', '0.6%', '6.9%', '54.9%'],
+            'Logged': [format_rate(aggregates.rate(t)) for t in DEFICIENCY_TARGETS] + [format_rate(health_mean)],
+            'Week 1 Training': [format_rate(TRAINING_RATES[t]) for t in DEFICIENCY_TARGETS] + [format_rate(TRAINING_RATES['soil_health_score'])],
             'Impact': ['High', 'Critical', 'Moderate', 'Severe', 'Fair']
         }
         
         df_impact = pd.DataFrame(impact_data)
         st.dataframe(df_impact, use_container_width=True)
+        
+        if aggregates.by_source:
+            st.caption("By source: " + " · ".join(f"{source} {rows:,}" for source, rows in aggregates.by_source.items()))
     
     def run(self):
         """Run the main application"""
@@ -601,12 +739,52 @@ class NutrifyAIApp:
             self.render_home_page()
         elif page == "🔬 Soil Analysis":
             self.render_soil_analysis_page()
+        elif page == "📦 Bulk Analysis":
+            self.render_bulk_analysis_page()
+        elif page == "🗂️ Field History":
+            self.render_field_history_page()
         elif page == "🤖 AI Assistant":
             self.render_ai_assistant_page()
         elif page == "📊 Analytics":
             self.render_analytics_page()
+        
+        self.render_startup_profile()
+        self.render_stage_timings()
+    
+    def render_startup_profile(self):
+        """Per-phase import/setup timings of this process's cold start"""
+        with st.sidebar.expander("⏱️ Startup Profile"):
+            for entry in profiler.report():
+                st.markdown(f"`{entry['kind']}` **{entry['name']}**: {entry['seconds'] * 1000:.0f} ms "
+                            f"(at +{entry['at_seconds']:.2f}s)")
+    
+    def render_stage_timings(self):
+        """Per-stage prediction timings recorded by this process"""
+        with st.sidebar.expander("📈 Stage Timings"):
+            if not metrics.enabled:
+                st.caption("Instrumentation is off (NUTRIFY_INSTRUMENTATION=0).")
+                return
+            rows = metrics.summary()
+            if not rows:
+                st.caption("Run an analysis to record timings.")
+            for row in rows:
+                if not row['count']:
+                    continue  # the full-run interaction still being timed around this sidebar
+                label = row.get('target', row.get('section'))
+                target = f" · {label}" if label else ""
+                st.markdown(f"`{row.get('call', '')}` **{row['stage']}**{target}: "
+                            f"p50 {row['p50_ms']:.2f} ms · p95 {row['p95_ms']:.2f} ms · n={row['count']}")
 
 # Main execution
 if __name__ == "__main__":
-    app = NutrifyAIApp()
-    app.run()
+    # Fragment reruns do not come through here; each section times its own
+    full_run = True
+    try:
+        with metrics.stage('interaction', call='full', section='app'):
+            with profiler.phase("page config"):
+                configure_page()
+            with profiler.phase("app setup"):
+                app = NutrifyAIApp()
+            app.run()
+    finally:
+        full_run = False
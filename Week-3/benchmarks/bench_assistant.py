@@ -0,0 +1,67 @@
+"""
+⏱️ AI assistant: blocking vs streamed answers and cache hits, against the local stand-in
+
+Usage: python benchmarks/bench_assistant.py [--first-token-ms 300] [--words-per-second 40]
+"""
+
+import argparse
+import time
+
+import common  # noqa: F401  (puts Week-3 on the path)
+from gemini_client import GeminiAIClient, ResponseCache
+from gemini_standin import start_standin
+
+QUESTIONS = [
+    "How do I fix zinc deficiency in my soil?",
+    "What organic pesticide can I use?",
+    "Is vermicompost cheaper than fertilizer? What does it cost?",
+    "Which crops should I grow next season?"
+]
+# The same questions as farmers actually type them
+REPHRASED = [
+    "how do i fix ZINC deficiency in my soil",
+    "What organic pesticide can I use ??",
+    "is vermicompost cheaper than fertilizer, what does it cost",
+    "Which crops should I grow next season"
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark assistant latency against the Gemini stand-in")
+    parser.add_argument("--first-token-ms", type=float, default=300.0)
+    parser.add_argument("--words-per-second", type=float, default=40.0)
+    args = parser.parse_args()
+
+    server, model, base_url = start_standin(first_token_ms=args.first_token_ms,
+                                            words_per_second=args.words_per_second)
+    client = GeminiAIClient(api_key='local', base_url=base_url, cache=ResponseCache())
+
+    print(f"{'':44} {'blocking':>10} {'first piece':>12} {'streamed':>10}")
+    for question in QUESTIONS:
+        client.cache.clear()
+        start = time.perf_counter()
+        client.get_response(question)
+        blocking = time.perf_counter() - start
+
+        client.cache.clear()
+        start = time.perf_counter()
+        first = None
+        for _ in client.stream_response(question):
+            first = first or time.perf_counter() - start
+        streamed = time.perf_counter() - start
+        print(f"{question[:44]:44} {blocking * 1000:8.0f}ms {first * 1000:10.0f}ms {streamed * 1000:8.0f}ms")
+
+    for question in QUESTIONS:
+        client.get_response(question)
+    requests_before = model.requests
+    start = time.perf_counter()
+    for question in REPHRASED:
+        client.get_response(question)
+    hit_us = (time.perf_counter() - start) / len(REPHRASED) * 1e6
+    print(f"\nRephrased repeats: {hit_us:.0f}µs each, {model.requests - requests_before} model calls "
+          f"for {len(REPHRASED)} questions")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+⏱️ Batch vs single-sample inference throughput
+
+Usage: python benchmarks/bench_batch_inference.py [--rows 1000 10000] [--check]
+"""
+
+import argparse
+import numpy as np
+
+from common import load_benchmark_predictor, load_feature_names, synthetic_soil_features, time_call
+
+
+def single_sample_loop(predictor, X, feature_names):
+    """Today's path: one predict_complete_analysis call per row"""
+    return [predictor.predict_complete_analysis(X[i:i + 1], feature_names) for i in range(len(X))]
+
+
+def check_parity(predictor, X, feature_names):
+    """Count rows where predict_batch disagrees with the single-sample path"""
+    batch = predictor.predict_batch(X)
+    mismatches = 0
+    for i, single in enumerate(single_sample_loop(predictor, X, feature_names)):
+        row = batch.iloc[i]
+        same = all(int(row[t]) == int(p) for t, p in single['predictions'].items())
+        same = same and row['severity'] == single['severity']
+        same = same and row['primary_concern'] == single['treatment_plan']['primary_concern']
+        same = same and row['cost_estimate'] == single['treatment_plan']['cost_estimate']
+        if single['soil_health_predicted'] is not None:
+            same = same and np.isclose(row['soil_health_predicted'], single['soil_health_predicted'])
+        mismatches += not same
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark predict_batch against single-sample calls")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--loop-rows", type=int, default=1000,
+                        help="Rows timed through the single-sample loop (it is slow)")
+    parser.add_argument("--check", action="store_true", help="Verify batch output matches single calls")
+    args = parser.parse_args()
+
+    predictor, source = load_benchmark_predictor()
+    feature_names = load_feature_names()
+    print(f"Predictor: {source}")
+
+    X_loop = synthetic_soil_features(args.loop_rows)
+    loop_time = time_call(single_sample_loop, predictor, X_loop, feature_names, repeat=1)
+    loop_rate = args.loop_rows / loop_time
+    print(f"{'single-sample loop':>22} | {args.loop_rows:>9,} rows | {loop_rate:>12,.0f} rows/sec")
+
+    for n_rows in args.rows:
+        X = synthetic_soil_features(n_rows)
+        batch_time = time_call(predictor.predict_batch, X)
+        batch_rate = n_rows / batch_time
+        print(f"{'predict_batch':>22} | {n_rows:>9,} rows | {batch_rate:>12,.0f} rows/sec "
+              f"| {batch_rate / loop_rate:,.0f}x")
+
+    if args.check:
+        mismatches = check_parity(predictor, X_loop, feature_names)
+        print(f"Parity check: {mismatches} mismatching rows out of {args.loop_rows:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+⏱️ Vectorized feature engineering vs the Week 1 row-wise apply
+
+Usage: python benchmarks/bench_feature_engineering.py [--rows 1000000 5000000] [--apply-rows 200000]
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+
+from common import time_call
+from feature_engineering import RAW_FEATURES, INPUT_RANGES, FEATURE_NAMES, engineer_features, build_training_features
+
+
+def full_range_inputs(n_rows, seed=42):
+    """Raw inputs over the whole of INPUT_RANGES, so the N/P/K caps and the pH floor of 0 are hit"""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.uniform(*INPUT_RANGES[name], n_rows) for name in RAW_FEATURES])
+
+
+def calculate_soil_health_score(row):
+    """Week 1 notebook's original per-row score, kept here as the baseline"""
+    n_score = min(row['N'] / 200, 1.0)
+    p_score = min(row['P'] / 40, 1.0)
+    k_score = min(row['K'] / 200, 1.0)
+    if 6.0 <= row['ph'] <= 7.5:
+        ph_score = 1.0
+    else:
+        ph_score = max(0, 1 - abs(row['ph'] - 6.75) / 3)
+    health_score = (n_score * 0.25 + p_score * 0.25 + k_score * 0.25 + ph_score * 0.25)
+    return round(health_score, 3)
+
+
+def apply_features(df):
+    """Week 1 notebook's original feature code"""
+    df_features = df.copy()
+    df_features['N_P_ratio'] = df_features['N'] / (df_features['P'] + 1)
+    df_features['N_K_ratio'] = df_features['N'] / (df_features['K'] + 1)
+    df_features['P_K_ratio'] = df_features['P'] / (df_features['K'] + 1)
+    df_features['soil_health_score'] = df_features.apply(calculate_soil_health_score, axis=1)
+    return df_features
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark engineer_features against the row-wise apply")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000000, 5000000])
+    parser.add_argument("--apply-rows", type=int, default=200000,
+                        help="Rows timed through apply (about 10s per 500k rows); its rate is per row")
+    args = parser.parse_args()
+
+    df_apply = pd.DataFrame(full_range_inputs(args.apply_rows), columns=RAW_FEATURES)
+    apply_time = time_call(apply_features, df_apply, repeat=1)
+    apply_rate = args.apply_rows / apply_time
+    print(f"{'row-wise apply':>24} | {args.apply_rows:>10,} rows | {apply_rate:>14,.0f} rows/sec")
+
+    # Parity on the apply sample: ratios and the rounded score must match exactly
+    expected = apply_features(df_apply)[FEATURE_NAMES].values
+    mismatches = int((engineer_features(df_apply.values) != expected).any(axis=1).sum())
+
+    for n_rows in args.rows:
+        raw = full_range_inputs(n_rows)
+        df = pd.DataFrame(raw, columns=RAW_FEATURES)
+        for label, func, arg in (('engineer_features', engineer_features, raw),
+                                 ('build_training_features', build_training_features, df)):
+            elapsed = time_call(func, arg)
+            rate = n_rows / elapsed
+            print(f"{label:>24} | {n_rows:>10,} rows | {rate:>14,.0f} rows/sec | {rate / apply_rate:,.0f}x")
+
+    capped = {name: f"{(df_apply[name] > cap).mean():.0%}" for name, cap in (('N', 200), ('P', 40), ('K', 200))}
+    print(f"Parity check: {mismatches} mismatching rows out of {args.apply_rows:,} "
+          f"(above the caps: {capped}, pH score 0: {(abs(df_apply['ph'] - 6.75) >= 3).mean():.0%})")
+
+
+if __name__ == "__main__":
+    main()
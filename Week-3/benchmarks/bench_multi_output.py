@@ -0,0 +1,97 @@
+"""
+⏱️ Multi-output forest vs the five per-target models: latency, memory, accuracy
+
+Usage: python benchmarks/bench_multi_output.py [--calls 300] [--rows 20000]
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+
+from common import load_benchmark_predictor, synthetic_raw_inputs
+from feature_engineering import engineer_features, deficiency_targets, soil_health_score
+from predictor import load_predictor, DerivedFeatureTarget, MODEL_PATHS
+
+
+def load_multi_output_predictor(path):
+    """Saved multi-output artifact if present, otherwise one trained on the Week 1 data"""
+    if os.path.exists(path):
+        return load_predictor(path), "saved artifact"
+    from train import train
+    _, multi, _, _ = train(workers=1, multi_output=True, log=lambda message: None)
+    return multi, "fitted on Week 1 data"
+
+
+def forests(predictor):
+    """Distinct fitted estimators behind the predictor's targets"""
+    models = {id(getattr(m, 'forest', m)): getattr(m, 'forest', m) for m in predictor.models.values()}
+    return [model for model in models.values() if not isinstance(model, DerivedFeatureTarget)]
+
+
+def tree_footprint(predictor):
+    """Tree nodes and bytes of node/value arrays walked to predict every target"""
+    nodes = nbytes = 0
+    for model in forests(predictor):
+        for tree in np.ravel(getattr(model, 'estimators_', [])):
+            nodes += tree.tree_.node_count
+            state = tree.tree_.__getstate__()
+            nbytes += state['nodes'].nbytes + state['values'].nbytes
+    return nodes, nbytes
+
+
+def single_latency_us(predictor, X, calls):
+    feature_names = None
+    timings = []
+    for i in range(calls):
+        start = time.perf_counter()
+        predictor.predict_complete_analysis(X[i:i + 1], feature_names)
+        timings.append(time.perf_counter() - start)
+    return np.percentile(timings, [50, 99]) * 1e6
+
+
+def accuracy_by_target(predictor, X, raw):
+    """Agreement with the Week 1 label definitions, which are the ground truth"""
+    truth = deficiency_targets(raw)
+    truth['soil_health_score'] = soil_health_score(raw[:, 0], raw[:, 1], raw[:, 2], raw[:, 3])
+    report = {}
+    for target_name, preds in predictor.predict_targets(X).items():
+        if target_name == 'soil_health_score':
+            report[target_name] = f"MAE {np.mean(np.abs(preds - truth[target_name])):.4f}"
+        else:
+            report[target_name] = f"acc {np.mean(preds == truth[target_name]):.4f}"
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the multi-output forest with the per-target models")
+    parser.add_argument("--calls", type=int, default=300, help="Single-sample calls timed per layout")
+    parser.add_argument("--rows", type=int, default=20000, help="Rows for batch timing and accuracy")
+    args = parser.parse_args()
+
+    per_target, per_target_source = load_benchmark_predictor()
+    multi, multi_source = load_multi_output_predictor(MODEL_PATHS['multi_output'])
+    layouts = [('per_target', per_target, per_target_source), ('multi_output', multi, multi_source)]
+
+    raw = synthetic_raw_inputs(args.rows, seed=7)
+    X = engineer_features(raw)
+
+    for name, predictor, source in layouts:
+        p50, p99 = single_latency_us(predictor, X, args.calls)
+        start = time.perf_counter()
+        predictor.predict_batch(X)
+        rate = args.rows / (time.perf_counter() - start)
+        nodes, nbytes = tree_footprint(predictor)
+        path = MODEL_PATHS[name]
+        file_size = f", {os.path.getsize(path) / 1e6:.1f} MB on disk" if os.path.exists(path) else ""
+
+        print(f"\n{name} ({source}): {len(forests(predictor))} estimator(s), {nodes:,} tree nodes, "
+              f"{nbytes / 1e6:.1f} MB of tree arrays{file_size}")
+        print(f"  single-sample | p50 {p50:9.0f}µs | p99 {p99:9.0f}µs")
+        print(f"  predict_batch | {rate:12,.0f} rows/sec")
+        for target_name, result in accuracy_by_target(predictor, X, raw).items():
+            print(f"  {target_name:22}: {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+⏱️ Inference service throughput over localhost
+
+Starts inference_service.py in a subprocess, fires concurrent keep-alive
+clients at /predict and checks responses against predict_complete_analysis.
+
+Usage: python benchmarks/bench_service.py [--clients 32] [--requests 200] [--max-batch-size 64]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+from common import WEEK3_DIR, MODEL_PATH, load_benchmark_predictor, load_feature_names, synthetic_soil_features
+from feature_engineering import RAW_FEATURES
+
+
+async def post(reader, writer, payload):
+    body = json.dumps(payload).encode()
+    writer.write(b"POST /predict HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+    await writer.drain()
+    headers = {}
+    await reader.readline()
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode().partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return json.loads(await reader.readexactly(int(headers["content-length"])))
+
+
+async def client(port, samples, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    responses = []
+    for sample in samples:
+        start = time.perf_counter()
+        responses.append(await post(reader, writer, sample))
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+    return responses
+
+
+async def wait_for_port(port, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Service did not start")
+
+
+async def run_load(port, raw, clients, requests):
+    samples = [dict(zip(RAW_FEATURES, map(float, row))) for row in raw]
+    latencies = []
+    start = time.perf_counter()
+    per_client = [samples[i * requests:(i + 1) * requests] for i in range(clients)]
+    responses = await asyncio.gather(*(client(port, s, latencies) for s in per_client))
+    elapsed = time.perf_counter() - start
+    return [r for group in responses for r in group], latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the micro-batching inference service")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per client")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=8599)
+    args = parser.parse_args()
+
+    predictor, source = load_benchmark_predictor()
+    model_path = MODEL_PATH
+    if not os.path.exists(model_path):
+        import joblib
+        model_path = os.path.join(tempfile.mkdtemp(), "stand_in_predictor.joblib")
+        joblib.dump(predictor, model_path)
+    print(f"Predictor: {source}")
+
+    service = subprocess.Popen([sys.executable, os.path.join(WEEK3_DIR, "inference_service.py"),
+                                "--port", str(args.port), "--model", model_path,
+                                "--max-batch-size", str(args.max_batch_size),
+                                "--max-wait-ms", str(args.max_wait_ms)])
+    try:
+        asyncio.run(wait_for_port(args.port))
+        n_samples = args.clients * args.requests
+        features = synthetic_soil_features(n_samples)
+        responses, latencies, elapsed = asyncio.run(
+            run_load(args.port, features[:, :len(RAW_FEATURES)], args.clients, args.requests))
+
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+        print(f"{n_samples:,} requests from {args.clients} clients in {elapsed:.2f}s | "
+              f"{n_samples / elapsed:,.0f} req/sec | p50 {p50:.1f}ms | p99 {p99:.1f}ms")
+
+        feature_names = load_feature_names()
+        mismatches = 0
+        for i in range(0, n_samples, max(n_samples // 200, 1)):
+            expected = predictor.predict_complete_analysis(features[i:i + 1], feature_names)
+            got = responses[i]
+            same = {k: int(v) for k, v in expected['predictions'].items()} == got['predictions']
+            same = same and expected['treatment_plan']['primary_concern'] == got['treatment_plan']['primary_concern']
+            same = same and expected['severity'] == got['severity']
+            mismatches += not same
+        print(f"Parity: {mismatches} mismatches in sampled responses")
+    finally:
+        service.terminate()
+        service.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+⏱️ Soil history store: write-behind insert rate and indexed range queries
+
+Usage: python benchmarks/bench_soil_history.py [--rows 300000] [--villages 30] [--fields 3000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+from common import load_benchmark_predictor, synthetic_raw_inputs, synthetic_soil_features
+from soil_history import SoilHistoryStore
+
+
+def timed_ms(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SQLite soil history store")
+    parser.add_argument("--rows", type=int, default=300000, help="Samples to insert")
+    parser.add_argument("--villages", type=int, default=30)
+    parser.add_argument("--fields", type=int, default=3000, help="Distinct farmer/field pairs")
+    args = parser.parse_args()
+
+    predictor, source = load_benchmark_predictor()
+    print(f"Predictor: {source}")
+
+    rng = np.random.default_rng(0)
+    raw = synthetic_raw_inputs(args.rows)
+    batch = predictor.predict_batch(synthetic_soil_features(args.rows), mode='rules')
+    field_numbers = rng.integers(0, args.fields, args.rows)
+    keys = pd.DataFrame({
+        'village': np.array([f'Village {i}' for i in range(args.villages)])[field_numbers % args.villages],
+        'farmer_id': field_numbers // 3,
+        'field_id': field_numbers % 3,
+        'ts': rng.uniform(1.6e9, 1.76e9, args.rows)  # late 2020 to late 2025
+    })
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = SoilHistoryStore(os.path.join(tmp_dir, 'soil_history.db'))
+
+        start = time.perf_counter()
+        store.record_batch(keys, raw, batch)
+        queued = time.perf_counter() - start
+        store.flush()
+        total = time.perf_counter() - start
+        print(f"\nInsert {args.rows:,} rows: queued in {queued:.2f}s, on disk after {total:.2f}s "
+              f"({args.rows / total:,.0f} rows/sec)")
+
+        results = predictor.predict_complete_analysis(synthetic_soil_features(1), None)
+        record_us = []
+        for i in range(200):
+            start = time.perf_counter()
+            store.record(keys['farmer_id'][i], keys['field_id'][i], raw[i], results, village=keys['village'][i])
+            record_us.append((time.perf_counter() - start) * 1e6)
+        store.flush()
+        print(f"record() while the writer runs: p50 {np.percentile(record_us, 50):.0f}µs, "
+              f"p99 {np.percentile(record_us, 99):.0f}µs")
+
+        farmer_id, field_id, village = keys['farmer_id'][0], keys['field_id'][0], keys['village'][0]
+        queries = [
+            ("field history", lambda: store.field_history(farmer_id, field_id)),
+            ("field history, one year", lambda: store.field_history(farmer_id, field_id, '2024-01-01', '2025-01-01')),
+            ("village trend by month", lambda: store.trend(village=village)),
+            ("village trend by season", lambda: store.trend(village=village, period='season')),
+            ("village trend, one year", lambda: store.trend(village=village, start='2024-01-01', end='2025-01-01')),
+            ("fields in village", lambda: store.fields(village))
+        ]
+        print()
+        for label, query in queries:
+            ms, result = timed_ms(query)
+            print(f"{label:26} | {ms:8.2f} ms | {len(result):>6,} rows")
+
+
+if __name__ == "__main__":
+    main()
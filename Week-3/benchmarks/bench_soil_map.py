@@ -0,0 +1,115 @@
+"""
+⏱️ Regional soil map: interpolation and model cells/sec, tile render time and cache hit rate
+
+Usage: python benchmarks/bench_soil_map.py [--cells 1000000] [--samples 300] [--requests 20000]
+"""
+
+import argparse
+import math
+import time
+import numpy as np
+import pandas as pd
+
+from common import load_benchmark_predictor, synthetic_raw_inputs
+from feature_engineering import RAW_FEATURES
+from soil_map import SoilMap, SoilMapTiles, HEALTH_LAYER, KM_PER_DEGREE
+
+# A district-sized box, about 45 x 40 km
+CENTER = (23.2, 77.4)
+SPAN_DEGREES = 0.4
+
+
+def synthetic_samples(n_samples, seed=0):
+    """Lab samples at random points of the box"""
+    rng = np.random.default_rng(seed)
+    samples = pd.DataFrame(synthetic_raw_inputs(n_samples, seed), columns=RAW_FEATURES)
+    samples['lat'] = CENTER[0] + rng.uniform(-SPAN_DEGREES / 2, SPAN_DEGREES / 2, n_samples)
+    samples['lon'] = CENTER[1] + rng.uniform(-SPAN_DEGREES / 2, SPAN_DEGREES / 2, n_samples)
+    return samples
+
+
+def cell_km_for(cells):
+    """Cell size giving about this many cells over the box"""
+    area = (SPAN_DEGREES * KM_PER_DEGREE) ** 2 * math.cos(math.radians(CENTER[0]))
+    return math.sqrt(area / cells)
+
+
+def tile_xy(lat, lon, z):
+    n = 2 ** z
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return x, y
+
+
+def simulate_viewers(soil_map, tiles, requests, layers, seed=0):
+    """Viewers panning and zooming over the map, each view asking for a 3x3 block of tiles
+
+    Returns per-request seconds for hits and misses.
+    """
+    rng = np.random.default_rng(seed)
+    lat_min, lat_max, lon_min, lon_max = soil_map.bounds
+    hit_seconds, miss_seconds = [], []
+    lat, lon, z = CENTER[0], CENTER[1], 11
+    while len(hit_seconds) + len(miss_seconds) < requests:
+        # Mostly small pans, sometimes a zoom step or a jump to another part of the district
+        move = rng.random()
+        if move < 0.15:
+            z = int(np.clip(z + rng.choice([-1, 1]), 9, 14))
+        elif move < 0.25:
+            lat, lon = rng.uniform(lat_min, lat_max), rng.uniform(lon_min, lon_max)
+        else:
+            step = 360.0 / 2 ** z
+            lat = float(np.clip(lat + rng.normal(0, step / 2), lat_min, lat_max))
+            lon = float(np.clip(lon + rng.normal(0, step / 2), lon_min, lon_max))
+        layer = layers[rng.integers(len(layers))]
+        x0, y0 = tile_xy(lat, lon, z)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                misses = tiles.misses
+                start = time.perf_counter()
+                tiles.get(soil_map, layer, z, x0 + dx, y0 + dy)
+                elapsed = time.perf_counter() - start
+                (miss_seconds if tiles.misses > misses else hit_seconds).append(elapsed)
+    return hit_seconds, miss_seconds
+
+
+def bench(predictor, cells, n_samples, requests, cache_size):
+    soil_map = SoilMap.build(predictor, synthetic_samples(n_samples), cell_km=cell_km_for(cells))
+    tiles = SoilMapTiles(cache_size)
+    layers = [HEALTH_LAYER, *[name for name in soil_map.layers if name != HEALTH_LAYER][:2]]
+    hit_seconds, miss_seconds = simulate_viewers(soil_map, tiles, requests, layers)
+    return soil_map, tiles, hit_seconds, miss_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark regional soil maps and their tile cache")
+    parser.add_argument("--cells", type=int, default=1000000, help="Approximate grid cells")
+    parser.add_argument("--samples", type=int, default=300, help="Georeferenced lab samples")
+    parser.add_argument("--requests", type=int, default=20000, help="Tile requests simulated")
+    parser.add_argument("--cache-size", type=int, default=512, help="Tiles kept in the cache")
+    args = parser.parse_args()
+
+    predictor, source = load_benchmark_predictor()
+    print(f"Predictor: {source}")
+
+    soil_map, tiles, hit_seconds, miss_seconds = bench(predictor, args.cells, args.samples,
+                                                       args.requests, args.cache_size)
+    meta = soil_map.meta
+    print(f"\nGrid {soil_map.shape[0]:,} x {soil_map.shape[1]:,} = {meta['cells']:,} cells "
+          f"from {meta['samples']} samples ({meta['cell_km'] * 1000:.0f} m cells)")
+    print(f"  interpolation {meta['cells'] / meta['interpolate_seconds']:>12,.0f} cells/sec "
+          f"({meta['interpolate_seconds']:.2f}s)")
+    print(f"  models        {meta['scored_cells'] / meta['predict_seconds']:>12,.0f} cells/sec "
+          f"({meta['predict_seconds']:.2f}s)")
+
+    stats = tiles.stats()
+    print(f"\n{args.requests:,} tile requests, cache of {args.cache_size}: hit rate {stats['hit_rate']:.1%} "
+          f"({stats['evictions']:,} evictions)")
+    for label, seconds in (("hit", hit_seconds), ("miss (render)", miss_seconds)):
+        if seconds:
+            p50, p99 = np.percentile(seconds, [50, 99]) * 1e6
+            print(f"  {label:14} p50 {p50:8.0f}µs | p99 {p99:8.0f}µs | n={len(seconds):,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+⏱️ Compiled tree engine vs sklearn: single-sample latency and parity
+
+Usage: python benchmarks/bench_tree_engine.py [--calls 2000] [--rows 10000]
+"""
+
+import argparse
+import time
+import numpy as np
+
+from common import load_benchmark_predictor, synthetic_soil_features
+from tree_engine import CompiledTreeEnsemble, check_parity
+
+# Batch sizes timed on both paths, around the engine's max_batch_rows
+BATCH_SIZES = [64, 256, 1000, 2000, 5000]
+
+
+def sklearn_predict_all(predictor, sample):
+    """The model part of predict_complete_analysis: scaler + predict per target"""
+    outputs = {}
+    for target_name, model in predictor.models.items():
+        scaler = predictor.scalers.get(target_name)
+        outputs[target_name] = model.predict(scaler.transform(sample) if scaler else sample)[0]
+    return outputs
+
+
+def latency_percentiles(func, samples):
+    timings = []
+    for sample in samples:
+        start = time.perf_counter()
+        func(sample)
+        timings.append(time.perf_counter() - start)
+    return np.percentile(timings, [50, 99]) * 1e6
+
+
+def best_seconds(func, X, repeat=3):
+    func(X)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(X)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compiled tree engine")
+    parser.add_argument("--calls", type=int, default=2000, help="Single-sample calls timed per engine")
+    parser.add_argument("--rows", type=int, default=10000, help="Rows used for parity and batch timing")
+    args = parser.parse_args()
+
+    predictor, source = load_benchmark_predictor()
+    print(f"Predictor: {source}")
+
+    start = time.perf_counter()
+    engine = CompiledTreeEnsemble.from_predictor(predictor)
+    print(f"Compiled {len(engine.arrays['tree_root'])} trees, {len(engine.arrays['feature']):,} nodes, "
+          f"max depth {engine.max_depth} in {time.perf_counter() - start:.2f}s")
+
+    X = synthetic_soil_features(args.rows)
+    for target_name, result in check_parity(predictor, engine, X).items():
+        print(f"  parity {target_name:22}: {result}")
+
+    samples = [X[i % len(X):i % len(X) + 1] for i in range(args.calls)]
+    for sample in samples[:50]:
+        engine.predict(sample)
+
+    sk_p50, sk_p99 = latency_percentiles(lambda s: sklearn_predict_all(predictor, s), samples[:max(args.calls // 10, 1)])
+    en_p50, en_p99 = latency_percentiles(engine.predict, samples)
+    print(f"{'sklearn single-sample':>24} | p50 {sk_p50:9.1f}µs | p99 {sk_p99:9.1f}µs")
+    print(f"{'compiled single-sample':>24} | p50 {en_p50:9.1f}µs | p99 {en_p99:9.1f}µs | {sk_p50 / en_p50:,.0f}x")
+
+    print(f"\n{'batch rows':>10} | {'compiled':>14} | {'sklearn':>14}   (engine used up to {engine.max_batch_rows:,} rows)")
+    for n_rows in [n for n in BATCH_SIZES if n <= len(X)] + [len(X)]:
+        batch = X[:n_rows]
+        compiled = best_seconds(engine.predict, batch)
+        sklearn = best_seconds(lambda b: predictor.predict_targets(b, call='batch'), batch)
+        print(f"{n_rows:>10,} | {n_rows / compiled:>9,.0f} r/s | {n_rows / sklearn:>9,.0f} r/s"
+              f"   {'compiled' if compiled < sklearn else 'sklearn'} faster")
+
+
+if __name__ == "__main__":
+    main()
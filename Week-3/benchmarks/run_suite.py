@@ -0,0 +1,239 @@
+"""
+⏱️ Nutrify AI benchmark suite
+
+Runs every benchmark on deterministic synthetic inputs and writes one JSON
+file; --compare flags metrics that regressed against a stored baseline, and
+a chart payload over NUTRIFY_FIGURE_BYTE_BUDGET fails the run.
+
+Usage:
+    python benchmarks/run_suite.py --output results.json [--sizes 1 1000 100000 1000000]
+    python benchmarks/run_suite.py --output results.json --compare baseline.json [--tolerance 0.15]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+import numpy as np
+
+from common import MODEL_PATH, load_benchmark_predictor, load_feature_names, synthetic_raw_inputs, time_call
+from feature_engineering import engineer_features
+from figures import FIGURE_BYTE_BUDGET
+from mmap_artifact import MAPPED_MODEL_PATH
+from startup_profile import _time_in_fresh_interpreter
+
+DEFAULT_SIZES = [1, 1000, 100000, 1000000]
+
+
+def metric(value, unit, better):
+    return {'value': float(value), 'unit': unit, 'better': better}
+
+
+def percentiles_ms(func, calls):
+    timings = []
+    for i in range(calls):
+        start = time.perf_counter()
+        func(i)
+        timings.append(time.perf_counter() - start)
+    p50, p99 = np.percentile(timings, [50, 99]) * 1000
+    return p50, p99
+
+
+def bench_single_sample(predictor, calls):
+    X = engineer_features(synthetic_raw_inputs(calls))
+    feature_names = load_feature_names()
+    p50, p99 = percentiles_ms(lambda i: predictor.predict_complete_analysis(X[i:i + 1], feature_names), calls)
+    return {
+        'single_sample.p50': metric(p50, 'ms', 'lower'),
+        'single_sample.p99': metric(p99, 'ms', 'lower')
+    }
+
+
+def bench_batch_and_features(predictor, sizes):
+    metrics = {}
+    for n_rows in sizes:
+        raw = synthetic_raw_inputs(n_rows)
+        repeat = 3 if n_rows <= 100000 else 1
+        seconds = time_call(engineer_features, raw, repeat=repeat)
+        metrics[f'feature_engineering.{n_rows}_rows'] = metric(seconds * 1000, 'ms', 'lower')
+
+        X = engineer_features(raw)
+        seconds = time_call(predictor.predict_batch, X, repeat=repeat)
+        metrics[f'predict_batch.{n_rows}_rows'] = metric(n_rows / seconds, 'rows/sec', 'higher')
+    return metrics
+
+
+def bench_cold_load(model_path, runs, name='cold_start.load_predictor'):
+    """load_predictor in a fresh interpreter (for joblib artifacts this includes the sklearn import)"""
+    code = ("import time; _t = time.perf_counter(); from predictor import load_predictor; "
+            f"load_predictor({model_path!r}); print(time.perf_counter() - _t)")
+    timings = [_time_in_fresh_interpreter(code) for _ in range(runs)]
+    return {name: metric(min(timings) * 1000, 'ms', 'lower')}
+
+
+def bench_translations(lookups):
+    from translations import TranslationManager
+
+    manager = TranslationManager()
+    metrics = {}
+    for language in ("English", "Hindi"):
+        manager.set_language(language)
+        keys = list(manager.catalog.texts) + ['missing_key']
+        key_list = [keys[i % len(keys)] for i in range(lookups)]
+        seconds = time_call(lambda: [manager.get_text(key) for key in key_list])
+        metrics[f'translations.get_text.{language.lower()}'] = metric(seconds / lookups * 1e9, 'ns/lookup', 'lower')
+    return metrics
+
+
+def bench_figure(predictor, builds):
+    """The visualizations tab's figure: full build, cached-template render and JSON payload"""
+    import plotly.io as pio
+    from figures import SoilHealthFigures, build_soil_health_figure
+
+    X = engineer_features(synthetic_raw_inputs(builds))
+    results = [predictor.predict_complete_analysis(X[i:i + 1], None) for i in range(min(builds, 20))]
+    figures = SoilHealthFigures()
+
+    def render(i):
+        # What the page does: patch the shared figure and serialize it
+        with figures.patched(results[i % len(results)], X[i]) as fig:
+            return pio.to_json(fig, validate=False)
+
+    payload = len(render(0))  # plotly import and the one template build
+    build_p50, _ = percentiles_ms(lambda i: build_soil_health_figure(), max(builds // 10, 5))
+    p50, p99 = percentiles_ms(render, builds)
+    return {
+        'figure.build.p50': metric(build_p50, 'ms', 'lower'),
+        'figure.render.p50': metric(p50, 'ms', 'lower'),
+        'figure.render.p99': metric(p99, 'ms', 'lower'),
+        'figure.payload_bytes': metric(payload, 'bytes', 'lower')
+    }
+
+
+def bench_soil_map(predictor, cells, requests):
+    """Regional map build (interpolation and models) and tile cache hit rate for simulated viewers"""
+    from bench_soil_map import bench
+
+    soil_map, tiles, _, miss_seconds = bench(predictor, cells, 300, requests, cache_size=512)
+    meta = soil_map.meta
+    return {
+        'soil_map.interpolate_cells_per_sec': metric(meta['cells'] / meta['interpolate_seconds'], 'cells/sec', 'higher'),
+        'soil_map.predict_cells_per_sec': metric(meta['scored_cells'] / meta['predict_seconds'], 'cells/sec', 'higher'),
+        'soil_map.tile_render.p50': metric(np.percentile(miss_seconds, 50) * 1000, 'ms', 'lower'),
+        'soil_map.tile_hit_rate': metric(tiles.stats()['hit_rate'], 'ratio', 'higher')
+    }
+
+
+def bench_amendment(predictor, searches):
+    """What-if amendment search for one sample: every candidate change scored in one batch"""
+    from amendments import find_amendment
+
+    raw = synthetic_raw_inputs(searches, seed=7)
+    find_amendment(predictor, raw[0])  # warm-up
+    results = [find_amendment(predictor, raw[i]) for i in range(searches)]
+    seconds = [result['seconds'] for result in results]
+    return {
+        'amendment_search.p50': metric(np.percentile(seconds, 50) * 1000, 'ms', 'lower'),
+        'amendment_search.candidates_per_sec': metric(results[0]['candidates'] / np.median(seconds), 'candidates/sec', 'higher')
+    }
+
+
+def run_suite(sizes, calls, quick=False):
+    predictor, source = load_benchmark_predictor()
+    metadata = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'predictor': source,
+        'sizes': sizes
+    }
+    try:
+        import sklearn
+        metadata['sklearn'] = sklearn.__version__
+    except ImportError:
+        pass
+
+    metrics = {}
+    steps = [
+        ('single-sample latency', lambda: bench_single_sample(predictor, calls)),
+        ('batch + feature engineering', lambda: bench_batch_and_features(predictor, sizes)),
+        ('translations', lambda: bench_translations(100000)),
+        ('figure construction', lambda: bench_figure(predictor, max(calls // 4, 10))),
+        ('soil map', lambda: bench_soil_map(predictor, 50000 if quick else 250000, 5000)),
+        ('amendment search', lambda: bench_amendment(predictor, 3 if quick else 10))
+    ]
+    if os.path.exists(MODEL_PATH):
+        steps.append(('cold start', lambda: bench_cold_load(MODEL_PATH, 1 if quick else 3)))
+    else:
+        print("   (no saved predictor: cold start skipped)")
+    if os.path.exists(MAPPED_MODEL_PATH):
+        steps.append(('cold start (mapped)',
+                      lambda: bench_cold_load(MAPPED_MODEL_PATH, 1 if quick else 3, 'cold_start.load_mapped')))
+
+    for label, step in steps:
+        start = time.perf_counter()
+        metrics.update(step())
+        print(f"   {label:28} {time.perf_counter() - start:6.1f}s")
+
+    return {'metadata': metadata, 'metrics': metrics}
+
+
+def compare(results, baseline, tolerance):
+    """Per-metric change against the baseline; flagged if it got worse by more than tolerance (a fraction)"""
+    rows = []
+    for name, current in results['metrics'].items():
+        previous = baseline['metrics'].get(name)
+        if previous is None or previous['value'] == 0:
+            continue
+        change = (current['value'] - previous['value']) / previous['value']
+        worse = change > tolerance if current['better'] == 'lower' else change < -tolerance
+        rows.append((name, previous['value'], current['value'], change, worse))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Nutrify AI benchmark suite")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Batch sizes in rows")
+    parser.add_argument("--calls", type=int, default=200, help="Single-sample calls timed")
+    parser.add_argument("--quick", action="store_true", help="Sizes up to 100k rows and fewer repeats")
+    parser.add_argument("--compare", help="Baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed change before flagging (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    sizes = [n for n in args.sizes if n <= 100000] if args.quick else args.sizes
+    print(f"⏱️ Running benchmark suite (sizes: {', '.join(f'{n:,}' for n in sizes)})")
+    results = run_suite(sizes, args.calls, args.quick)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    for name, m in results['metrics'].items():
+        print(f"{name:40} {m['value']:>16,.3f} {m['unit']}")
+    print(f"✅ Results written to {args.output}")
+
+    payload = results['metrics'].get('figure.payload_bytes')
+    if payload and payload['value'] > FIGURE_BYTE_BUDGET:
+        print(f"\n❌ Chart payload {payload['value']:,.0f} bytes is over the {FIGURE_BYTE_BUDGET:,} byte budget")
+        sys.exit(1)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.tolerance)
+        flagged = [row for row in rows if row[4]]
+        print(f"\nCompared with {args.compare} (tolerance {args.tolerance:.0%}):")
+        for name, before, after, change, worse in rows:
+            print(f"{'❌' if worse else '  '} {name:40} {before:>14,.3f} -> {after:>14,.3f} ({change:+.1%})")
+        if flagged:
+            print(f"\n❌ {len(flagged)} regression(s)")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
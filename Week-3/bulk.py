@@ -0,0 +1,201 @@
+"""
+📦 Bulk Soil Analysis for Nutrify AI
+Streams large lab CSVs through the predictor in fixed-size chunks
+
+Usage: python bulk.py lab_results.csv predictions.csv [--chunksize 50000] [--mode model|rules] [--no-log]
+                     [--save-history]
+
+Files with farmer_id and field_id columns (optionally village and a sampled_at
+date) can also be saved to the soil history store.
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from feature_engineering import RAW_FEATURES, INPUT_RANGES, engineer_features, validate_raw_inputs
+from predictor import load_predictor, MODEL_PATH
+from prediction_log import prediction_log as default_prediction_log
+from rules import INFERENCE_MODES, MODEL_MODE, check_mode
+
+DEFAULT_CHUNKSIZE = 50_000
+HISTORY_KEY_COLUMNS = ['farmer_id', 'field_id']
+
+
+def require_pyarrow():
+    """Parquet output is optional; raise a readable ImportError when pyarrow is missing"""
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet output needs pyarrow: pip install pyarrow") from None
+
+
+class ResultWriter:
+    """Appends result chunks to a CSV or Parquet file"""
+
+    def __init__(self, output, output_format='csv'):
+        self.output = output
+        self.output_format = output_format
+        self._parquet_writer = None
+        self._wrote_header = False
+        if output_format == 'parquet':
+            # Checked up front, so a missing pyarrow fails before any chunk is scored
+            require_pyarrow()
+
+    def write(self, df):
+        if self.output_format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.output, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.output, mode='a' if self._wrote_header else 'w',
+                      header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def history_keys(chunk):
+    """farmer_id/field_id/village/ts columns for the soil history store"""
+    keys = chunk[[c for c in HISTORY_KEY_COLUMNS + ['village'] if c in chunk.columns]].copy()
+    if 'sampled_at' in chunk.columns:
+        # Unparseable or missing dates fall back to the time of analysis
+        dates = pd.to_datetime(chunk['sampled_at'], errors='coerce', utc=True, format='ISO8601')
+        keys['ts'] = ((dates - pd.Timestamp(0, tz='UTC')) / pd.Timedelta(seconds=1)).fillna(time.time()).values
+    return keys
+
+
+class BulkAnalyzer:
+    """Chunked validate -> feature -> predict -> write pipeline"""
+
+    def __init__(self, predictor, chunksize=DEFAULT_CHUNKSIZE, mode=MODEL_MODE, prediction_log=None,
+                 soil_history=None):
+        self.predictor = predictor
+        self.chunksize = chunksize
+        self.mode = check_mode(mode)
+        self.prediction_log = prediction_log
+        self.soil_history = soil_history
+
+        # Fix the output schema up front so every chunk writes the same columns and
+        # dtypes, even chunks without a single valid row
+        midpoint = [[sum(INPUT_RANGES[c]) / 2 for c in RAW_FEATURES]]
+        self._template = predictor.predict_batch(engineer_features(midpoint), mode=mode).iloc[:0]
+        self._dtypes = {
+            column: 'Int64' if pd.api.types.is_integer_dtype(dtype)
+            else 'string' if dtype == object else dtype
+            for column, dtype in self._template.dtypes.items()
+        }
+
+    def analyze_chunk(self, chunk):
+        """Validate, derive features and predict one chunk of raw rows"""
+        missing_columns = [c for c in RAW_FEATURES if c not in chunk.columns]
+        if missing_columns:
+            raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+
+        raw = chunk[RAW_FEATURES].apply(pd.to_numeric, errors='coerce')
+        valid, errors = validate_raw_inputs(raw)
+
+        if valid.any():
+            predictions = self.predictor.predict_batch(engineer_features(raw.values[valid]), mode=self.mode)
+            if self.prediction_log is not None:
+                self.prediction_log.log_batch(predictions, source='bulk')
+            if self.soil_history is not None and all(c in chunk.columns for c in HISTORY_KEY_COLUMNS):
+                # Only rows that name their field go to the history
+                keyed = chunk[HISTORY_KEY_COLUMNS].notna().all(axis=1).values[valid]
+                self.soil_history.record_batch(history_keys(chunk[valid][keyed]), raw.values[valid][keyed],
+                                               predictions[keyed])
+            predictions.index = np.flatnonzero(valid)
+        else:
+            predictions = self._template
+        predictions = predictions.reindex(range(len(raw))).astype(self._dtypes)
+
+        result = raw.reset_index(drop=True).join(predictions)
+        result['valid'] = valid
+        result['error'] = errors
+        return result
+
+    def run(self, source, output, output_format='csv', progress_callback=None):
+        """Stream source CSV to output; returns a summary dict"""
+        writer = ResultWriter(output, output_format)
+        start = time.perf_counter()
+        rows_done = invalid_rows = chunks = 0
+
+        try:
+            # Field ids stay text (leading zeros, no float from missing values)
+            key_dtypes = dict.fromkeys(HISTORY_KEY_COLUMNS, str)
+            for chunk in pd.read_csv(source, chunksize=self.chunksize, dtype=key_dtypes):
+                result = self.analyze_chunk(chunk)
+                writer.write(result)
+
+                chunks += 1
+                rows_done += len(result)
+                invalid_rows += int((~result['valid']).sum())
+
+                if progress_callback:
+                    elapsed = time.perf_counter() - start
+                    progress_callback(rows_done, elapsed, rows_done / elapsed if elapsed > 0 else 0.0)
+        finally:
+            writer.close()
+
+        elapsed = time.perf_counter() - start
+        return {
+            'rows': rows_done,
+            'invalid_rows': invalid_rows,
+            'chunks': chunks,
+            'inference_mode': self.mode,
+            'seconds': elapsed,
+            'rows_per_sec': rows_done / elapsed if elapsed > 0 else 0.0
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk soil analysis for large lab CSV files")
+    parser.add_argument("input", help="CSV with N,P,K,ph,temperature,humidity,rainfall columns")
+    parser.add_argument("output", help="Output .csv or .parquet file")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk")
+    parser.add_argument("--model", default=MODEL_PATH, help="Path to the saved predictor")
+    parser.add_argument("--mode", choices=INFERENCE_MODES, default=MODEL_MODE,
+                        help="'rules' evaluates the Week 1 label definitions instead of the models")
+    parser.add_argument("--no-log", action="store_true", help="Leave this run out of the prediction log")
+    parser.add_argument("--save-history", action="store_true",
+                        help="Save rows with farmer_id/field_id to the soil history store")
+    args = parser.parse_args()
+
+    soil_history = None
+    if args.save_history:
+        from soil_history import soil_history
+
+    output_format = 'parquet' if args.output.endswith('.parquet') else 'csv'
+    if output_format == 'parquet':
+        try:
+            require_pyarrow()
+        except ImportError as e:
+            parser.error(str(e))
+    analyzer = BulkAnalyzer(load_predictor(args.model), chunksize=args.chunksize, mode=args.mode,
+                            prediction_log=None if args.no_log else default_prediction_log,
+                            soil_history=soil_history)
+
+    def report(rows_done, elapsed, rate):
+        print(f"\r📦 {rows_done:,} rows | {elapsed:.1f}s | {rate:,.0f} rows/sec", end='', flush=True)
+
+    summary = analyzer.run(args.input, args.output, output_format, progress_callback=report)
+    print(f"\n✅ {summary['rows']:,} rows ({summary['invalid_rows']:,} invalid, {summary['inference_mode']} mode) "
+          f"in {summary['seconds']:.1f}s -> {args.output}")
+    if soil_history is not None:
+        soil_history.flush()
+        print(f"🗂️ {soil_history.written:,} rows saved to {soil_history.path}")
+
+
+if __name__ == "__main__":
+    main()
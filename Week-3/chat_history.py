@@ -0,0 +1,125 @@
+"""
+💬 Chat History for Nutrify AI
+Per-session assistant conversation with a memory budget: recent messages are
+kept whole, older turns are compacted into one-line topics, and the page
+renders only a window of the most recent messages
+
+NUTRIFY_CHAT_WINDOW, NUTRIFY_CHAT_MAX_MESSAGES and NUTRIFY_CHAT_MAX_CHARS
+tune the window and the budget.
+
+Usage: python chat_history.py [--turns 5000]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from collections import deque
+from itertools import islice
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+CHAT_WINDOW = int(os.getenv('NUTRIFY_CHAT_WINDOW', '20'))
+MAX_MESSAGES = int(os.getenv('NUTRIFY_CHAT_MAX_MESSAGES', '100'))
+MAX_CHARS = int(os.getenv('NUTRIFY_CHAT_MAX_CHARS', '100000'))
+MAX_TOPICS = 50
+TOPIC_LENGTH = 80
+
+
+def topic_of(question):
+    """One line standing in for a compacted question"""
+    text = re.sub(r'\s+', ' ', question).strip()
+    return text if len(text) <= TOPIC_LENGTH else text[:TOPIC_LENGTH - 1].rstrip() + '…'
+
+
+class ChatHistory:
+    """A session's messages, bounded by count and characters; the oldest are folded into topics"""
+
+    def __init__(self, max_messages=MAX_MESSAGES, max_chars=MAX_CHARS, max_topics=MAX_TOPICS):
+        self.max_messages = max_messages
+        self.max_chars = max_chars
+        self.messages = deque()
+        self.topics = deque(maxlen=max_topics)
+        self.chars = 0
+        self.compacted = 0
+        self.compacted_questions = 0
+
+    def __len__(self):
+        return len(self.messages)
+
+    def append(self, role, content):
+        self.messages.append({"role": role, "content": content})
+        self.chars += len(content)
+        self._compact()
+
+    def _compact(self):
+        # The latest exchange always stays, even when it alone is over the budget
+        while len(self.messages) > 2 and (len(self.messages) > self.max_messages or self.chars > self.max_chars):
+            message = self.messages.popleft()
+            self.chars -= len(message["content"])
+            self.compacted += 1
+            if message["role"] == "user":
+                self.compacted_questions += 1
+                self.topics.append(topic_of(message["content"]))
+
+    def recent(self, count=CHAT_WINDOW):
+        """The last count messages, oldest first"""
+        return list(islice(self.messages, max(len(self.messages) - count, 0), None))
+
+    @property
+    def summary(self):
+        """Markdown list of the compacted questions, or '' when nothing has been compacted"""
+        if not self.topics:
+            return ""
+        lines = [f"- {topic}" for topic in self.topics]
+        older = self.compacted_questions - len(self.topics)
+        if older:
+            lines.insert(0, f"- … {older:,} earlier questions")
+        return "\n".join(lines)
+
+    def clear(self):
+        self.messages.clear()
+        self.topics.clear()
+        self.chars = 0
+        self.compacted = 0
+        self.compacted_questions = 0
+
+    def stats(self):
+        return {
+            'messages': len(self.messages),
+            'chars': self.chars,
+            'max_messages': self.max_messages,
+            'max_chars': self.max_chars,
+            'compacted': self.compacted,
+            'compacted_questions': self.compacted_questions,
+            'topics': len(self.topics)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a long chat session against the history budget")
+    parser.add_argument("--turns", type=int, default=5000, help="Question/answer pairs to append")
+    args = parser.parse_args()
+
+    history = ChatHistory()
+    answer = "🌿 **Zinc Deficiency** · ₹2,000-4,000/acre · 3-6 months\n" + "- Apply zinc-rich vermicompost\n" * 8
+    append_us = []
+    for turn in range(args.turns):
+        start = time.perf_counter()
+        history.append("user", f"Question {turn}: how do I fix zinc deficiency in field {turn % 7}?")
+        history.append("assistant", answer)
+        append_us.append((time.perf_counter() - start) * 1e6)
+
+    start = time.perf_counter()
+    window = history.recent()
+    window_us = (time.perf_counter() - start) * 1e6
+
+    print(f"{args.turns:,} turns -> {history.stats()}")
+    print(f"append: {sum(append_us) / len(append_us):.1f} µs per turn, last {append_us[-1]:.1f} µs; "
+          f"window of {len(window)} in {window_us:.1f} µs")
+    print("\nEarlier topics (last 3):\n" + "\n".join(history.summary.splitlines()[-3:]))
+
+
+if __name__ == "__main__":
+    main()
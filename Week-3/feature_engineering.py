@@ -0,0 +1,113 @@
+"""
+🧪 Vectorized Feature Engineering for Nutrify AI
+Turns raw lab inputs into the 11 model features used in Week 1 training.
+The only feature implementation: training, the app, bulk mode and the service all use it.
+"""
+
+import numpy as np
+
+# Raw lab sheet columns (WEEK-1/soil_nutrition_clean.csv layout)
+RAW_FEATURES = ['N', 'P', 'K', 'ph', 'temperature', 'humidity', 'rainfall']
+
+# Engineered columns, appended to the raw ones in complete_feature_config.json order
+ENGINEERED_FEATURES = ['N_P_ratio', 'N_K_ratio', 'P_K_ratio', 'soil_health_score']
+FEATURE_NAMES = RAW_FEATURES + ENGINEERED_FEATURES
+
+# Valid input ranges, matching the soil analysis form
+INPUT_RANGES = {
+    'N': (0.0, 300.0),
+    'P': (0.0, 200.0),
+    'K': (0.0, 300.0),
+    'ph': (3.0, 10.0),
+    'temperature': (5.0, 50.0),
+    'humidity': (10.0, 100.0),
+    'rainfall': (0.0, 500.0)
+}
+
+# Input steps of the soil analysis form's number inputs
+INPUT_STEPS = {
+    'N': 1.0,
+    'P': 1.0,
+    'K': 1.0,
+    'ph': 0.1,
+    'temperature': 1.0,
+    'humidity': 1.0,
+    'rainfall': 10.0
+}
+
+
+def soil_health_score(N, P, K, ph):
+    """Soil health score (0-1): capped NPK scores plus a pH plateau from 6.0 to 7.5"""
+    N, P, K, ph = (np.asarray(values, dtype=float) for values in (N, P, K, ph))
+    ph_score = np.where((ph >= 6.0) & (ph <= 7.5), 1.0, np.maximum(0, 1 - np.abs(ph - 6.75) / 3))
+    return np.round(
+        np.minimum(N / 200, 1.0) * 0.25 + np.minimum(P / 40, 1.0) * 0.25
+        + np.minimum(K / 200, 1.0) * 0.25 + ph_score * 0.25, 3
+    )
+
+
+def engineer_features(raw):
+    """Build the (n, 11) model feature matrix from (n, 7) raw inputs"""
+    raw = np.asarray(raw, dtype=float)
+    if raw.ndim == 1:
+        raw = raw.reshape(1, -1)
+    N, P, K, ph = raw[:, 0], raw[:, 1], raw[:, 2], raw[:, 3]
+
+    # Nutrient ratios (+1 avoids division by zero, so P == 0 still gives N / 1)
+    N_P_ratio = N / (P + 1)
+    N_K_ratio = N / (K + 1)
+    P_K_ratio = P / (K + 1)
+
+    return np.column_stack([raw, N_P_ratio, N_K_ratio, P_K_ratio, soil_health_score(N, P, K, ph)])
+
+
+def deficiency_targets(raw):
+    """Week 1 deficiency label definitions as 0/1 arrays from (n, 7+) raw inputs"""
+    raw = np.asarray(raw, dtype=float)
+    if raw.ndim == 1:
+        raw = raw.reshape(1, -1)
+    N, P, K, ph = raw[:, 0], raw[:, 1], raw[:, 2], raw[:, 3]
+
+    # Thresholds from agricultural research
+    targets = {
+        'zinc_deficiency': (K < 140) & (ph > 7.0),
+        'iron_deficiency': (P < 15) & (ph > 7.5),
+        'boron_deficiency': (N > 200) & (K < 100),
+        'multiple_deficiency': (ph < 5.5) | (ph > 8.5)
+    }
+    targets['any_deficiency'] = np.logical_or.reduce(list(targets.values()))
+    return {name: mask.astype(int) for name, mask in targets.items()}
+
+
+def build_training_features(df_clean):
+    """Week 1 feature-engineered dataset (soil_nutrition_features.csv layout) from clean raw data"""
+    df_features = df_clean.copy()
+    features = engineer_features(df_clean[RAW_FEATURES].values)
+    for i, column in enumerate(ENGINEERED_FEATURES, start=len(RAW_FEATURES)):
+        df_features[column] = features[:, i]
+
+    for column, values in deficiency_targets(df_clean[RAW_FEATURES].values).items():
+        df_features[column] = values
+
+    # Environmental stress indicators
+    temperature, humidity, rainfall = (df_clean[c].values for c in ('temperature', 'humidity', 'rainfall'))
+    df_features['temperature_stress'] = ((temperature < 15) | (temperature > 35)).astype(int)
+    df_features['moisture_stress'] = ((humidity < 40) | (rainfall < 50)).astype(int)
+
+    return df_features
+
+
+def validate_raw_inputs(df):
+    """Per-row validation of raw inputs; returns (valid mask, error messages)"""
+    errors = np.full(len(df), '', dtype=object)
+
+    for column in RAW_FEATURES:
+        values = df[column].values
+        low, high = INPUT_RANGES[column]
+        missing = np.isnan(values)
+        out_of_range = ~missing & ((values < low) | (values > high))
+        errors[missing] += f'{column} missing; '
+        errors[out_of_range] += f'{column} outside {low:g}-{high:g}; '
+
+    valid = errors == ''
+    return valid, np.char.rstrip(errors.astype(str), '; ').astype(object)
@@ -0,0 +1,172 @@
+"""
+📈 Soil Health Figure for Nutrify AI
+The results page's 2x2 Plotly figure, built once per set of titles and then
+only patched with each sample's values
+
+NUTRIFY_FIGURE_BYTE_BUDGET caps the figure JSON sent to the browser (default 4096 bytes).
+
+Usage: python figures.py [--renders 200]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from instrumentation import metrics
+
+FIGURE_BYTE_BUDGET = int(os.getenv('NUTRIFY_FIGURE_BYTE_BUDGET', '4096'))
+DEFAULT_TITLES = ('NPK Levels', 'pH Analysis', 'Environmental Factors', 'Soil Health Score')
+
+
+def build_soil_health_figure(titles=DEFAULT_TITLES):
+    """The figure with placeholder values; the expensive part (subplot grid and trace validation)"""
+    fig = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=titles,
+        specs=[[{"type": "bar"}, {"type": "bar"}],
+               [{"type": "scatter"}, {"type": "indicator"}]]
+    )
+    fig.add_trace(
+        go.Bar(x=['Nitrogen', 'Phosphorus', 'Potassium'], y=[0, 0, 0], name="NPK Levels",
+               marker_color=['green', 'red', 'blue']),
+        row=1, col=1
+    )
+    fig.add_trace(go.Bar(x=['pH Level'], y=[0], name="pH", marker_color='orange'), row=1, col=2)
+    fig.add_trace(
+        go.Scatter(x=['Temperature', 'Humidity', 'Rainfall'], y=[0, 0, 0], mode='markers+lines', name="Environmental"),
+        row=2, col=1
+    )
+    fig.add_trace(
+        go.Indicator(
+            mode="gauge+number+delta",
+            value=0.5,
+            domain={'x': [0, 1], 'y': [0, 1]},
+            title={'text': titles[3]},
+            gauge={'axis': {'range': [None, 1]},
+                   'bar': {'color': "darkgreen"},
+                   'steps': [{'range': [0, 0.4], 'color': "lightgray"},
+                             {'range': [0.4, 0.6], 'color': "yellow"},
+                             {'range': [0.6, 1], 'color': "green"}]}
+        ),
+        row=2, col=2
+    )
+    # Streamlit's chart theme styles the layout in the browser, so of the default template (two
+    # thirds of the JSON) only the colorway is sent; Streamlit swaps its placeholders for theme colors
+    colorway = pio.templates[pio.templates.default].layout.colorway
+    fig.update_layout(height=600, showlegend=False)
+    fig.layout.template = {'layout': {'colorway': colorway}} if colorway else None
+    return fig
+
+
+def fill_soil_health_figure(fig, results, soil_data):
+    """Write one sample's values into the figure's traces"""
+    npk, ph, environment, health = fig.data
+    npk.y = [float(v) for v in soil_data[0:3]]
+    ph.y = [float(soil_data[3])]
+    environment.y = [float(v) for v in soil_data[4:7]]
+    health.value = float(results['soil_health_predicted'] or 0.5)
+
+
+def payload_bytes(fig):
+    """Size of the JSON st.plotly_chart sends for the figure"""
+    return len(pio.to_json(fig, validate=False))
+
+
+class SoilHealthFigures:
+    """One template figure per set of titles, shared by every session and patched under a lock"""
+
+    def __init__(self, byte_budget=FIGURE_BYTE_BUDGET):
+        self.byte_budget = byte_budget
+        self._templates = {}
+        self._payloads = {}
+        self._lock = threading.Lock()
+        self.renders = 0
+
+    def _template(self, titles):
+        fig = self._templates.get(titles)
+        if fig is None:
+            with metrics.stage('figure_template'):
+                fig = build_soil_health_figure(titles)
+            self._templates[titles] = fig
+            self._payloads[titles] = payload_bytes(fig)
+        return fig
+
+    @contextmanager
+    def patched(self, results, soil_data, titles=DEFAULT_TITLES):
+        """The shared figure holding this sample; serialize it (st.plotly_chart) inside the with block"""
+        titles = tuple(titles)
+        with self._lock:
+            fig = self._template(titles)
+            with metrics.stage('figure_patch'):
+                fill_soil_health_figure(fig, results, soil_data)
+            self.renders += 1
+            yield fig
+
+    def figure(self, results, soil_data, titles=DEFAULT_TITLES):
+        """A private copy, for callers that keep the figure beyond one render"""
+        with self.patched(results, soil_data, titles) as fig:
+            return go.Figure(fig)
+
+    def payload(self, titles=DEFAULT_TITLES):
+        """JSON bytes of the figure for these titles, measured when its template was built"""
+        return self._payloads.get(tuple(titles))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'templates': len(self._templates),
+                'renders': self.renders,
+                'payload_bytes': max(self._payloads.values(), default=None),
+                'byte_budget': self.byte_budget
+            }
+
+
+# One set of templates per process, shared by every Streamlit session
+soil_health_figures = SoilHealthFigures()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the soil health figure: full build vs cached template")
+    parser.add_argument("--renders", type=int, default=200)
+    args = parser.parse_args()
+
+    from figures import soil_health_figures  # the module-level instance, not __main__'s copy
+
+    soil_data = [50.0, 40.0, 30.0, 6.5, 25.0, 70.0, 100.0]
+    results = {'soil_health_predicted': 0.63}
+
+    start = time.perf_counter()
+    for _ in range(10):
+        build_soil_health_figure()
+    build_ms = (time.perf_counter() - start) / 10 * 1000
+
+    start = time.perf_counter()
+    for i in range(args.renders):
+        with soil_health_figures.patched(results, [v + i % 7 for v in soil_data]) as fig:
+            pass
+    patch_ms = (time.perf_counter() - start) / args.renders * 1000
+
+    # The same figure with the whole default template, as make_subplots leaves it
+    default_template = go.Figure(fig)
+    default_template.layout.template = pio.templates[pio.templates.default]
+    payload = soil_health_figures.payload()
+    print(f"Full build:       {build_ms:7.2f} ms per figure")
+    print(f"Cached template:  {patch_ms:7.2f} ms per render ({args.renders} renders)")
+    print(f"Payload:          {payload:,} bytes (budget {soil_health_figures.byte_budget:,}); "
+          f"{payload_bytes(default_template):,} with Plotly's default template")
+    if payload > soil_health_figures.byte_budget:
+        print("⚠️ Over the byte budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,191 @@
 """
 🤖 Simple Gemini AI Client for Nutrify AI
+Gemini REST calls (whole or streamed) behind a normalized-prompt response cache
+
+GEMINI_BASE_URL points the client at another server, e.g. the local stand-in
+(python gemini_standin.py) for testing without the real API.
 """
 
+import json
 import os
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from typing import Iterator
+
+from knowledge_base import get_knowledge_base, TOKEN_PATTERN
+
+GEMINI_BASE_URL = os.getenv('GEMINI_BASE_URL', 'https://generativelanguage.googleapis.com')
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
+REQUEST_TIMEOUT = 30
+DEFAULT_CACHE_SIZE = int(os.getenv('NUTRIFY_AI_CACHE_SIZE', '256'))
+DEFAULT_CACHE_TTL = float(os.getenv('NUTRIFY_AI_CACHE_TTL', '3600'))
+
+SYSTEM_PROMPT = ("You are Nutrify AI, an assistant for Indian farmers. Give practical, low-cost, "
+                 "organic and chemical-free advice on soil nutrition and sustainable farming.")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Cache key: lowercase words without punctuation or extra whitespace
+
+    Hindi words keep their vowel signs, so prompts differing in one matra get their own keys:
+
+    >>> normalize_prompt('मेरी मिट्टी का pH कम है?')
+    'मेरी मिट्टी का ph कम है'
+    >>> normalize_prompt('मेरी मिट्टी का pH कम हो') == normalize_prompt('मेरी मिट्टी का pH कम है')
+    False
+    >>> normalize_prompt('  How to fix   ZINC deficiency?? ')
+    'how to fix zinc deficiency'
+    """
+    return ' '.join(TOKEN_PATTERN.findall(prompt.lower()))
+
+
+class ResponseCache:
+    """Thread-safe LRU of answers keyed on the normalized prompt, each valid for ttl seconds"""
+    
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, prompt):
+        key = normalize_prompt(prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, prompt, response):
+        key = normalize_prompt(prompt)
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
 
 class GeminiAIClient:
-    def __init__(self):
-        self.api_key = os.getenv('GEMINI_API_KEY')
+    def __init__(self, api_key=None, base_url=GEMINI_BASE_URL, model=GEMINI_MODEL, cache=None):
+        self.api_key = api_key or os.getenv('GEMINI_API_KEY')
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.cache = cache if cache is not None else ResponseCache()
     
     def get_response(self, prompt: str) -> str:
-        """Get AI response from Gemini"""
+        """Get AI response from Gemini (cached)"""
+        cached = self.cache.get(prompt)
+        if cached is not None:
+            return cached
         try:
             if not self.api_key:
                 return self._get_fallback_response(prompt)
             
-            # Simple fallback responses for common questions
-            return self._get_fallback_response(prompt)
+            response = self._generate(prompt)
+            self.cache.put(prompt, response)
+            return response
             
         except Exception as e:
             return f"Sorry, I encountered an error: {str(e)}"
     
+    def stream_response(self, prompt: str) -> Iterator[str]:
+        """Yield the answer in pieces as Gemini produces them; cached answers come whole"""
+        cached = self.cache.get(prompt)
+        if cached is not None:
+            yield cached
+            return
+        if not self.api_key:
+            yield self._get_fallback_response(prompt)
+            return
+        
+        pieces = []
+        try:
+            for piece in self._stream_generate(prompt):
+                pieces.append(piece)
+                yield piece
+        except Exception as e:
+            yield f"\n\nSorry, I encountered an error: {str(e)}"
+            return
+        # Only complete answers are cached
+        self.cache.put(prompt, ''.join(pieces))
+    
+    def _request(self, prompt, method, **query):
+        url = f"{self.base_url}/v1beta/models/{self.model}:{method}"
+        if query:
+            url += '?' + urllib.parse.urlencode(query)
+        body = {
+            'systemInstruction': {'parts': [{'text': SYSTEM_PROMPT}]},
+            'contents': [{'role': 'user', 'parts': [{'text': prompt}]}]
+        }
+        return urllib.request.Request(url, data=json.dumps(body).encode('utf-8'), method='POST', headers={
+            'Content-Type': 'application/json',
+            'x-goog-api-key': self.api_key
+        })
+    
+    @staticmethod
+    def _text_of(payload):
+        """Text parts of the first candidate of a generateContent response"""
+        candidates = payload.get('candidates') or []
+        if not candidates:
+            raise RuntimeError(payload.get('error', {}).get('message', 'Empty response from Gemini'))
+        return ''.join(part.get('text', '') for part in candidates[0].get('content', {}).get('parts', []))
+    
+    def _generate(self, prompt):
+        with urllib.request.urlopen(self._request(prompt, 'generateContent'), timeout=REQUEST_TIMEOUT) as response:
+            return self._text_of(json.load(response))
+    
+    def _stream_generate(self, prompt):
+        """Server-sent events from streamGenerateContent, one text piece per event"""
+        request = self._request(prompt, 'streamGenerateContent', alt='sse')
+        with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+            for raw_line in response:
+                line = raw_line.decode('utf-8').strip()
+                if line.startswith('data:'):
+                    piece = self._text_of(json.loads(line[len('data:'):]))
+                    if piece:
+                        yield piece
+    
     def _get_fallback_response(self, prompt: str) -> str:
         """Get fallback response when Gemini is not available"""
+        # Specific passages from the treatment knowledge base beat the general advice below
+        answer = get_knowledge_base().answer(prompt)
+        if answer:
+            return answer
+        
         prompt_lower = prompt.lower()
         
         if any(word in prompt_lower for word in ['soil', 'nutrient', 'deficiency']):
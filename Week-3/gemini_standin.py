@@ -0,0 +1,129 @@
+"""
+🧪 Local Stand-in for the Gemini API
+Answers generateContent and streamGenerateContent (SSE) with canned advice
+at a configurable pace, so the assistant can be tested offline
+
+Usage: python gemini_standin.py [--port 8765] [--first-token-ms 300] [--words-per-second 40]
+       GEMINI_BASE_URL=http://127.0.0.1:8765 GEMINI_API_KEY=local streamlit run app.py
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from gemini_client import GeminiAIClient
+
+
+class StandInModel:
+    """Canned answers (the client's offline advice) produced word by word"""
+
+    def __init__(self, first_token_ms=300.0, words_per_second=40.0, chunk_words=6):
+        self.first_token = first_token_ms / 1000.0
+        self.word_time = 1.0 / words_per_second if words_per_second > 0 else 0.0
+        self.chunk_words = chunk_words
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def answer(self, prompt):
+        with self._lock:
+            self.requests += 1
+        text = GeminiAIClient(api_key=None)._get_fallback_response(prompt)
+        return '\n'.join(line.strip() for line in text.strip().splitlines())
+
+    def chunks(self, prompt):
+        """Answer pieces paced like a model: a first-token delay, then a steady word rate"""
+        # Each word keeps the whitespace after it, so pieces join back to the exact answer
+        words = re.findall(r'\S+\s*', self.answer(prompt))
+        time.sleep(self.first_token)
+        for i in range(0, len(words), self.chunk_words):
+            piece = words[i:i + self.chunk_words]
+            time.sleep(self.word_time * len(piece))
+            yield ''.join(piece)
+
+
+def _payload(text):
+    return {'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}}]}
+
+
+def make_handler(model):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/stats':
+                self._send_json(200, {'requests': model.requests})
+            else:
+                self._send_json(404, {'error': {'message': f'Unknown path {self.path}'}})
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            try:
+                prompt = body['contents'][-1]['parts'][0]['text']
+            except (KeyError, IndexError):
+                self._send_json(400, {'error': {'message': 'Expected contents[].parts[].text'}})
+                return
+            path = self.path.split('?', 1)[0]
+
+            if path.endswith(':generateContent'):
+                self._send_json(200, _payload(''.join(model.chunks(prompt))))
+            elif path.endswith(':streamGenerateContent'):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                for piece in model.chunks(prompt):
+                    self.wfile.write(f"data: {json.dumps(_payload(piece))}\r\n\r\n".encode('utf-8'))
+                    self.wfile.flush()
+                self.close_connection = True
+            else:
+                self._send_json(404, {'error': {'message': f'Unknown path {path}'}})
+
+    return Handler
+
+
+def start_standin(host='127.0.0.1', port=0, **model_options):
+    """Serve on a background thread; returns (server, model, base_url)"""
+    model = StandInModel(**model_options)
+    server = ThreadingHTTPServer((host, port), make_handler(model))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, model, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Gemini API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-token-ms", type=float, default=300.0, help="Delay before the first piece")
+    parser.add_argument("--words-per-second", type=float, default=40.0, help="Generation speed after that")
+    args = parser.parse_args()
+
+    model = StandInModel(args.first_token_ms, args.words_per_second)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(model))
+    print(f"🧪 Gemini stand-in on http://{args.host}:{args.port} "
+          f"(first token {args.first_token_ms:.0f}ms, {args.words_per_second:.0f} words/s)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
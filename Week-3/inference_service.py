@@ -0,0 +1,364 @@
+"""
+🛰️ Nutrify AI Inference Service
+Standalone asyncio HTTP/JSON API that micro-batches concurrent requests
+into single vectorized predict_batch calls
+
+Usage: python inference_service.py [--port 8502] [--max-batch-size 64] [--max-wait-ms 5]
+
+    POST /predict   {"N": 90, "P": 42, "K": 43, "ph": 6.5, "temperature": 20.9,
+                     "humidity": 82, "rainfall": 203}
+                    or {"samples": [{...}, {...}]}
+                    optional "mode": "model" (default) or "rules"
+    GET  /health
+    GET  /map                          soil map bounds, layers and tile cache stats (with --soil-map)
+    GET  /tiles/<layer>/<z>/<x>/<y>.png  soil map tile (with --soil-map)
+    GET  /metrics   per-stage timing histograms (Prometheus text format)
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from feature_engineering import RAW_FEATURES, engineer_features, validate_raw_inputs
+from instrumentation import metrics
+from model_registry import registry, get_predictor
+from predictor import MODEL_PATH
+from prediction_log import prediction_log
+from rules import MODEL_MODE, check_mode
+from soil_map import SoilMap, soil_map_tiles
+from tree_engine import CompiledTreeEnsemble, ENGINE_PATH
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class MicroBatcher:
+    """Collects concurrent samples and predicts them together"""
+
+    def __init__(self, model_path=MODEL_PATH, max_batch_size=64, max_wait_ms=5.0, workers=1,
+                 engine_path=ENGINE_PATH):
+        self.model_path = model_path
+        self.engine_path = engine_path
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._queue = None
+        self._tasks = []
+        self.batches = 0
+        self.samples = 0
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._batch_loop()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, raw_rows, mode=MODEL_MODE):
+        """Queue raw input rows and wait for their results dicts"""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for row in raw_rows:
+            future = loop.create_future()
+            await self._queue.put((row, mode, future))
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Block for the first sample, then gather more until full or the wait expires
+            items = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(items) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # One predict_batch call per inference mode present in the batch
+            by_mode = {}
+            for row, mode, future in items:
+                by_mode.setdefault(mode, []).append((row, future))
+
+            for mode, mode_items in by_mode.items():
+                rows = np.array([row for row, _ in mode_items], dtype=float)
+                try:
+                    results = await loop.run_in_executor(self._executor, self._predict, rows, mode)
+                except Exception as e:
+                    results = [{'predictions': {}, 'soil_health_predicted': None,
+                                'success': False, 'error': str(e)}] * len(mode_items)
+
+                for (_, future), result in zip(mode_items, results):
+                    if not future.done():
+                        future.set_result(result)
+
+            self.batches += 1
+            self.samples += len(items)
+
+    def _predict(self, rows, mode=MODEL_MODE):
+        predictor = get_predictor(self.model_path)
+        engine = self.current_engine() if mode == MODEL_MODE else None
+        with metrics.stage('features', call='batch'):
+            X = engineer_features(rows)
+        batch = predictor.predict_batch(X, engine=engine, mode=mode)
+        prediction_log.log_batch(batch, source='service')
+        with metrics.stage('batch_to_results', call='batch'):
+            return predictor.batch_to_results(batch)
+
+    def current_engine(self):
+        """Compiled engine if one was exported from the loaded model, else None"""
+        if not self.engine_path or not os.path.exists(self.engine_path):
+            return None
+        engine = registry.get(self.engine_path, CompiledTreeEnsemble.load)
+        if engine.meta.get('source_sha256') != registry.sha256(self.model_path):
+            return None
+        return engine
+
+
+def parse_samples(payload):
+    """Raw input rows from a request body; raises ValueError on bad input"""
+    samples = payload.get('samples', [payload]) if isinstance(payload, dict) else None
+    if not isinstance(samples, list) or not samples:
+        raise ValueError("Body must be a sample object or {\"samples\": [...]}")
+
+    rows = []
+    for i, sample in enumerate(samples):
+        if not isinstance(sample, dict):
+            raise ValueError(f"Sample {i} must be an object")
+        missing = [name for name in RAW_FEATURES if name not in sample]
+        if missing:
+            raise ValueError(f"Sample {i} is missing: {', '.join(missing)}")
+        try:
+            rows.append([float(sample[name]) for name in RAW_FEATURES])
+        except (TypeError, ValueError):
+            raise ValueError(f"Sample {i} has non-numeric values")
+
+    valid, errors = validate_raw_inputs(pd.DataFrame(rows, columns=RAW_FEATURES))
+    if not valid.all():
+        bad = int(np.flatnonzero(~valid)[0])
+        raise ValueError(f"Sample {bad}: {errors[bad]}")
+    return rows
+
+
+def _json_default(value):
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, Mapping):
+        return dict(value)  # shared read-only treatment plans
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+class InferenceService:
+    """Minimal HTTP/1.1 server around a MicroBatcher"""
+
+    def __init__(self, batcher, soil_map_path=None):
+        self.batcher = batcher
+        self.soil_map_path = soil_map_path
+        self.started_at = time.time()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload = await self._route(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        # Where a malformed request ends is unknown, so the connection closes after the 400
+        bad_request = 'GET', '/bad-request', {'connection': 'close'}, b''
+        try:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                return None
+            parts = request_line.decode('latin-1').split()
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+        except (ValueError, asyncio.LimitOverrunError):
+            # A request line or header longer than the stream limit (64 KiB)
+            return bad_request
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            length = -1
+        if len(parts) != 3 or length < 0:
+            return bad_request
+        method, path, _ = parts
+        if length > MAX_BODY_BYTES:
+            return method, '/too-large', headers, b''
+        body = await reader.readexactly(length) if length else b''
+        return method, path.split('?', 1)[0], headers, body
+
+    async def _route(self, method, path, body):
+        if path == '/too-large':
+            return 413, {'success': False, 'error': 'Request body too large'}
+        if path == '/bad-request':
+            return 400, {'success': False, 'error': 'Malformed or over-long request line, header or Content-Length'}
+        if path == '/health':
+            return 200, {'status': 'ok', 'uptime_seconds': time.time() - self.started_at,
+                         'batches': self.batcher.batches, 'samples': self.batcher.samples}
+        if path == '/metrics':
+            if not metrics.enabled:
+                return 404, {'success': False, 'error': 'Instrumentation is disabled (NUTRIFY_INSTRUMENTATION=0)'}
+            return 200, metrics.render_prometheus()
+        if path == '/map' or path.startswith('/tiles/'):
+            return await self._soil_map(path)
+        if path != '/predict':
+            return 404, {'success': False, 'error': f'Unknown path {path}'}
+        if method != 'POST':
+            return 405, {'success': False, 'error': 'Use POST'}
+
+        try:
+            payload = json.loads(body or b'null')
+            rows = parse_samples(payload)
+            mode = check_mode(payload.get('mode', MODEL_MODE))
+        except (ValueError, json.JSONDecodeError) as e:
+            return 400, {'success': False, 'error': str(e)}
+
+        results = await self.batcher.submit(rows, mode)
+        if isinstance(payload, dict) and 'samples' in payload:
+            return 200, {'results': results}
+        return 200, results[0]
+
+    async def _soil_map(self, path):
+        if not self.soil_map_path:
+            return 404, {'success': False, 'error': 'No soil map loaded (start with --soil-map)'}
+        # The registry reloads the map when its file changes; the version clears the tile cache
+        soil_map = registry.get(self.soil_map_path, SoilMap.load)
+        if path == '/map':
+            return 200, {'bounds': soil_map.bounds, 'shape': soil_map.shape, 'layers': soil_map.summary(),
+                         'meta': soil_map.meta, 'tile_cache': soil_map_tiles.stats()}
+
+        parts = path[len('/tiles/'):].removesuffix('.png').split('/')
+        try:
+            layer, (z, x, y) = parts[0], map(int, parts[1:])
+        except ValueError:
+            return 400, {'success': False, 'error': 'Use /tiles/<layer>/<z>/<x>/<y>.png'}
+        try:
+            return 200, await asyncio.get_running_loop().run_in_executor(
+                None, soil_map_tiles.get, soil_map, layer, z, x, y, registry.version(self.soil_map_path))
+        except KeyError as e:
+            return 404, {'success': False, 'error': e.args[0]}
+        except ValueError as e:
+            return 400, {'success': False, 'error': str(e)}
+
+    @staticmethod
+    def _write_response(writer, status, payload, keep_alive):
+        if isinstance(payload, bytes):
+            body, content_type = payload, 'image/png'
+        elif isinstance(payload, str):
+            body, content_type = payload.encode('utf-8'), 'text/plain; version=0.0.4'
+        else:
+            body, content_type = json.dumps(payload, default=_json_default).encode('utf-8'), 'application/json'
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+
+
+async def serve(host='127.0.0.1', port=8502, model_path=MODEL_PATH, max_batch_size=64,
+                max_wait_ms=5.0, workers=1, reuse_port=False, engine_path=ENGINE_PATH, soil_map_path=None):
+    """Run the service until cancelled"""
+    get_predictor(model_path)  # load before accepting traffic
+    if soil_map_path:
+        registry.get(soil_map_path, SoilMap.load)
+    batcher = MicroBatcher(model_path, max_batch_size, max_wait_ms, workers, engine_path)
+    engine = batcher.current_engine()
+    await batcher.start()
+    service = InferenceService(batcher, soil_map_path)
+
+    server = await asyncio.start_server(service.handle_connection, host, port, reuse_port=reuse_port)
+    print(f"🛰️ Nutrify AI service on http://{host}:{port} (pid {os.getpid()}, "
+          f"batch ≤{max_batch_size}, wait ≤{max_wait_ms}ms, "
+          f"{'compiled engine' if engine else 'sklearn models'})", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+
+
+def _serve_process(kwargs):
+    try:
+        asyncio.run(serve(**kwargs))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nutrify AI micro-batching inference service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--model", default=MODEL_PATH, help="Path to the saved predictor")
+    parser.add_argument("--engine", default=ENGINE_PATH,
+                        help="Compiled tree engine (tree_engine.py export); used when it matches --model")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=1, help="Concurrent batch executions per process")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Server processes sharing the port (SO_REUSEPORT, Linux)")
+    parser.add_argument("--soil-map", help="Soil map (soil_map.py build) to serve as tiles")
+    args = parser.parse_args()
+
+    kwargs = dict(host=args.host, port=args.port, model_path=args.model,
+                  max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms,
+                  workers=args.workers, reuse_port=args.processes > 1, engine_path=args.engine,
+                  soil_map_path=args.soil_map)
+    if args.processes == 1:
+        _serve_process(kwargs)
+        return
+
+    processes = [multiprocessing.Process(target=_serve_process, args=(kwargs,))
+                 for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+📈 Prediction Instrumentation for Nutrify AI
+Per-stage and per-target timing histograms, exported as Prometheus text
+
+Set NUTRIFY_INSTRUMENTATION=0 to turn every hook into a shared no-op.
+
+Usage: python instrumentation.py [--samples 200] [--prometheus]
+"""
+
+import argparse
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+ENABLED = os.getenv('NUTRIFY_INSTRUMENTATION', '1') != '0'
+
+# Upper bounds in seconds, from single-sample scaling to large batches
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NULL_STAGE = nullcontext()
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (cumulative only when exported)"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.count, self.sum
+
+    def quantile(self, q):
+        """Estimate interpolated within the bucket, as Prometheus histogram_quantile does"""
+        counts, count, _ = self.snapshot()
+        if count == 0:
+            return None
+        rank = q * count
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+
+class _StageTimer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class StageMetrics:
+    """Process-wide histograms keyed on stage name and labels, plus event counters"""
+
+    def __init__(self, enabled=ENABLED):
+        self.enabled = enabled
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        return histogram
+
+    def stage(self, name, **labels):
+        """Context manager timing one stage; a shared no-op when disabled"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _StageTimer(self.histogram(name, **labels))
+
+    def observe(self, name, seconds, **labels):
+        if self.enabled:
+            self.histogram(name, **labels).observe(seconds)
+
+    def increment(self, name, amount=1):
+        if self.enabled:
+            with self._lock:
+                self._counters[name] = self._counters.get(name, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def summary(self):
+        """One row per stage/labels with count, mean and estimated p50/p95/p99 in ms"""
+        with self._lock:
+            items = sorted(self._histograms.items())
+        rows = []
+        for (name, labels), histogram in items:
+            _, count, total = histogram.snapshot()
+            rows.append({
+                'stage': name,
+                **dict(labels),
+                'count': count,
+                'mean_ms': total / count * 1000 if count else None,
+                'p50_ms': histogram.quantile(0.5) * 1000 if count else None,
+                'p95_ms': histogram.quantile(0.95) * 1000 if count else None,
+                'p99_ms': histogram.quantile(0.99) * 1000 if count else None
+            })
+        return rows
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def render_prometheus(self, namespace='nutrify'):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            items = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        name = f'{namespace}_stage_seconds'
+        lines = [f'# HELP {name} Time spent in each prediction stage.', f'# TYPE {name} histogram']
+        for (stage, labels), histogram in items:
+            counts, count, total = histogram.snapshot()
+            label_text = ','.join([f'stage="{stage}"'] + [f'{k}="{v}"' for k, v in labels])
+            cumulative = 0
+            for bound, bucket_count in zip(list(histogram.buckets) + ['+Inf'], counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{label_text}}} {total:.9f}')
+            lines.append(f'{name}_count{{{label_text}}} {count}')
+
+        for counter, value in counters:
+            lines.append(f'# TYPE {namespace}_{counter}_total counter')
+            lines.append(f'{namespace}_{counter}_total {value}')
+        return '\n'.join(lines) + '\n'
+
+
+# One set of histograms per process, shared by the app, bulk mode and the service
+metrics = StageMetrics()
+
+
+def main():
+    # Run as a script this module is __main__; the predictor records into the imported copy
+    from instrumentation import metrics
+    from predictor import load_predictor, MODEL_PATH
+    from feature_engineering import RAW_FEATURES, INPUT_RANGES, engineer_features
+    import numpy as np
+
+    parser = argparse.ArgumentParser(description="Time each prediction stage on random inputs")
+    parser.add_argument("--model", default=MODEL_PATH, help="Path to the saved predictor")
+    parser.add_argument("--samples", type=int, default=200, help="Single-sample analyses to run")
+    parser.add_argument("--prometheus", action="store_true", help="Print the Prometheus text instead of a table")
+    args = parser.parse_args()
+
+    if not metrics.enabled:
+        print("Instrumentation is disabled (NUTRIFY_INSTRUMENTATION=0)")
+        return
+
+    predictor = load_predictor(args.model)
+    rng = np.random.default_rng(0)
+    X = engineer_features(np.column_stack([rng.uniform(*INPUT_RANGES[c], args.samples) for c in RAW_FEATURES]))
+    for i in range(args.samples):
+        predictor.predict_complete_analysis(X[i:i + 1], None)
+    predictor.predict_batch(X)
+
+    if args.prometheus:
+        print(metrics.render_prometheus(), end='')
+        return
+    print(f"{'stage':22} {'call':7} {'target':24} {'count':>6} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for row in metrics.summary():
+        print(f"{row['stage']:22} {row.get('call', ''):7} {row.get('target', ''):24} {row['count']:>6} "
+              f"{row['mean_ms']:>9.3f} {row['p50_ms']:>9.3f} {row['p99_ms']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
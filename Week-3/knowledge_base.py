@@ -0,0 +1,209 @@
+"""
+📚 Treatment Knowledge Base for Nutrify AI
+BM25 retrieval over the predictor's organic treatments (solutions, costs,
+timelines) and their translations, for the assistant's offline answers
+
+Usage: python knowledge_base.py "how much does zinc treatment cost?"
+"""
+
+import math
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Words, numbers and whole Devanagari words (\w alone splits at vowel signs)
+TOKEN_PATTERN = re.compile(r'[\wऀ-ॿ]+')
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how i in is it me my of on or should the this
+to what when which why will with you your much many long about get use using need
+की का के है में से को क्या कैसे कितना कितनी मेरी मेरे
+""".split())
+
+# Query words mapped onto the vocabulary the treatments are written in
+SYNONYMS = {
+    'zn': 'zinc', 'fe': 'iron', 'price': 'cost', 'expensive': 'cost', 'cheap': 'cost', 'budget': 'cost',
+    'money': 'cost', 'rupee': 'cost', 'rupees': 'cost', 'rs': 'cost', 'time': 'timeline', 'duration': 'timeline',
+    'months': 'month', 'weeks': 'week', 'fertiliser': 'fertilizer', 'worm': 'vermicompost',
+    'earthworm': 'vermicompost', 'fungus': 'fungi', 'mycorrhiza': 'mycorrhizal', 'unhealthy': 'health',
+    'poor': 'health', 'deficient': 'deficiency', 'lacking': 'deficiency', 'shortage': 'deficiency',
+    'improve': 'improvement', 'improving': 'improvement',
+    # Everyday Hindi words next to the ones the translation catalog uses
+    'लोहा': 'आयरन', 'लोहे': 'आयरन', 'जस्ता': 'जिंक', 'जस्ते': 'जिंक', 'खर्च': 'लागत', 'कीमत': 'लागत',
+    'समय': 'समयसीमा'
+}
+
+# Below this BM25 score a match is incidental (a shared common word), and the general advice is better
+MIN_SCORE = 1.5
+
+CONCERN_TITLES = {
+    'zinc_deficiency': 'Zinc Deficiency',
+    'iron_deficiency': 'Iron Deficiency',
+    'multiple_deficiency': 'Multiple Deficiencies',
+    'soil_health_improvement': 'Soil Health Improvement'
+}
+
+# Catalog texts indexed with every summary, so cost and timeline questions match in any language
+DETAIL_TRANSLATION_KEYS = ['cost', 'timeline', 'treatment_plan', 'recommended_solutions', 'organic_solutions']
+
+
+def tokenize(text):
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        token = SYNONYMS.get(token, token)
+        if token in STOPWORDS:
+            continue
+        # Light plural folding: legumes/legume, deficiencies/deficiency
+        if len(token) > 4 and token.endswith('s') and not token.endswith('ss') and token.isascii():
+            token = token[:-3] + 'y' if token.endswith('ies') else token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class Passage:
+    """One retrievable piece of treatment knowledge"""
+
+    __slots__ = ('concern', 'kind', 'text', 'index_text')
+
+    def __init__(self, concern, kind, text, index_text=''):
+        self.concern = concern
+        self.kind = kind        # 'solution' or 'summary'
+        self.text = text        # what the answer shows
+        self.index_text = index_text or text  # what retrieval matches against
+
+
+def build_passages(organic_treatments, catalogs=()):
+    """A summary and one passage per solution for every treatment, indexed with each catalog's translation"""
+    passages = []
+    details = ' '.join(catalog.get(key) for catalog in catalogs for key in DETAIL_TRANSLATION_KEYS)
+    for concern, treatment in organic_treatments.items():
+        title = CONCERN_TITLES.get(concern, concern.replace('_', ' ').title())
+        translated = [t for t in (catalog.treatment(concern) for catalog in catalogs) if t]
+        names = ' '.join(t['title'] for t in translated)
+
+        summary = (f"{title} treatment costs {treatment['cost']} and shows results in "
+                   f"{treatment['timeline']}.")
+        passages.append(Passage(concern, 'summary', summary,
+                                f"{summary} {concern.replace('_', ' ')} cost timeline treatment {names} {details}"))
+        for i, solution in enumerate(treatment['solutions']):
+            translations = ' '.join(t['solutions'][i] for t in translated if i < len(t['solutions']))
+            passages.append(Passage(concern, 'solution', solution,
+                                    f"{solution} {title} {concern.replace('_', ' ')} {names} {translations}"))
+    return passages
+
+
+class KnowledgeBase:
+    """Okapi BM25 over an inverted index of passages"""
+
+    def __init__(self, passages, k1=1.5, b=0.75):
+        self.passages = list(passages)
+        self.treatments = {}
+        self.k1 = k1
+        self.b = b
+
+        self.postings = defaultdict(list)  # token -> [(passage index, term frequency)]
+        lengths = []
+        for i, passage in enumerate(self.passages):
+            tokens = tokenize(passage.index_text)
+            lengths.append(len(tokens))
+            for token, tf in Counter(tokens).items():
+                self.postings[token].append((i, tf))
+        average_length = sum(lengths) / len(lengths) if lengths else 1.0
+
+        n_passages = len(self.passages)
+        self.idf = {token: math.log(1 + (n_passages - len(docs) + 0.5) / (len(docs) + 0.5))
+                    for token, docs in self.postings.items()}
+        # Length normalisation folded in once, so a query only multiplies and adds
+        self.norms = [k1 * (1 - b + b * length / average_length) for length in lengths]
+
+    @classmethod
+    def from_treatments(cls, organic_treatments, catalogs=()):
+        kb = cls(build_passages(organic_treatments, catalogs))
+        kb.treatments = organic_treatments
+        return kb
+
+    def search(self, query, k=5):
+        """Top-k (score, passage) pairs for the query, best first"""
+        scores = defaultdict(float)
+        for token in set(tokenize(query)):
+            idf = self.idf.get(token)
+            if idf is None:
+                continue
+            for i, tf in self.postings[token]:
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + self.norms[i])
+        best = sorted(scores.items(), key=lambda item: -item[1])[:k]
+        return [(score, self.passages[i]) for i, score in best]
+
+    def answer(self, query, k=5):
+        """Markdown answer from the best matching passages, grouped by treatment; None if nothing matches well"""
+        hits = self.search(query, k)
+        if not hits or hits[0][0] < MIN_SCORE:
+            return None
+
+        # Keep treatments in order of their best passage, and only those close to the top score
+        top_score = hits[0][0]
+        grouped = {}
+        for score, passage in hits:
+            if score >= top_score * 0.5:
+                grouped.setdefault(passage.concern, []).append(passage)
+
+        sections = []
+        for concern, passages in grouped.items():
+            treatment = self.treatments.get(concern, {})
+            heading = f"🌿 **{CONCERN_TITLES.get(concern, concern)}**"
+            if treatment:
+                heading += f" · {treatment['cost']} · {treatment['timeline']}"
+            solutions = [p.text for p in passages if p.kind == 'solution']
+            if not solutions:
+                # A cost/timeline question still gets the first steps to take
+                solutions = treatment.get('solutions', [])[:3]
+            sections.append(heading + '\n' + '\n'.join(f"- {solution}" for solution in solutions))
+
+        return '\n\n'.join(sections) + ("\n\nFor advice specific to your field, run a soil analysis "
+                                        "and ask about its results.")
+
+
+_knowledge_base = None
+_build_lock = threading.Lock()
+
+
+def get_knowledge_base():
+    """Process-wide knowledge base, indexed once from the predictor's treatments and every catalog"""
+    global _knowledge_base
+    if _knowledge_base is None:
+        with _build_lock:
+            if _knowledge_base is None:
+                from predictor import CompleteSustainableAgriculturePredictor
+                from translations import available_languages, get_catalog
+                _knowledge_base = KnowledgeBase.from_treatments(
+                    CompleteSustainableAgriculturePredictor().organic_treatments,
+                    [get_catalog(language) for language in available_languages()])
+    return _knowledge_base
+
+
+def main():
+    query = ' '.join(sys.argv[1:]) or "How do I treat zinc deficiency and what does it cost?"
+    start = time.perf_counter()
+    kb = get_knowledge_base()
+    built = time.perf_counter() - start
+
+    repeats = 1000
+    start = time.perf_counter()
+    for _ in range(repeats):
+        answer = kb.answer(query)
+    per_query = (time.perf_counter() - start) / repeats
+
+    for score, passage in kb.search(query):
+        print(f"{score:6.2f}  [{passage.concern}/{passage.kind}] {passage.text}")
+    print(f"\n{answer}\n")
+    print(f"{len(kb.passages)} passages, {len(kb.postings)} terms; indexed in {built * 1000:.0f} ms "
+          f"(incl. imports), {per_query * 1e6:.0f} µs per answer")
+
+
+if __name__ == "__main__":
+    main()
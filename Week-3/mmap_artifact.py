@@ -0,0 +1,184 @@
+"""
+🗺️ Memory-mapped Model Artifact for Nutrify AI
+The saved predictor as one file of int32/float32 tree tables that every
+process maps read-only, so N workers on a node share one page-cache copy
+and loading needs neither unpickling nor scikit-learn
+
+Select it with NUTRIFY_MODEL_LAYOUT=mapped after converting the joblib artifact.
+
+Usage:
+    python mmap_artifact.py convert [--model PATH] [--output PATH]
+    python mmap_artifact.py check [--model PATH] [--artifact PATH] [--rows 10000]
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from instrumentation import metrics
+from predictor import CompleteSustainableAgriculturePredictor, load_predictor, MODEL_PATHS
+from tree_engine import CompiledTreeEnsemble, walk_tables
+
+MAPPED_MODEL_PATH = MODEL_PATHS['mapped']
+
+MAGIC = b'NUTRIFY\x01'
+FORMAT_VERSION = 1
+# Every table starts on a cache line
+ALIGNMENT = 64
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_artifact(predictor, path=MAPPED_MODEL_PATH, source_sha256=None):
+    """Compile a loaded predictor and write it as a mappable artifact; returns the bytes written"""
+    engine = CompiledTreeEnsemble.from_predictor(predictor)
+    tables = {name: np.ascontiguousarray(table, dtype=np.asarray(table).dtype.newbyteorder('<'))
+              for name, table in walk_tables(engine.arrays, engine.n_features, compact=True).items()}
+
+    # Table offsets depend on the header length, which depends on the offsets; relative
+    # offsets break the cycle and the data block starts on the next boundary
+    layout, offset = {}, 0
+    for name, table in tables.items():
+        layout[name] = {'dtype': table.dtype.str, 'shape': list(table.shape), 'offset': offset}
+        offset = _aligned(offset + table.nbytes)
+    header = json.dumps({
+        'format_version': FORMAT_VERSION,
+        'meta': engine.meta,
+        'tables': layout,
+        'organic_treatments': predictor.organic_treatments,
+        'source_sha256': source_sha256
+    }, ensure_ascii=False).encode('utf-8')
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    # Readers map whole files, so a half-written artifact must never sit at the path
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+        for name, table in tables.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(table.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+    return data_start + offset
+
+
+def read_header(path):
+    """The artifact's JSON header and where its table data starts"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a Nutrify memory-mapped artifact")
+        (length,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(length).decode('utf-8'))
+    if header['format_version'] != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported artifact format {header['format_version']}")
+    return header, _aligned(len(MAGIC) + 8 + length)
+
+
+class MappedTarget:
+    """One target of the mapped engine, usable like a per-target model"""
+
+    def __init__(self, engine, target_name):
+        self.engine = engine
+        self.target_name = target_name
+
+    def predict(self, X):
+        return self.engine.predict(X)[self.target_name]
+
+
+class MappedAgriculturePredictor(CompleteSustainableAgriculturePredictor):
+    """The predictor API backed by tree tables mapped read-only from the artifact file"""
+
+    def __init__(self, engine, organic_treatments, path=None):
+        super().__init__()
+        self.engine = engine
+        self.path = path
+        self.organic_treatments = organic_treatments
+        # Per-target views keep code that walks .models working; predict_targets
+        # walks every target's trees in one pass
+        self.models = {target_name: MappedTarget(engine, target_name) for target_name in engine.targets}
+        self.scalers = {target_name: None for target_name in self.models}
+
+    def predict_targets(self, X, call='single'):
+        with metrics.stage('model', call=call, target='mapped'):
+            return self.engine.predict(np.asarray(X, dtype=float))
+
+
+def load_mapped_predictor(path=MAPPED_MODEL_PATH):
+    """Map an artifact written by write_artifact; only the header is read eagerly"""
+    header, data_start = read_header(path)
+    # Pages are read on first use and shared with every other process mapping the file
+    mapped = np.memmap(path, dtype=np.uint8, mode='r')
+    tables = {
+        name: np.ndarray(tuple(spec['shape']), dtype=np.dtype(spec['dtype']),
+                         buffer=mapped, offset=data_start + spec['offset'])
+        for name, spec in header['tables'].items()
+    }
+    engine = CompiledTreeEnsemble({}, header['meta'], tables)
+    engine.meta['source_sha256'] = header['source_sha256']
+    return MappedAgriculturePredictor(engine, header['organic_treatments'], path)
+
+
+def check_parity(predictor, mapped, X):
+    """Compare the mapped predictor with the joblib one, target by target and on the treatment plan"""
+    expected = predictor.predict_batch(X)
+    actual = mapped.predict_batch(X)
+    report = {}
+    for column in [*predictor.models, 'plan_id']:
+        if column == 'soil_health_score':
+            diff = np.abs(expected['soil_health_predicted'] - actual['soil_health_predicted'])
+            report[column] = {'max_abs_diff': float(np.nanmax(diff)) if len(diff) else 0.0}
+        else:
+            report[column] = {'mismatches': int(np.sum(expected[column].values != actual[column].values))}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the saved predictor to a memory-mapped artifact")
+    parser.add_argument("command", choices=["convert", "check"])
+    parser.add_argument("--model", default=MODEL_PATHS['per_target'], help="Path to the saved joblib predictor")
+    parser.add_argument("--artifact", "--output", dest="artifact", default=MAPPED_MODEL_PATH,
+                        help="Path of the memory-mapped artifact")
+    parser.add_argument("--rows", type=int, default=10000, help="Random rows used by check")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    predictor = load_predictor(args.model)
+    joblib_seconds = time.perf_counter() - start
+
+    if args.command == "convert":
+        from model_registry import file_sha256
+
+        size = write_artifact(predictor, args.artifact, file_sha256(args.model))
+        print(f"✅ {len(predictor.models)} models -> {args.artifact} ({size / 1e6:.1f} MB, "
+              f"joblib {os.path.getsize(args.model) / 1e6:.1f} MB)")
+        return
+
+    from feature_engineering import RAW_FEATURES, INPUT_RANGES, engineer_features
+    from model_registry import file_sha256
+
+    start = time.perf_counter()
+    mapped = load_mapped_predictor(args.artifact)
+    mapped_seconds = time.perf_counter() - start
+    if mapped.engine.meta['source_sha256'] != file_sha256(args.model):
+        print(f"⚠️ {args.artifact} was converted from a different {os.path.basename(args.model)}")
+
+    rng = np.random.default_rng(0)
+    raw = np.column_stack([rng.uniform(*INPUT_RANGES[c], args.rows) for c in RAW_FEATURES])
+    report = check_parity(predictor, mapped, engineer_features(raw))
+    for column, result in report.items():
+        print(f"{column:22}: {result}")
+    print(f"\nLoad: joblib {joblib_seconds * 1000:.1f} ms, mapped {mapped_seconds * 1000:.2f} ms")
+    if any(result.get('mismatches') for result in report.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
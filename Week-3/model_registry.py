@@ -0,0 +1,141 @@
+"""
+🗂️ Process-wide Model Registry for Nutrify AI
+Loads each artifact once per process and hot-reloads it when the file changes
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+from predictor import load_predictor, MODEL_PATH, FEATURE_CONFIG_PATH
+
+
+def file_sha256(path):
+    """Content hash of an artifact file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def process_rss_bytes():
+    """Resident memory of this process, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def load_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+class ModelRegistry:
+    """Thread-safe cache of loaded artifacts keyed by file path"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, path, loader):
+        """Return the loaded artifact, reloading it if the file has changed"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            # Cheap stat check on every call; the hash only runs when mtime or size moved
+            if entry and (entry['mtime_ns'], entry['size_bytes']) == (stat.st_mtime_ns, stat.st_size):
+                entry['hits'] += 1
+                return entry['artifact']
+
+            sha256 = file_sha256(path)
+            if entry and entry['sha256'] == sha256:
+                entry['mtime_ns'], entry['size_bytes'] = stat.st_mtime_ns, stat.st_size
+                entry['hits'] += 1
+                return entry['artifact']
+
+            self._entries[path] = self._load(path, loader, stat, sha256, entry)
+            return self._entries[path]['artifact']
+
+    def _load(self, path, loader, stat, sha256, previous):
+        """Load an artifact, recording load time and allocated memory"""
+        # sklearn trees allocate outside Python's allocator, so prefer the RSS delta
+        rss_before = process_rss_bytes()
+        already_tracing = tracemalloc.is_tracing()
+        if rss_before is None and not already_tracing:
+            tracemalloc.start()
+        traced_before, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        try:
+            artifact = loader(path)
+        finally:
+            load_seconds = time.perf_counter() - start
+            traced_after, _ = tracemalloc.get_traced_memory()
+            if rss_before is None and not already_tracing:
+                tracemalloc.stop()
+
+        if rss_before is not None:
+            memory_bytes = process_rss_bytes() - rss_before
+        else:
+            memory_bytes = traced_after - traced_before
+
+        return {
+            'artifact': artifact,
+            'sha256': sha256,
+            'mtime_ns': stat.st_mtime_ns,
+            'size_bytes': stat.st_size,
+            'load_seconds': load_seconds,
+            'memory_bytes': max(memory_bytes, 0),
+            'loaded_at': time.time(),
+            'version': previous['version'] + 1 if previous else 1,
+            'hits': 0
+        }
+
+    def version(self, path):
+        """Load counter of an artifact; changes whenever it is (re)loaded"""
+        entry = self._entries.get(os.path.abspath(path))
+        return entry['version'] if entry else 0
+
+    def sha256(self, path):
+        """Content hash of the currently loaded artifact, or None"""
+        entry = self._entries.get(os.path.abspath(path))
+        return entry['sha256'] if entry else None
+
+    def stats(self):
+        """Per-artifact load statistics"""
+        with self._lock:
+            return [
+                {
+                    'artifact': os.path.basename(path),
+                    'version': entry['version'],
+                    'sha256': entry['sha256'][:12],
+                    'size_bytes': entry['size_bytes'],
+                    'load_seconds': entry['load_seconds'],
+                    'memory_bytes': entry['memory_bytes'],
+                    'hits': entry['hits']
+                }
+                for path, entry in self._entries.items()
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# One registry per process, shared by every Streamlit session and worker thread
+registry = ModelRegistry()
+
+
+def get_predictor(path=MODEL_PATH):
+    return registry.get(path, load_predictor)
+
+
+def get_feature_config(path=FEATURE_CONFIG_PATH):
+    return registry.get(path, load_json)
@@ -0,0 +1,87 @@
+"""
+⚡ Prediction Cache for Nutrify AI
+Bounded LRU cache of analysis results keyed on quantized soil inputs
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from feature_engineering import RAW_FEATURES, INPUT_STEPS
+
+DEFAULT_CACHE_SIZE = int(os.getenv('NUTRIFY_PREDICTION_CACHE_SIZE', '1024'))
+
+
+def quantize_inputs(raw_values):
+    """Cache key: each raw input rounded to its form step"""
+    return tuple(int(round(float(value) / INPUT_STEPS[name]))
+                 for name, value in zip(RAW_FEATURES, raw_values))
+
+
+class PredictionCache:
+    """Thread-safe LRU cache, cleared whenever the model version changes"""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, raw_values, compute, model_version=None):
+        """Cached result for these inputs, calling compute() on a miss"""
+        key = quantize_inputs(raw_values)
+
+        with self._lock:
+            if model_version != self._model_version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._model_version = model_version
+
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Predict outside the lock so other sessions are not blocked
+        result = compute()
+        if not result.get('success', False):
+            return result
+
+        with self._lock:
+            if model_version == self._model_version:
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+# Shared by every session in the process
+prediction_cache = PredictionCache()
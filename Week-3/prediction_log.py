@@ -0,0 +1,297 @@
+"""
+🧾 Prediction Log for Nutrify AI
+Append-only JSON Lines log of served predictions with running aggregates
+for the analytics dashboard
+
+Each line is an additive summary of one analysis, bulk chunk or service
+micro-batch. Aggregates are folded in line by line as the log grows and
+snapshotted with their byte offset, so neither a restart nor a Streamlit
+rerun rescans the history.
+
+Set NUTRIFY_PREDICTION_LOG to move the log, or to an empty string to turn it off.
+
+Usage: python prediction_log.py [--log PATH] [--rebuild]
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+WEEK3_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_LOG_PATH = os.getenv('NUTRIFY_PREDICTION_LOG', os.path.join(WEEK3_DIR, 'logs', 'predictions.jsonl'))
+
+DEFICIENCY_TARGETS = ['any_deficiency', 'zinc_deficiency', 'iron_deficiency', 'multiple_deficiency']
+SEVERITIES = ['None', 'Mild', 'Moderate', 'Severe']
+HEALTH_BINS = 10        # soil health score histogram over [0, 1]
+VOLUME_HOURS = 24 * 7   # hourly request volume kept for the dashboard
+SNAPSHOT_EVERY = 200    # log lines folded in between aggregate snapshots
+
+
+def _hour(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:00Z')
+
+
+def summarize_results(results, source='app', mode='model'):
+    """Log entry for one predict_complete_analysis results dict"""
+    health = results.get('soil_health_predicted')
+    entry = {
+        'rows': 1,
+        'source': source,
+        'mode': results.get('inference_mode', mode),
+        'positives': {t: int(results['predictions'].get(t, 0) == 1) for t in DEFICIENCY_TARGETS},
+        'health_bins': [0] * HEALTH_BINS,
+        'health_sum': 0.0,
+        'health_count': 0,
+        'severity': {results['severity']: 1}
+    }
+    if health is not None:
+        entry['health_bins'][min(max(int(float(health) * HEALTH_BINS), 0), HEALTH_BINS - 1)] = 1
+        entry['health_sum'] = float(health)
+        entry['health_count'] = 1
+    return entry
+
+
+def summarize_batch(batch, source='bulk'):
+    """Log entry for a predict_batch DataFrame, computed column-wise"""
+    health = batch['soil_health_predicted'].dropna()
+    bins = (health * HEALTH_BINS).astype(int).clip(0, HEALTH_BINS - 1).value_counts()
+    modes = batch['inference_mode'].unique() if 'inference_mode' in batch else ['model']
+    return {
+        'rows': int(len(batch)),
+        'source': source,
+        'mode': str(modes[0]) if len(modes) == 1 else 'mixed',
+        'positives': {t: int((batch[t] == 1).sum()) for t in DEFICIENCY_TARGETS if t in batch},
+        'health_bins': [int(bins.get(i, 0)) for i in range(HEALTH_BINS)],
+        'health_sum': float(health.sum()),
+        'health_count': int(len(health)),
+        'severity': {str(k): int(v) for k, v in batch['severity'].value_counts().items()}
+    }
+
+
+class PredictionAggregates:
+    """Running totals that fold in one log entry at a time"""
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.rows = state.get('rows', 0)
+        self.entries = state.get('entries', 0)
+        self.positives = dict.fromkeys(DEFICIENCY_TARGETS, 0)
+        self.positives.update(state.get('positives', {}))
+        self.health_bins = list(state.get('health_bins', [0] * HEALTH_BINS))
+        self.health_sum = state.get('health_sum', 0.0)
+        self.health_count = state.get('health_count', 0)
+        self.severity = dict.fromkeys(SEVERITIES, 0)
+        self.severity.update(state.get('severity', {}))
+        self.by_source = dict(state.get('by_source', {}))
+        self.hourly = dict(state.get('hourly', {}))
+        self.first_ts = state.get('first_ts')
+        self.last_ts = state.get('last_ts')
+
+    def add(self, entry):
+        rows = entry['rows']
+        self.rows += rows
+        self.entries += 1
+        for target, count in entry['positives'].items():
+            self.positives[target] = self.positives.get(target, 0) + count
+        for i, count in enumerate(entry['health_bins']):
+            self.health_bins[i] += count
+        self.health_sum += entry['health_sum']
+        self.health_count += entry['health_count']
+        for severity, count in entry['severity'].items():
+            self.severity[severity] = self.severity.get(severity, 0) + count
+        self.by_source[entry['source']] = self.by_source.get(entry['source'], 0) + rows
+
+        self.first_ts = entry['ts'] if self.first_ts is None else min(self.first_ts, entry['ts'])
+        self.last_ts = entry['ts'] if self.last_ts is None else max(self.last_ts, entry['ts'])
+        # Keys are ISO hours, so they compare in time order; only the newest entry's
+        # last VOLUME_HOURS hours are kept, however many of them saw traffic
+        cutoff = _hour(self.last_ts - (VOLUME_HOURS - 1) * 3600)
+        hour = _hour(entry['ts'])
+        if hour >= cutoff:
+            self.hourly[hour] = self.hourly.get(hour, 0) + rows
+        for old in [h for h in self.hourly if h < cutoff]:
+            del self.hourly[old]
+
+    def to_dict(self):
+        return {
+            'rows': self.rows,
+            'entries': self.entries,
+            'positives': dict(self.positives),
+            'health_bins': list(self.health_bins),
+            'health_sum': self.health_sum,
+            'health_count': self.health_count,
+            'severity': dict(self.severity),
+            'by_source': dict(self.by_source),
+            'hourly': dict(sorted(self.hourly.items())),
+            'first_ts': self.first_ts,
+            'last_ts': self.last_ts
+        }
+
+    def recent_hourly(self, hours, now=None):
+        """Hourly volume of the last `hours` hours up to now, oldest first"""
+        cutoff = _hour((time.time() if now is None else now) - (hours - 1) * 3600)
+        return {hour: rows for hour, rows in sorted(self.hourly.items()) if hour >= cutoff}
+
+    def rate(self, target):
+        return self.positives.get(target, 0) / self.rows if self.rows else None
+
+    @property
+    def health_mean(self):
+        return self.health_sum / self.health_count if self.health_count else None
+
+
+class PredictionLog:
+    """Thread-safe appender plus aggregates kept in step with the log file
+
+    Aggregates only ever advance by reading the log from the last offset, so
+    entries appended by other processes (service workers, bulk CLI runs) are
+    counted too, and a snapshot always matches the offset it was taken at.
+    """
+
+    def __init__(self, path=DEFAULT_LOG_PATH):
+        self.path = path
+        self.enabled = bool(path)
+        self.snapshot_path = os.path.splitext(path)[0] + '.aggregates.json'
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._since_snapshot = 0
+        self.last_error = None
+        self.aggregates = PredictionAggregates()
+        if self.enabled:
+            self._load_snapshot()
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return
+        # A log truncated or replaced since the snapshot is replayed from the start, and
+        # so is one whose snapshot cannot be read back
+        try:
+            if os.path.exists(self.path) and os.path.getsize(self.path) >= snapshot['offset']:
+                aggregates = PredictionAggregates(snapshot['aggregates'])
+                self._offset, self.aggregates = snapshot['offset'], aggregates
+        except (OSError, KeyError, TypeError, AttributeError, ValueError) as e:
+            self.last_error = f"Ignoring snapshot {self.snapshot_path}: {type(e).__name__}: {e}"
+            self._offset, self.aggregates = 0, PredictionAggregates()
+
+    def append(self, entry):
+        """Write one summary entry and fold it (and anything new from other writers) in"""
+        if not self.enabled:
+            return
+        entry = dict(entry, ts=entry.get('ts', time.time()))
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with self._lock:
+            # Logging must never fail the prediction it records
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+                self._refresh_locked()
+            except OSError as e:
+                self.last_error = str(e)
+
+    def log_results(self, results, source='app', mode='model'):
+        if results.get('success'):
+            self.append(summarize_results(results, source, mode))
+
+    def log_batch(self, batch, source='bulk'):
+        if len(batch):
+            self.append(summarize_batch(batch, source))
+
+    def refresh(self):
+        """Fold in entries appended since the last read; returns the aggregates"""
+        with self._lock:
+            if self.enabled:
+                # Reading the log must never fail the page that shows it
+                try:
+                    self._refresh_locked()
+                except OSError as e:
+                    self.last_error = str(e)
+            return self.aggregates
+
+    def _refresh_locked(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size < self._offset:
+            self._offset = 0
+            self.aggregates = PredictionAggregates()
+        if size == self._offset:
+            return
+
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read(size - self._offset)
+        # Stop at the last newline; a line still being written is read next time
+        complete = data[:data.rfind(b'\n') + 1]
+        for raw_line in complete.splitlines():
+            try:
+                self.aggregates.add(json.loads(raw_line))
+            except (ValueError, KeyError):
+                continue
+            self._since_snapshot += 1
+        self._offset += len(complete)
+
+        if self._since_snapshot >= SNAPSHOT_EVERY:
+            self._write_snapshot_locked()
+
+    def _write_snapshot_locked(self):
+        # A snapshot only saves replay time; without one the next start rescans the log
+        tmp_path = f'{self.snapshot_path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({'offset': self._offset, 'aggregates': self.aggregates.to_dict()}, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            self.last_error = str(e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._since_snapshot = 0
+
+    def snapshot(self):
+        with self._lock:
+            self._write_snapshot_locked()
+
+    def rebuild(self):
+        """Drop the snapshot and fold the whole log in again"""
+        with self._lock:
+            self._offset = 0
+            self.aggregates = PredictionAggregates()
+            self._refresh_locked()
+            self._write_snapshot_locked()
+            return self.aggregates
+
+
+# One log per process, shared by every Streamlit session
+prediction_log = PredictionLog()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize the Nutrify AI prediction log")
+    parser.add_argument("--log", default=DEFAULT_LOG_PATH, help="Prediction log (JSON Lines)")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the snapshot and replay the whole log")
+    args = parser.parse_args()
+
+    log = PredictionLog(args.log)
+    start = time.perf_counter()
+    aggregates = log.rebuild() if args.rebuild else log.refresh()
+    print(f"📒 {args.log}: {aggregates.entries:,} entries, {aggregates.rows:,} predictions "
+          f"({time.perf_counter() - start:.3f}s)")
+    for target in DEFICIENCY_TARGETS:
+        rate = aggregates.rate(target)
+        print(f"  {target:22}: {'-' if rate is None else f'{rate:.1%}'}")
+    health = aggregates.health_mean
+    print(f"  {'mean soil health':22}: {'-' if health is None else f'{health:.3f}'}")
+    print(f"  {'severity':22}: {aggregates.severity}")
+    print(f"  {'by source':22}: {aggregates.by_source}")
+
+
+if __name__ == "__main__":
+    main()
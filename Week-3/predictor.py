@@ -0,0 +1,419 @@
+"""
+🌾 Nutrify AI - Sustainable Agriculture Predictor
+The ML system saved by the Week 2 notebook, shared by the app and batch tools
+"""
+
+import os
+import sys
+from types import MappingProxyType
+import numpy as np
+import pandas as pd
+import joblib
+
+from rules import RuleEngine, MODEL_MODE, RULES_MODE, check_mode
+from instrumentation import metrics
+
+# Saved Week 2 artifacts, resolved from this file so any working directory works
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "WEEK-2", "complete_sustainable_agriculture_system")
+MULTI_OUTPUT_MODEL_PATH = os.path.join(MODEL_DIR, "complete_agriculture_predictor_multioutput.joblib")
+
+# Model layouts selectable at load time with NUTRIFY_MODEL_LAYOUT
+MODEL_PATHS = {
+    'per_target': os.path.join(MODEL_DIR, "complete_agriculture_predictor.joblib"),
+    'multi_output': MULTI_OUTPUT_MODEL_PATH,
+    'mapped': os.path.join(MODEL_DIR, "complete_agriculture_predictor.mmap")
+}
+MODEL_LAYOUT = os.environ.get("NUTRIFY_MODEL_LAYOUT", "per_target")
+if MODEL_LAYOUT not in MODEL_PATHS:
+    raise ValueError(f"NUTRIFY_MODEL_LAYOUT must be one of: {', '.join(MODEL_PATHS)}")
+MODEL_PATH = MODEL_PATHS[MODEL_LAYOUT]
+FEATURE_CONFIG_PATH = os.path.join(MODEL_DIR, "complete_feature_config.json")
+
+# Class used by the Week 2 notebook to save the model
+class CompleteSustainableAgriculturePredictor:
+    """Complete production-ready ML system with all necessary functionality"""
+    
+    def __init__(self):
+        self.models = {}
+        self.scalers = {}
+        self.results = {}
+        self.feature_importance = {}
+        
+        # Complete organic treatments database
+        self.organic_treatments = {
+            'zinc_deficiency': {
+                'solutions': [
+                    'Apply zinc-rich vermicompost (5-10 kg/acre)',
+                    'Use seaweed extract foliar spray (2-3 times/season)',
+                    'Incorporate zinc-accumulating legume cover crops (cowpea, chickpea)',
+                    'Apply bone meal organic fertilizer (2-3 kg/acre)',
+                    'Use organic mulching with zinc-rich materials',
+                    'Implement crop rotation with zinc-efficient varieties'
+                ],
+                'cost': '₹2,000-4,000/acre', 'timeline': '3-6 months', 'severity_weight': 25
+            },
+            'iron_deficiency': {
+                'solutions': [
+                    'Apply iron-rich kitchen waste compost',
+                    'Use mycorrhizal fungi inoculation for better iron uptake',
+                    'Foliar spray with organic iron chelate solution',
+                    'Apply blood meal organic fertilizer (1-2 kg/acre)',
+                    'Improve soil drainage to prevent waterlogging',
+                    'Use green manure crops rich in iron'
+                ],
+                'cost': '₹1,500-3,500/acre', 'timeline': '2-4 months', 'severity_weight': 20
+            },
+            'multiple_deficiency': {
+                'solutions': [
+                    'Comprehensive organic soil restoration program',
+                    'Apply aged farmyard manure (10-15 tons/hectare)',
+                    'Implement diverse crop rotation with nitrogen-fixing legumes',
+                    'Use biochar for soil structure and nutrient improvement',
+                    'Establish permanent organic matter cycling system',
+                    'Apply rock phosphate and potash for long-term nutrition'
+                ],
+                'cost': '₹8,000-15,000/acre', 'timeline': '6-12 months', 'severity_weight': 40
+            },
+            'soil_health_improvement': {
+                'solutions': [
+                    'Increase organic matter through systematic composting',
+                    'Apply premium vermicompost (2-3 tons/hectare)',
+                    'Use effective microorganisms (EM) soil solution',
+                    'Implement no-till or minimal tillage practices',
+                    'Apply organic biofertilizers (Rhizobium, Azotobacter)',
+                    'Create permanent mulch cover system'
+                ],
+                'cost': '₹3,000-6,000/acre', 'timeline': '4-8 months', 'severity_weight': 15
+            }
+        }
+    
+    def __getstate__(self):
+        # The plan table is rebuilt on demand, and its read-only views do not pickle
+        state = self.__dict__.copy()
+        state.pop('_plan_table', None)
+        return state
+    
+    def classify_severity(self, predictions, soil_health_score=None):
+        """Complete severity classification - all levels"""
+        severity_score = 0
+        
+        # Complete severity calculation
+        for deficiency, pred in predictions.items():
+            if pred == 1 and deficiency in self.organic_treatments:
+                severity_score += self.organic_treatments[deficiency]['severity_weight']
+        
+        # Complete soil health factor
+        if soil_health_score is not None:
+            if soil_health_score < 0.4: severity_score += 20
+            elif soil_health_score < 0.6: severity_score += 10
+        
+        # Complete severity classification (all 4 levels)
+        if severity_score >= 50: return "Severe"
+        elif severity_score >= 25: return "Moderate"
+        elif severity_score >= 10: return "Mild"
+        else: return "None"
+    
+    def generate_complete_treatment_plan(self, predictions, soil_health_score=None):
+        """Complete treatment plan generation - all treatments (shared, read-only plan)"""
+        flags = {name: np.array([predictions.get(name, 0)]) for name in self.PLAN_FLAGS}
+        health = np.nan if soil_health_score is None else soil_health_score
+        plan_id = self.plan_ids(flags, [health])[0]
+        return self.plan_table.plans[plan_id]
+    
+    def _build_treatment_plan(self, predictions, soil_health_score=None):
+        """Plan for one combination of predictions, used to fill the plan table"""
+        primary_concern = None
+        
+        # Complete priority system
+        if predictions.get('multiple_deficiency', 0) == 1:
+            primary_concern = 'multiple_deficiency'
+        elif predictions.get('zinc_deficiency', 0) == 1:
+            primary_concern = 'zinc_deficiency'
+        elif predictions.get('iron_deficiency', 0) == 1:
+            primary_concern = 'iron_deficiency'
+        elif soil_health_score and soil_health_score < 0.6:
+            primary_concern = 'soil_health_improvement'
+        
+        severity = self.classify_severity(predictions, soil_health_score)
+        
+        # Complete treatment recommendation
+        if primary_concern:
+            treatment = self.organic_treatments[primary_concern]
+            return {
+                'primary_concern': primary_concern.replace('_', ' ').title(),
+                'severity': severity,
+                'organic_solutions': treatment['solutions'],
+                'cost_estimate': treatment['cost'],
+                'timeline': treatment['timeline'],
+                'sustainability_score': 95,
+                'farmer_friendly': True,
+                'chemical_free': True
+            }
+        else:
+            return {
+                'primary_concern': 'None - Soil in excellent condition',
+                'severity': 'None',
+                'organic_solutions': [
+                    'Continue sustainable farming practices',
+                    'Regular soil testing and monitoring',
+                    'Maintain organic matter levels through composting'
+                ],
+                'cost_estimate': '₹500-1,500/acre (maintenance)',
+                'timeline': 'Ongoing maintenance',
+                'sustainability_score': 100,
+                'farmer_friendly': True,
+                'chemical_free': True
+            }
+    
+    def predict_complete_analysis(self, soil_sample, feature_names):
+        """Complete prediction system - all functionality"""
+        results = {'predictions': {}, 'soil_health_predicted': None, 'success': False}
+        
+        with metrics.stage('predict_complete_analysis', call='single'):
+            try:
+                # Complete prediction pipeline
+                for target_name, preds in self.predict_targets(soil_sample).items():
+                    pred = preds[0]
+                    
+                    if target_name == 'soil_health_score':
+                        results['soil_health_predicted'] = pred
+                    else:
+                        results['predictions'][target_name] = pred
+                
+                # Complete treatment plan generation
+                with metrics.stage('treatment_plan', call='single'):
+                    treatment_plan = self.generate_complete_treatment_plan(
+                        results['predictions'], results['soil_health_predicted']
+                    )
+                
+                results['treatment_plan'] = treatment_plan
+                results['severity'] = treatment_plan['severity']
+                results['success'] = True
+                
+            except Exception as e:
+                results['error'] = str(e)
+                metrics.increment('prediction_errors')
+        
+        return results
+    
+    def predict_targets(self, X, call='single'):
+        """Per-target model outputs for a feature matrix
+        
+        call: 'single' or 'batch', the label the scaling and model timings go under
+        """
+        outputs = {}
+        for target_name, model in self.models.items():
+            scaler = self.scalers.get(target_name)
+            if scaler:
+                with metrics.stage('scale', call=call, target=target_name):
+                    X_target = scaler.transform(X)
+            else:
+                X_target = X
+            with metrics.stage('model', call=call, target=target_name):
+                outputs[target_name] = model.predict(X_target)
+        return outputs
+    
+    # Predictions that choose the concern and add severity; with the soil health
+    # bucket they index the precomputed plan table
+    PLAN_FLAGS = ['multiple_deficiency', 'zinc_deficiency', 'iron_deficiency']
+    HEALTH_BUCKETS = 5  # unknown, exactly 0, below 0.4, below 0.6, 0.6 and above
+    
+    @staticmethod
+    def soil_health_bucket(soil_health_scores):
+        """Bucket of each soil health score, matching the plan rules' thresholds"""
+        health = np.asarray(soil_health_scores, dtype=float)
+        # 0 counts towards severity but, being falsy, never selects soil health improvement
+        return np.select([np.isnan(health), health == 0, health < 0.4, health < 0.6],
+                         [0, 1, 2, 3], default=4)
+    
+    def plan_ids(self, predictions, soil_health_scores=None):
+        """Row index into plan_table for arrays of predictions and health scores"""
+        n_rows = len(next(iter(predictions.values())))
+        bits = np.zeros(n_rows, dtype=np.intp)
+        for name in self.PLAN_FLAGS:
+            bits = bits * 2 + (np.asarray(predictions.get(name, np.zeros(n_rows))) == 1)
+        if soil_health_scores is None:
+            soil_health_scores = np.full(n_rows, np.nan)
+        return bits * self.HEALTH_BUCKETS + self.soil_health_bucket(soil_health_scores)
+    
+    @property
+    def plan_table(self):
+        """Every distinct treatment plan, built once (models saved before this lack it)"""
+        table = self.__dict__.get('_plan_table')
+        if table is None:
+            table = self._plan_table = TreatmentPlanTable.build(self)
+        return table
+    
+    def generate_treatment_plan_batch(self, predictions, soil_health_scores=None):
+        """Vectorized generate_complete_treatment_plan returning plan columns"""
+        plan_ids = self.plan_ids(predictions, soil_health_scores)
+        columns = self.plan_table.lookup(plan_ids)
+        columns['plan_id'] = plan_ids
+        return columns
+    
+    def predict_batch(self, X, feature_names=None, engine=None, mode=MODEL_MODE):
+        """Batch prediction - one scaler and model call per target for all rows
+        
+        engine: optional CompiledTreeEnsemble compiled from these models, used
+        instead of the sklearn estimators for the model step of batches up to
+        engine.max_batch_rows (larger ones are faster through sklearn)
+        mode: 'model' for the trained models, 'rules' for the Week 1 label
+        definitions evaluated directly; recorded in the inference_mode column
+        """
+        check_mode(mode)
+        with metrics.stage('predict_batch', call='batch', mode=mode):
+            return self._predict_batch(X, feature_names, engine, mode)
+    
+    def _predict_batch(self, X, feature_names, engine, mode):
+        if isinstance(X, pd.DataFrame):
+            X = X[feature_names].values if feature_names else X.values
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        
+        if mode == RULES_MODE:
+            with metrics.stage('rules', call='batch'):
+                outputs = RuleEngine(self.models).predict(X)
+        elif engine is not None and len(X) <= engine.max_batch_rows:
+            with metrics.stage('compiled_engine', call='batch'):
+                outputs = engine.predict(X)
+        else:
+            outputs = self.predict_targets(X, call='batch')
+        
+        predictions = {}
+        soil_health = None
+        for target_name, preds in outputs.items():
+            if target_name == 'soil_health_score':
+                soil_health = preds.astype(float)
+            else:
+                predictions[target_name] = preds.astype(int)
+        
+        with metrics.stage('treatment_plan', call='batch'):
+            plan = self.generate_treatment_plan_batch(predictions, soil_health)
+        
+        columns = dict(predictions)
+        columns['soil_health_predicted'] = soil_health if soil_health is not None else np.full(len(X), np.nan)
+        columns.update(plan)
+        columns['inference_mode'] = mode
+        return pd.DataFrame(columns)
+
+    def batch_to_results(self, batch):
+        """Convert predict_batch output into predict_complete_analysis results dicts"""
+        plans = self.plan_table.plans
+        targets = [c for c in batch.columns if c in self.models]
+
+        results = []
+        for row in batch.to_dict('records'):
+            health = row['soil_health_predicted']
+            plan = plans[row['plan_id']]
+            results.append({
+                'predictions': {t: int(row[t]) for t in targets},
+                'soil_health_predicted': None if np.isnan(health) else float(health),
+                'success': True,
+                'treatment_plan': plan,
+                'severity': plan['severity'],
+                'inference_mode': row['inference_mode']
+            })
+        return results
+
+
+class MultiOutputTarget:
+    """One target's column of a shared multi-output forest, usable like a per-target model"""
+
+    def __init__(self, forest, index, classification, mean=0.0, scale=1.0):
+        self.forest = forest
+        self.index = index
+        self.classification = classification
+        self.mean = mean
+        self.scale = scale
+
+    def finish(self, values):
+        # Targets are learned standardized; binary ones as 0/1 means, ties going to 0 as argmax does
+        values = values * self.scale + self.mean
+        return (values > 0.5).astype(int) if self.classification else values
+
+    def predict(self, X):
+        return self.finish(self.forest.predict(X)[:, self.index])
+
+
+class DerivedFeatureTarget:
+    """A target that is itself one of the engineered input features"""
+
+    def __init__(self, feature_index):
+        self.feature_index = feature_index
+
+    def predict(self, X):
+        return np.asarray(X, dtype=float)[:, self.feature_index]
+
+
+class MultiOutputAgriculturePredictor(CompleteSustainableAgriculturePredictor):
+    """The predictor API backed by one forest predicting the deficiency targets together"""
+
+    def __init__(self, forest, targets, classification_targets, target_mean, target_scale, derived_targets=None):
+        super().__init__()
+        self.forest = forest
+        # Per-target views keep code that walks .models working; predict_targets
+        # walks the forest once for all of them
+        self.models = {
+            target_name: MultiOutputTarget(forest, i, target_name in classification_targets,
+                                           float(target_mean[i]), float(target_scale[i]))
+            for i, target_name in enumerate(targets)
+        }
+        # Targets computed by feature engineering (soil_health_score) are read, not learned
+        for target_name, feature_index in (derived_targets or {}).items():
+            self.models[target_name] = DerivedFeatureTarget(feature_index)
+        self.scalers = {target_name: None for target_name in self.models}
+
+    def predict_targets(self, X, call='single'):
+        with metrics.stage('model', call=call, target='multi_output'):
+            values = self.forest.predict(X)
+        return {target_name: model.finish(values[:, model.index]) if isinstance(model, MultiOutputTarget)
+                else model.predict(X)
+                for target_name, model in self.models.items()}
+
+
+class TreatmentPlanTable:
+    """Precomputed treatment plans indexed by plan id, shared read-only"""
+
+    COLUMNS = ['primary_concern', 'severity', 'cost_estimate', 'timeline', 'sustainability_score']
+
+    def __init__(self, plans):
+        self.plans = tuple(plans)
+        self.columns = {
+            column: np.array([plan[column] for plan in self.plans],
+                             dtype=int if column == 'sustainability_score' else object)
+            for column in self.COLUMNS
+        }
+
+    @classmethod
+    def build(cls, predictor):
+        """Run the plan rules once for every flag combination and health bucket"""
+        # A representative score per soil_health_bucket, in bucket order
+        bucket_scores = [None, 0.0, 0.2, 0.5, 0.8]
+        n_flags = len(predictor.PLAN_FLAGS)
+        plans = []
+        for bits in range(2 ** n_flags):
+            predictions = {name: (bits >> (n_flags - 1 - i)) & 1 for i, name in enumerate(predictor.PLAN_FLAGS)}
+            for score in bucket_scores:
+                plan = predictor._build_treatment_plan(predictions, score)
+                plan['organic_solutions'] = tuple(plan['organic_solutions'])
+                plans.append(MappingProxyType(plan))
+        return cls(plans)
+
+    def lookup(self, plan_ids):
+        """Plan columns for an array of plan ids"""
+        return {column: values[plan_ids] for column, values in self.columns.items()}
+
+
+def load_predictor(model_path):
+    """Load a saved predictor outside the Streamlit script"""
+    if model_path.endswith('.mmap'):
+        # Imported here: mmap_artifact builds on this module
+        from mmap_artifact import load_mapped_predictor
+        return load_mapped_predictor(model_path)
+    # The notebook pickled the class as __main__.CompleteSustainableAgriculturePredictor
+    main_module = sys.modules['__main__']
+    if not hasattr(main_module, 'CompleteSustainableAgriculturePredictor'):
+        main_module.CompleteSustainableAgriculturePredictor = CompleteSustainableAgriculturePredictor
+    return joblib.load(model_path)
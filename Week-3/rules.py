@@ -0,0 +1,112 @@
+"""
+📏 Rule-based Fast Path for Nutrify AI
+Evaluates the Week 1 label definitions as vectorized masks instead of the
+trained ensembles, for bulk screening
+
+Usage: python rules.py [--model PATH] [--rows 100000]
+"""
+
+import argparse
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from feature_engineering import RAW_FEATURES, INPUT_RANGES, engineer_features, deficiency_targets, soil_health_score
+
+# Inference modes accepted by predict_batch, bulk mode and the service
+MODEL_MODE = 'model'
+RULES_MODE = 'rules'
+INFERENCE_MODES = (MODEL_MODE, RULES_MODE)
+
+TRAINING_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "WEEK-1", "soil_nutrition_clean.csv")
+
+
+class RuleEngine:
+    """Scores the threshold-defined targets straight from the model feature matrix"""
+
+    def __init__(self, targets):
+        self.targets = list(targets)
+
+    def predict(self, X):
+        """Per-target outputs in the shape of the models' predict()"""
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        raw = X[:, :len(RAW_FEATURES)]
+
+        outputs = deficiency_targets(raw)
+        # The regression target is the training formula itself
+        outputs['soil_health_score'] = soil_health_score(raw[:, 0], raw[:, 1], raw[:, 2], raw[:, 3])
+
+        unknown = [t for t in self.targets if t not in outputs]
+        if unknown:
+            raise ValueError(f"No rule defines: {', '.join(unknown)}")
+        return {target_name: outputs[target_name] for target_name in self.targets}
+
+
+def check_mode(mode):
+    if mode not in INFERENCE_MODES:
+        raise ValueError(f"Unknown inference mode '{mode}' (use one of: {', '.join(INFERENCE_MODES)})")
+    return mode
+
+
+def parity_report(predictor, X, engine=None):
+    """Where the trained models and the rules disagree, per target and per plan field"""
+    model_batch = predictor.predict_batch(X, engine=engine, mode=MODEL_MODE)
+    rules_batch = predictor.predict_batch(X, mode=RULES_MODE)
+
+    report = {'rows': len(model_batch)}
+    for target_name in predictor.models:
+        if target_name == 'soil_health_score':
+            diff = np.abs(model_batch['soil_health_predicted'].values - rules_batch['soil_health_predicted'].values)
+            report[target_name] = {'mean_abs_diff': float(diff.mean()), 'max_abs_diff': float(diff.max())}
+        else:
+            report[target_name] = {'disagreements': int((model_batch[target_name] != rules_batch[target_name]).sum())}
+    for column in ('primary_concern', 'severity'):
+        report[column] = {'disagreements': int((model_batch[column] != rules_batch[column]).sum())}
+    return report
+
+
+def main():
+    import time
+    import pandas as pd
+    from predictor import load_predictor, MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Compare the rules fast path with the trained models")
+    parser.add_argument("--model", default=MODEL_PATH, help="Path to the saved predictor")
+    parser.add_argument("--rows", type=int, default=100000, help="Random rows within the form's input ranges")
+    parser.add_argument("--data", default=TRAINING_DATA_PATH, help="Raw-input CSV also checked for parity")
+    args = parser.parse_args()
+
+    predictor = load_predictor(args.model)
+    rng = np.random.default_rng(0)
+    raw = np.column_stack([rng.uniform(*INPUT_RANGES[c], args.rows) for c in RAW_FEATURES])
+    X = engineer_features(raw)
+
+    # Model step alone, then the whole predict_batch (features -> plan)
+    for mode in INFERENCE_MODES:
+        if mode == RULES_MODE:
+            step = lambda: RuleEngine(predictor.models).predict(X)
+        else:
+            step = lambda: predictor.predict_targets(X)
+        timings = []
+        for func in (step, lambda: predictor.predict_batch(X, mode=mode)):
+            start = time.perf_counter()
+            func()
+            timings.append(args.rows / (time.perf_counter() - start))
+        print(f"{mode:>6} mode: {timings[0]:>14,.0f} rows/sec (targets) | {timings[1]:>12,.0f} rows/sec (predict_batch)")
+
+    datasets = [('random inputs', X)]
+    if args.data and os.path.exists(args.data):
+        datasets.append((os.path.basename(args.data), engineer_features(pd.read_csv(args.data)[RAW_FEATURES].values)))
+    for label, features in datasets:
+        print(f"\nParity on {label}:")
+        for name, result in parity_report(predictor, features).items():
+            print(f"  {name:22}: {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+🗂️ Soil History Store for Nutrify AI
+SQLite history of every field's lab inputs and predictions, with write-behind
+inserts and indexed range queries for field and village trends
+
+Set NUTRIFY_SOIL_HISTORY_DB to move the database.
+
+Usage: python soil_history.py field FARMER_ID FIELD_ID [--start 2025-01-01] [--end 2025-12-31]
+       python soil_history.py village VILLAGE [--period month]
+"""
+
+import argparse
+import atexit
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from feature_engineering import RAW_FEATURES
+
+WEEK3_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.getenv('NUTRIFY_SOIL_HISTORY_DB', os.path.join(WEEK3_DIR, 'logs', 'soil_history.db'))
+
+DEFICIENCY_COLUMNS = ['any_deficiency', 'zinc_deficiency', 'iron_deficiency', 'multiple_deficiency']
+COLUMNS = (['village', 'farmer_id', 'field_id', 'ts'] + RAW_FEATURES + ['soil_health'] + DEFICIENCY_COLUMNS
+           + ['severity', 'primary_concern', 'source'])
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS soil_samples (
+    id INTEGER PRIMARY KEY,
+    village TEXT,
+    farmer_id TEXT NOT NULL,
+    field_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    {', '.join(f'{name} REAL' for name in RAW_FEATURES)},
+    soil_health REAL,
+    {', '.join(f'{name} INTEGER' for name in DEFICIENCY_COLUMNS)},
+    severity TEXT,
+    primary_concern TEXT,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_samples_field_ts ON soil_samples (farmer_id, field_id, ts);
+CREATE INDEX IF NOT EXISTS idx_samples_village_ts ON soil_samples (village, ts);
+"""
+
+INSERT_SQL = f"INSERT INTO soil_samples ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+PERIOD_FORMATS = {'day': '%Y-%m-%d', 'week': '%Y-W%W', 'month': '%Y-%m', 'season': None, 'year': '%Y'}
+
+
+def to_timestamp(value):
+    """Unix seconds from None, a number, a datetime or an ISO date string (naive = UTC)"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _period_sql(period):
+    if period not in PERIOD_FORMATS:
+        raise ValueError(f"Unknown period '{period}' (use one of: {', '.join(PERIOD_FORMATS)})")
+    if period == 'season':
+        # Indian cropping seasons: Kharif Jun-Oct, Rabi Nov-Mar (dated by its start year), Zaid Apr-May
+        month = "CAST(strftime('%m', ts, 'unixepoch') AS INTEGER)"
+        year = "CAST(strftime('%Y', ts, 'unixepoch') AS INTEGER)"
+        return (f"CASE WHEN {month} BETWEEN 6 AND 10 THEN {year} || ' Kharif' "
+                f"WHEN {month} >= 11 THEN {year} || ' Rabi' "
+                f"WHEN {month} <= 3 THEN ({year} - 1) || ' Rabi' "
+                f"ELSE {year} || ' Zaid' END")
+    return f"strftime('{PERIOD_FORMATS[period]}', ts, 'unixepoch')"
+
+
+class SoilHistoryStore:
+    """Write-behind SQLite store: record() only queues; a writer thread inserts in batches"""
+
+    def __init__(self, path=DEFAULT_DB_PATH, batch_size=1000, flush_interval=0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.last_error = None
+        self._queue = queue.Queue()
+        self._local = threading.local()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    def _connect(self):
+        """One connection per thread; WAL lets readers run while the writer commits"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def _start_writer(self):
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="soil-history-writer", daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+
+    def record(self, farmer_id, field_id, raw_values, results, village=None, timestamp=None, source='app'):
+        """Queue one analysis (predict_complete_analysis results) for the field"""
+        predictions = results.get('predictions', {})
+        row = ([village, str(farmer_id), str(field_id), to_timestamp(timestamp) or time.time()]
+               + [float(v) for v in raw_values]
+               + [None if results.get('soil_health_predicted') is None else float(results['soil_health_predicted'])]
+               + [None if t not in predictions else int(predictions[t]) for t in DEFICIENCY_COLUMNS]
+               + [results.get('severity'), results.get('treatment_plan', {}).get('primary_concern'), source])
+        self.record_rows([row])
+
+    def record_batch(self, keys, raw, batch, source='bulk'):
+        """Queue predict_batch rows; keys has farmer_id, field_id and optional village/ts columns"""
+        n_rows = len(batch)
+        frame = pd.DataFrame({
+            'village': keys['village'].values if 'village' in keys else [None] * n_rows,
+            'farmer_id': keys['farmer_id'].astype(str).values,
+            'field_id': keys['field_id'].astype(str).values,
+            'ts': keys['ts'].values if 'ts' in keys else [time.time()] * n_rows
+        })
+        for i, name in enumerate(RAW_FEATURES):
+            frame[name] = raw[:, i]
+        frame['soil_health'] = batch['soil_health_predicted'].values
+        for name in DEFICIENCY_COLUMNS:
+            frame[name] = batch[name].values if name in batch else None
+        frame['severity'] = batch['severity'].values
+        frame['primary_concern'] = batch['primary_concern'].values
+        frame['source'] = source
+        frame = frame.astype(object).where(frame.notna(), None)
+        self.record_rows(list(frame[COLUMNS].itertuples(index=False, name=None)))
+
+    def record_rows(self, rows):
+        """Queue rows already in COLUMNS order"""
+        if rows:
+            self._start_writer()
+            self._queue.put(rows)
+
+    def _write_loop(self):
+        while True:
+            pending = [self._queue.get()]
+            rows = list(pending[0])
+            deadline = time.monotonic() + self.flush_interval
+            # Gather more until the batch is full or the queue stays empty past the interval
+            while len(rows) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                pending.append(item)
+                rows.extend(item)
+            # A failing batch (unreachable database, bad row) is dropped and recorded, never
+            # the writer; the next batch reconnects
+            try:
+                connection = self._connect()
+                with connection:
+                    connection.executemany(INSERT_SQL, rows)
+                self.written += len(rows)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+            finally:
+                for _ in pending:
+                    self._queue.task_done()
+
+    def flush(self, timeout=30.0):
+        """Block until everything queued so far is written, at most timeout seconds
+
+        Returns False on timeout; rows the writer could not insert are dropped and
+        leave their error in last_error.
+        """
+        if self._writer is None:
+            return True
+        waiter = threading.Thread(target=self._queue.join, name="soil-history-flush", daemon=True)
+        waiter.start()
+        waiter.join(timeout)
+        return not waiter.is_alive()
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def query(self, sql, params=()):
+        return pd.read_sql_query(sql, self._connect(), params=params)
+
+    def field_history(self, farmer_id, field_id, start=None, end=None):
+        """Every sample of one field in [start, end), in time order (range scan on the field index)"""
+        df = self.query(
+            f"SELECT ts, village, {', '.join(RAW_FEATURES)}, soil_health, {', '.join(DEFICIENCY_COLUMNS)}, "
+            "severity, primary_concern FROM soil_samples "
+            "WHERE farmer_id = ? AND field_id = ? AND ts >= ? AND ts < ? ORDER BY ts",
+            (str(farmer_id), str(field_id), to_timestamp(start) or 0, to_timestamp(end) or float('inf')))
+        df.insert(0, 'date', pd.to_datetime(df['ts'], unit='s', utc=True))
+        return df
+
+    def trend(self, village=None, farmer_id=None, field_id=None, start=None, end=None, period='month'):
+        """Per-period averages for a village or one field, aggregated inside SQLite"""
+        if farmer_id is not None and field_id is not None:
+            where, params = "farmer_id = ? AND field_id = ?", [str(farmer_id), str(field_id)]
+        elif village is not None:
+            where, params = "village = ?", [village]
+        else:
+            raise ValueError("Give a village, or a farmer_id and field_id")
+        averages = ', '.join(f'AVG({name}) AS {name}' for name in ['N', 'P', 'K', 'ph', 'soil_health'])
+        return self.query(
+            f"SELECT {_period_sql(period)} AS period, COUNT(*) AS samples, "
+            f"COUNT(DISTINCT farmer_id || '/' || field_id) AS fields, {averages}, "
+            f"AVG(any_deficiency) AS deficiency_rate, "
+            f"SUM(severity = 'Severe') AS severe_samples "
+            f"FROM soil_samples WHERE {where} AND ts >= ? AND ts < ? GROUP BY period ORDER BY MIN(ts)",
+            params + [to_timestamp(start) or 0, to_timestamp(end) or float('inf')])
+
+    def villages(self):
+        return [row[0] for row in self._connect().execute(
+            "SELECT DISTINCT village FROM soil_samples WHERE village IS NOT NULL ORDER BY village")]
+
+    def fields(self, village=None):
+        """(farmer_id, field_id) pairs, optionally for one village"""
+        if village is None:
+            sql, params = "SELECT DISTINCT farmer_id, field_id FROM soil_samples", ()
+        else:
+            sql, params = "SELECT DISTINCT farmer_id, field_id FROM soil_samples WHERE village = ?", (village,)
+        return sorted(self._connect().execute(sql + " ORDER BY farmer_id, field_id", params).fetchall())
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM soil_samples").fetchone()[0]
+
+
+# One store per process, shared by every Streamlit session
+soil_history = SoilHistoryStore()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the Nutrify AI soil history")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    field_parser = subparsers.add_parser("field", help="Samples of one field")
+    field_parser.add_argument("farmer_id")
+    field_parser.add_argument("field_id")
+
+    village_parser = subparsers.add_parser("village", help="Trend of a whole village")
+    village_parser.add_argument("village")
+    village_parser.add_argument("--period", choices=list(PERIOD_FORMATS), default='month')
+
+    for sub in (field_parser, village_parser):
+        sub.add_argument("--start", help="ISO date, inclusive")
+        sub.add_argument("--end", help="ISO date, exclusive")
+    args = parser.parse_args()
+
+    store = SoilHistoryStore(args.db)
+    start = time.perf_counter()
+    if args.command == "field":
+        df = store.field_history(args.farmer_id, args.field_id, args.start, args.end).drop(columns='ts')
+    else:
+        df = store.trend(village=args.village, start=args.start, end=args.end, period=args.period)
+    elapsed = time.perf_counter() - start
+
+    with pd.option_context('display.width', 200, 'display.max_columns', 20):
+        print(df.to_string(index=False) if len(df) else "No samples")
+    print(f"\n{len(df):,} rows in {elapsed * 1000:.1f} ms ({store.count():,} samples stored)")
+
+
+if __name__ == "__main__":
+    main()
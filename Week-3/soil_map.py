@@ -0,0 +1,355 @@
+"""
+🗺️ Regional Soil Maps for Nutrify AI
+Interpolates georeferenced lab samples onto a regular grid (inverse distance
+weighting), scores every cell with the models in chunks, and cuts the layers
+into cached PNG map tiles
+
+NUTRIFY_TILE_CACHE_SIZE bounds the tile cache (default 512 tiles).
+
+Usage:
+    python soil_map.py build samples.csv [--output soil_map.npz] [--cell-km 0.1] [--max-km 10]
+    python soil_map.py tile soil_map.npz soil_health_score 11 1464 888 [--output tile.png]
+
+The samples CSV has lat and lon columns next to N,P,K,ph,temperature,humidity,rainfall.
+"""
+
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from feature_engineering import RAW_FEATURES, engineer_features, validate_raw_inputs
+from predictor import load_predictor, MODEL_PATH
+
+LAT_COLUMN = 'lat'
+LON_COLUMN = 'lon'
+HEALTH_LAYER = 'soil_health_score'
+
+DEFAULT_CELL_KM = 0.1
+DEFAULT_MAX_KM = 10.0
+IDW_POWER = 2.0
+# Cells interpolated and scored together; the distance matrix is cells x samples
+CHUNK_CELLS = 8192
+KM_PER_DEGREE = 111.32
+
+TILE_SIZE = 256
+MAX_ZOOM = 22
+TILE_CACHE_SIZE = int(os.getenv('NUTRIFY_TILE_CACHE_SIZE', '512'))
+# Deficiency layers hold 0/1; this marks cells too far from every sample
+NO_DATA = 255
+
+
+def idw_interpolate(points, values, targets, power=IDW_POWER, max_distance=None):
+    """Inverse distance weighted values at the target points
+
+    points (S, 2) and targets (C, 2) are in km, values is (S, k). Targets farther
+    than max_distance from every sample get NaN.
+    """
+    # float32 and in-place passes over the cells x samples matrix halve the memory traffic
+    targets, points = targets.astype(np.float32), points.astype(np.float32)
+    d2 = np.subtract.outer(targets[:, 0], points[:, 0])
+    np.square(d2, out=d2)
+    dy = np.subtract.outer(targets[:, 1], points[:, 1])
+    np.square(dy, out=dy)
+    d2 += dy
+    nearest = d2.min(axis=1)
+
+    # A cell on top of a sample takes (practically) its value
+    np.maximum(d2, 1e-12, out=d2)
+    weights = np.reciprocal(d2, out=d2) if power == 2 else np.power(d2, -power / 2, out=d2)
+    interpolated = (weights @ values.astype(np.float32)) / weights.sum(axis=1, keepdims=True)
+    interpolated = interpolated.astype(np.float64)
+    if max_distance is not None:
+        interpolated[nearest > max_distance ** 2] = np.nan
+    return interpolated
+
+
+class SoilMap:
+    """Model outputs on a regular lat/lon grid, one 2-D layer per target (row 0 is the northern edge)"""
+
+    def __init__(self, bounds, layers, meta=None):
+        self.bounds = tuple(float(b) for b in bounds)  # lat_min, lat_max, lon_min, lon_max
+        self.layers = layers
+        self.meta = meta or {}
+        self.shape = next(iter(layers.values())).shape
+        self._codes = {}
+
+    @classmethod
+    def build(cls, predictor, samples, cell_km=DEFAULT_CELL_KM, max_km=DEFAULT_MAX_KM,
+              power=IDW_POWER, chunk_cells=CHUNK_CELLS):
+        """Interpolate the samples' raw inputs onto the grid and score every cell
+
+        samples: DataFrame with lat, lon and the 7 raw input columns
+        """
+        lat, lon = samples[LAT_COLUMN].to_numpy(float), samples[LON_COLUMN].to_numpy(float)
+        raw = samples[RAW_FEATURES].to_numpy(float)
+
+        # Local equirectangular projection; distances are in km
+        lat_min, lat_max = lat.min(), lat.max()
+        lon_min, lon_max = lon.min(), lon.max()
+        km_per_lon = KM_PER_DEGREE * math.cos(math.radians((lat_min + lat_max) / 2))
+        rows = max(int(math.ceil((lat_max - lat_min) * KM_PER_DEGREE / cell_km)), 1)
+        cols = max(int(math.ceil((lon_max - lon_min) * km_per_lon / cell_km)), 1)
+        lat_max = lat_min + rows * cell_km / KM_PER_DEGREE
+        lon_max = lon_min + cols * cell_km / km_per_lon
+        points = np.column_stack([(lon - lon_min) * km_per_lon, (lat_max - lat) * KM_PER_DEGREE])
+
+        targets = list(predictor.models)
+        layers = {target_name: np.full(rows * cols, np.nan if target_name == HEALTH_LAYER else NO_DATA,
+                                       dtype=np.float32 if target_name == HEALTH_LAYER else np.uint8)
+                  for target_name in targets}
+        interpolate_seconds = predict_seconds = 0.0
+        scored = 0
+
+        for start in range(0, rows * cols, chunk_cells):
+            cells = np.arange(start, min(start + chunk_cells, rows * cols))
+            centers = np.column_stack([(cells % cols + 0.5) * cell_km, (cells // cols + 0.5) * cell_km])
+
+            began = time.perf_counter()
+            grid_raw = idw_interpolate(points, raw, centers, power, max_km)
+            covered = ~np.isnan(grid_raw[:, 0])
+            interpolate_seconds += time.perf_counter() - began
+            if not covered.any():
+                continue
+
+            began = time.perf_counter()
+            outputs = predictor.predict_targets(engineer_features(grid_raw[covered]), call='batch')
+            predict_seconds += time.perf_counter() - began
+            for target_name, values in outputs.items():
+                layers[target_name][cells[covered]] = values
+            scored += int(covered.sum())
+
+        meta = {
+            'samples': len(samples), 'cell_km': cell_km, 'max_km': max_km, 'power': power,
+            'cells': rows * cols, 'scored_cells': scored,
+            'interpolate_seconds': interpolate_seconds, 'predict_seconds': predict_seconds
+        }
+        return cls((lat_min, lat_max, lon_min, lon_max),
+                   {name: layer.reshape(rows, cols) for name, layer in layers.items()}, meta)
+
+    def save(self, path):
+        np.savez(path, meta=np.array(json.dumps({'bounds': self.bounds, **self.meta})), **self.layers)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            layers = {name: data[name] for name in data.files if name != 'meta'}
+        return cls(meta.pop('bounds'), layers, meta)
+
+    def summary(self):
+        """Per layer: cells with data and the deficient share (or mean soil health)"""
+        report = {}
+        for name, layer in self.layers.items():
+            if name == HEALTH_LAYER:
+                known = layer[~np.isnan(layer)]
+                report[name] = {'cells': int(known.size), 'mean': float(known.mean()) if known.size else None}
+            else:
+                known = layer[layer != NO_DATA]
+                report[name] = {'cells': int(known.size), 'deficient_share': float(known.mean()) if known.size else None}
+        return report
+
+    def codes(self, layer):
+        """The layer as palette indices (NO_DATA where empty), computed once per layer"""
+        codes = self._codes.get(layer)
+        if codes is None:
+            values = self.layers[layer]
+            if layer == HEALTH_LAYER:
+                codes = np.where(np.isnan(values), NO_DATA,
+                                 np.clip(np.nan_to_num(values) * 254, 0, 254).round()).astype(np.uint8)
+            else:
+                codes = values
+            self._codes[layer] = codes
+        return codes
+
+
+def _palette(layer):
+    """(256, 4) RGBA colors for a layer's codes; NO_DATA is transparent"""
+    palette = np.zeros((256, 4), dtype=np.uint8)
+    if layer == HEALTH_LAYER:
+        # Red (poor) through yellow to green (healthy)
+        share = np.linspace(0, 1, 255)
+        palette[:255, 0] = np.where(share < 0.5, 220, (1 - share) * 2 * 220)
+        palette[:255, 1] = np.where(share < 0.5, share * 2 * 200, 200)
+        palette[:255, 2] = 40
+        palette[:255, 3] = 170
+    else:
+        palette[0] = (46, 125, 50, 150)    # no deficiency
+        palette[1] = (198, 40, 40, 170)    # deficient
+    return palette
+
+
+def encode_png(codes, palette):
+    """Palette PNG of a 2-D uint8 array"""
+    height, width = codes.shape
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    scanlines = np.hstack([np.zeros((height, 1), dtype=np.uint8), codes]).tobytes()  # filter type 0 per row
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 3, 0, 0, 0))
+            + chunk(b'PLTE', palette[:, :3].tobytes())
+            + chunk(b'tRNS', palette[:, 3].tobytes())
+            + chunk(b'IDAT', zlib.compress(scanlines, 6))
+            + chunk(b'IEND', b''))
+
+
+def tile_pixel_coordinates(z, x, y):
+    """Latitude of each pixel row and longitude of each pixel column of a web map (z/x/y) tile"""
+    n = 2 ** z
+    offsets = (np.arange(TILE_SIZE) + 0.5) / TILE_SIZE
+    lons = (x + offsets) / n * 360.0 - 180.0
+    lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + offsets) / n))))
+    return lats, lons
+
+
+def render_tile(soil_map, layer, z, x, y):
+    """PNG bytes of one web map tile of a layer, nearest cell per pixel"""
+    if layer not in soil_map.layers:
+        raise KeyError(f"Unknown layer '{layer}' (use one of: {', '.join(soil_map.layers)})")
+    if not (0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise ValueError(f"No tile {z}/{x}/{y}")
+
+    lat_min, lat_max, lon_min, lon_max = soil_map.bounds
+    rows, cols = soil_map.shape
+    lats, lons = tile_pixel_coordinates(z, x, y)
+    # Rows and columns are separable, so the gather is one fancy index
+    row = np.floor((lat_max - lats) / (lat_max - lat_min) * rows).astype(np.intp)
+    col = np.floor((lons - lon_min) / (lon_max - lon_min) * cols).astype(np.intp)
+    row_ok, col_ok = (row >= 0) & (row < rows), (col >= 0) & (col < cols)
+
+    codes = np.full((TILE_SIZE, TILE_SIZE), NO_DATA, dtype=np.uint8)
+    if row_ok.any() and col_ok.any():
+        inside = np.ix_(row_ok, col_ok)
+        codes[inside] = soil_map.codes(layer)[np.ix_(row[row_ok], col[col_ok])]
+    return encode_png(codes, _palette(layer))
+
+
+class SoilMapTiles:
+    """Thread-safe LRU cache of rendered tiles, cleared whenever the map version changes"""
+
+    def __init__(self, maxsize=TILE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._map_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, soil_map, layer, z, x, y, map_version=None):
+        """PNG bytes of a tile, rendered on a miss"""
+        key = (layer, z, x, y)
+
+        with self._lock:
+            if map_version != self._map_version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._map_version = map_version
+
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Render outside the lock so other requests are not blocked
+        png = render_tile(soil_map, layer, z, x, y)
+
+        with self._lock:
+            if map_version == self._map_version:
+                self._entries[key] = png
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return png
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+# Shared by every request in the process
+soil_map_tiles = SoilMapTiles()
+
+
+def load_samples(path):
+    """Georeferenced lab samples from a CSV; rows with invalid inputs are dropped"""
+    import pandas as pd
+
+    samples = pd.read_csv(path)
+    missing = [c for c in [LAT_COLUMN, LON_COLUMN, *RAW_FEATURES] if c not in samples.columns]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+    valid, _ = validate_raw_inputs(samples[RAW_FEATURES])
+    valid &= samples[[LAT_COLUMN, LON_COLUMN]].notna().all(axis=1).to_numpy()
+    return samples[valid].reset_index(drop=True), int((~valid).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build regional soil maps and render their tiles")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Interpolate samples onto a grid and score every cell")
+    build.add_argument("samples", help="CSV with lat, lon and the 7 raw input columns")
+    build.add_argument("--output", default="soil_map.npz")
+    build.add_argument("--model", default=MODEL_PATH, help="Path to the saved predictor")
+    build.add_argument("--cell-km", type=float, default=DEFAULT_CELL_KM, help="Grid cell size in km")
+    build.add_argument("--max-km", type=float, default=DEFAULT_MAX_KM,
+                       help="Cells farther than this from every sample are left empty")
+    build.add_argument("--power", type=float, default=IDW_POWER, help="Inverse distance weighting power")
+
+    tile = subparsers.add_parser("tile", help="Render one z/x/y tile of a map layer to PNG")
+    tile.add_argument("map")
+    tile.add_argument("layer")
+    tile.add_argument("z", type=int)
+    tile.add_argument("x", type=int)
+    tile.add_argument("y", type=int)
+    tile.add_argument("--output", default="tile.png")
+    args = parser.parse_args()
+
+    if args.command == "tile":
+        with open(args.output, 'wb') as f:
+            f.write(render_tile(SoilMap.load(args.map), args.layer, args.z, args.x, args.y))
+        print(f"✅ {args.layer} {args.z}/{args.x}/{args.y} -> {args.output}")
+        return
+
+    samples, dropped = load_samples(args.samples)
+    print(f"🗺️ {len(samples):,} samples ({dropped:,} invalid dropped)")
+    soil_map = SoilMap.build(load_predictor(args.model), samples, args.cell_km, args.max_km, args.power)
+    soil_map.save(args.output)
+
+    meta = soil_map.meta
+    print(f"Grid {soil_map.shape[0]:,} x {soil_map.shape[1]:,} = {meta['cells']:,} cells "
+          f"({meta['scored_cells']:,} within {args.max_km:g} km of a sample)")
+    print(f"Interpolation {meta['cells'] / max(meta['interpolate_seconds'], 1e-9):,.0f} cells/sec, "
+          f"models {meta['scored_cells'] / max(meta['predict_seconds'], 1e-9):,.0f} cells/sec")
+    for name, result in soil_map.summary().items():
+        print(f"{name:22}: {result}")
+    print(f"✅ Map -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+⏱️ Startup Profiling for Nutrify AI
+Lazy imports with per-phase timing, and a cold-start report for regressions
+
+Usage: python startup_profile.py [--json startup.json]
+"""
+
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+WEEK3_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Heavy modules and the page that first needs them
+HEAVY_MODULES = {
+    'pandas': 'Soil Analysis / Bulk / Analytics',
+    'numpy': 'Soil Analysis / Bulk',
+    'plotly.graph_objects': 'Visualizations tab',
+    'plotly.subplots': 'Visualizations tab',
+    'joblib': 'model loading',
+    'sklearn.ensemble': 'model loading'
+}
+
+
+class StartupProfiler:
+    """Records each import and setup phase the first time it happens in this process"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def _record(self, kind, name, seconds):
+        with self._lock:
+            if (kind, name) in self._seen:
+                return
+            self._seen.add((kind, name))
+            self.phases.append({
+                'kind': kind,
+                'name': name,
+                'seconds': seconds,
+                'at_seconds': time.perf_counter() - self.started
+            })
+
+    def lazy_import(self, module_name):
+        """Import a module on first use, timing the cold import"""
+        module = sys.modules.get(module_name)
+        if module is not None:
+            return module
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        self._record('import', module_name, time.perf_counter() - start)
+        return module
+
+    @contextmanager
+    def phase(self, name):
+        """Time a setup phase; only the first (cold) run is kept"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record('phase', name, time.perf_counter() - start)
+
+    def report(self):
+        with self._lock:
+            return list(self.phases)
+
+
+# One profiler per process; the first Streamlit run is the cold start
+profiler = StartupProfiler()
+
+
+def _time_in_fresh_interpreter(code):
+    """Seconds reported by a snippet run in a new Python process"""
+    output = subprocess.run([sys.executable, '-c', code], cwd=WEEK3_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def cold_start_report():
+    """Cold import and model load timings, each measured in a fresh interpreter"""
+    timer = "import time; _t = time.perf_counter(); {}; print(time.perf_counter() - _t)"
+    report = {'python': sys.version.split()[0], 'phases': {}}
+
+    report['phases']['import streamlit'] = _time_in_fresh_interpreter(timer.format('import streamlit'))
+    # app.py only imports streamlit and light modules at the top; pages pull in the rest
+    report['phases']['import app'] = _time_in_fresh_interpreter(
+        "import streamlit, time; _t = time.perf_counter(); import app; print(time.perf_counter() - _t)")
+    for module_name in HEAVY_MODULES:
+        report['phases'][f'import {module_name}'] = _time_in_fresh_interpreter(
+            timer.format(f'import {module_name}'))
+
+    from predictor import MODEL_PATH
+    if os.path.exists(MODEL_PATH):
+        report['phases']['load predictor (incl. sklearn import)'] = _time_in_fresh_interpreter(
+            "import time; from predictor import load_predictor, MODEL_PATH; "
+            "_t = time.perf_counter(); load_predictor(MODEL_PATH); print(time.perf_counter() - _t)")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Nutrify AI cold-start phases")
+    parser.add_argument("--json", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = cold_start_report()
+    for name, seconds in report['phases'].items():
+        print(f"{name:42} {seconds * 1000:9.1f} ms")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+"""
+🏋️ Headless Training Pipeline for Nutrify AI
+The Week 2 notebook's training, with target x algorithm fits run in parallel
+across a process pool and the train/test splits cached on disk
+
+Usage: python train.py [--data WEEK-1/soil_nutrition_features.csv] [--workers 4] [--output-dir DIR]
+                       [--multi-output]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor, GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import (accuracy_score, f1_score, precision_score, recall_score,
+                             r2_score, mean_absolute_error, mean_squared_error)
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+from sklearn.utils.class_weight import compute_class_weight
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from feature_engineering import RAW_FEATURES, FEATURE_NAMES, build_training_features
+from predictor import (CompleteSustainableAgriculturePredictor, MultiOutputAgriculturePredictor,
+                       MODEL_DIR, MODEL_PATHS)
+
+TRAINING_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "WEEK-1", "soil_nutrition_features.csv")
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "nutrify_train_cache")
+# Untracked, so a plain run never overwrites the committed Week 2 artifacts; pass
+# --output-dir MODEL_DIR to deploy a run to the app
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+
+TARGETS = ['any_deficiency', 'zinc_deficiency', 'iron_deficiency', 'multiple_deficiency', 'soil_health_score']
+REGRESSION_TARGETS = {'soil_health_score'}
+
+# Optional single forest over the deficiency targets, split without stratification or
+# feature scaling; soil_health_score is an engineered feature, so it is read, not learned
+MULTI_OUTPUT = 'multi_output'
+MULTI_OUTPUT_ALGORITHM = 'Multi-output Random Forest'
+UNSCALED_SPLITS = REGRESSION_TARGETS | {MULTI_OUTPUT}
+
+# Candidates in the notebook's comparison order; on equal F1 the earlier one wins
+CLASSIFIERS = ['Random Forest', 'Gradient Boosting', 'Logistic Regression']
+MIN_POSITIVE_CASES = 10
+
+
+def build_classifier(name, class_weight, seed):
+    if name == 'Random Forest':
+        return RandomForestClassifier(n_estimators=100, max_depth=10, class_weight=class_weight, random_state=seed)
+    if name == 'Gradient Boosting':
+        return GradientBoostingClassifier(n_estimators=100, learning_rate=0.1, random_state=seed)
+    return LogisticRegression(class_weight=class_weight, random_state=seed, max_iter=1000)
+
+
+def load_training_frame(path):
+    """Training data with features and targets; raw lab CSVs are feature-engineered first"""
+    df = pd.read_csv(path)
+    if all(column in df.columns for column in FEATURE_NAMES + TARGETS):
+        return df, False
+    missing = [c for c in RAW_FEATURES if c not in df.columns]
+    if missing:
+        raise ValueError(f"Training data is missing columns: {', '.join(missing)}")
+    return build_training_features(df[RAW_FEATURES]), True
+
+
+class SplitCache:
+    """Per-target train/test splits (scaled for classifiers), computed once and read by every worker"""
+
+    def __init__(self, cache_dir, data_key, test_size=0.2, seed=42):
+        self.directory = os.path.join(cache_dir, data_key)
+        self.test_size = test_size
+        self.seed = seed
+
+    def path(self, target_name):
+        return os.path.join(self.directory, f"{target_name}_{self.test_size}_{self.seed}.npz")
+
+    def scaler_path(self, target_name):
+        return self.path(target_name)[:-len('.npz')] + "_scaler.joblib"
+
+    def ensure(self, X, y, target_name):
+        """Write the target's split unless it is cached; returns True on a cache hit"""
+        if os.path.exists(self.path(target_name)):
+            return True
+        os.makedirs(self.directory, exist_ok=True)
+
+        if target_name in UNSCALED_SPLITS:
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=self.test_size, random_state=self.seed)
+            scaler = None
+        else:
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=self.test_size, random_state=self.seed, stratify=y)
+            scaler = StandardScaler()
+            X_train = scaler.fit_transform(X_train)
+            X_test = scaler.transform(X_test)
+
+        # Written under a temporary name so an interrupted run never leaves a partial split
+        temp_path = self.path(target_name) + ".tmp.npz"
+        np.savez(temp_path, X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test)
+        dump_atomic(scaler, self.scaler_path(target_name))
+        os.replace(temp_path, self.path(target_name))
+        return False
+
+    def load(self, target_name):
+        with np.load(self.path(target_name)) as split:
+            return {name: split[name] for name in split.files}
+
+    def load_scaler(self, target_name):
+        return joblib.load(self.scaler_path(target_name))
+
+
+def data_cache_key(path):
+    """Content hash of the training file, so edited data never reuses stale splits"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def algorithm_targets(algorithm):
+    """Targets of a multi-output task, carried in its algorithm label after the colon"""
+    return algorithm.split(':', 1)[1].split(',')
+
+
+def fit_candidate(task):
+    """Fit one target x algorithm combination (runs in a worker process)"""
+    cache, target_name, algorithm = task
+    split = cache.load(target_name)
+    start = time.perf_counter()
+
+    if target_name == MULTI_OUTPUT:
+        # Binary targets are regressed as standardized 0/1 values, so rare ones weigh
+        # as much as common ones in the shared splits
+        target_scaler = StandardScaler().fit(split['y_train'])
+        forest = RandomForestRegressor(n_estimators=100, random_state=cache.seed)
+        forest.fit(split['X_train'], target_scaler.transform(split['y_train']))
+        model = (forest, target_scaler)
+        y_pred = target_scaler.inverse_transform(forest.predict(split['X_test']))
+        metrics = {}
+        for i, output_name in enumerate(algorithm_targets(algorithm)):
+            y_true = split['y_test'][:, i]
+            labels = (y_pred[:, i] > 0.5).astype(int)
+            metrics[output_name] = {
+                'type': 'classification',
+                'best_model': MULTI_OUTPUT_ALGORITHM,
+                'accuracy': accuracy_score(y_true, labels),
+                'f1_score': f1_score(y_true, labels, average='weighted')
+            }
+    elif target_name in REGRESSION_TARGETS:
+        model = RandomForestRegressor(n_estimators=100, random_state=cache.seed)
+        model.fit(split['X_train'], split['y_train'])
+        y_pred = model.predict(split['X_test'])
+        metrics = {
+            'type': 'regression',
+            'r2_score': r2_score(split['y_test'], y_pred),
+            'mae': mean_absolute_error(split['y_test'], y_pred),
+            'rmse': float(np.sqrt(mean_squared_error(split['y_test'], y_pred)))
+        }
+    else:
+        # Class imbalance handling, as in the notebook
+        classes = np.unique(split['y_train'])
+        class_weight = dict(zip(classes, compute_class_weight('balanced', classes=classes, y=split['y_train'])))
+        model = build_classifier(algorithm, class_weight, cache.seed)
+        model.fit(split['X_train'], split['y_train'])
+        y_pred = model.predict(split['X_test'])
+        metrics = {
+            'type': 'classification',
+            'best_model': algorithm,
+            'accuracy': accuracy_score(split['y_test'], y_pred),
+            'f1_score': f1_score(split['y_test'], y_pred, average='weighted'),
+            'precision': precision_score(split['y_test'], y_pred, average='weighted', zero_division=0),
+            'recall': recall_score(split['y_test'], y_pred, average='weighted', zero_division=0)
+        }
+
+    return target_name, algorithm, model, metrics, time.perf_counter() - start
+
+
+def train(data_path=TRAINING_DATA_PATH, workers=None, cache_dir=DEFAULT_CACHE_DIR, seed=42, log=print,
+          multi_output=False):
+    """Train every target; returns (predictor, multi-output predictor or None, training DataFrame, stage timings)"""
+    timings = {}
+    total_start = start = time.perf_counter()
+
+    df, engineered = load_training_frame(data_path)
+    timings['load_data_seconds'] = time.perf_counter() - start
+    log(f"📊 {len(df):,} samples from {os.path.basename(data_path)}"
+        f"{' (features engineered from raw inputs)' if engineered else ''}")
+
+    # Splits and scalers: once per target, shared by all of its candidate algorithms
+    start = time.perf_counter()
+    X = df[FEATURE_NAMES].values
+    cache = SplitCache(cache_dir, data_cache_key(data_path), seed=seed)
+    tasks, skipped, cache_hits = [], [], 0
+    for target_name in TARGETS:
+        y = df[target_name].values
+        if target_name not in REGRESSION_TARGETS and y.sum() < MIN_POSITIVE_CASES:
+            skipped.append(target_name)
+            log(f"   ⚠️  {target_name}: only {int(y.sum())} positive cases, skipped")
+            continue
+        cache_hits += cache.ensure(X, y, target_name)
+        algorithms = ['Random Forest Regressor'] if target_name in REGRESSION_TARGETS else CLASSIFIERS
+        tasks.extend((cache, target_name, algorithm) for algorithm in algorithms)
+
+    forest_targets = [t for t in TARGETS if t not in skipped and t not in REGRESSION_TARGETS]
+    if multi_output:
+        cache_hits += cache.ensure(X, df[forest_targets].values.astype(float), MULTI_OUTPUT)
+        tasks.append((cache, MULTI_OUTPUT, f"{MULTI_OUTPUT_ALGORITHM}:{','.join(forest_targets)}"))
+    timings['splits_seconds'] = time.perf_counter() - start
+    timings['split_cache_hits'] = cache_hits
+
+    # Slowest fits first so the pool's tail stays short
+    order = {MULTI_OUTPUT_ALGORITHM: 0, 'Gradient Boosting': 1, 'Random Forest': 2,
+             'Random Forest Regressor': 2, 'Logistic Regression': 3}
+    tasks.sort(key=lambda task: order[task[2].split(':')[0]])
+
+    workers = workers or os.cpu_count() or 1
+    log(f"🚀 Fitting {len(tasks)} target x algorithm combinations on {workers} worker(s)")
+    start = time.perf_counter()
+    if workers == 1:
+        fitted = [fit_candidate(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fitted = list(pool.map(fit_candidate, tasks))
+    timings['fit_seconds'] = time.perf_counter() - start
+    timings['fit_seconds_by_model'] = {f"{target_name} / {algorithm.split(':')[0]}": seconds
+                                       for target_name, algorithm, _, _, seconds in fitted}
+
+    # Best candidate per target by weighted F1, in the notebook's comparison order
+    start = time.perf_counter()
+    candidates = {}
+    for target_name, algorithm, model, metrics, _ in fitted:
+        candidates.setdefault(target_name, {})[algorithm] = (model, metrics)
+
+    predictor, multi = CompleteSustainableAgriculturePredictor(), None
+    if multi_output:
+        ((forest, target_scaler), multi_metrics), = candidates.pop(MULTI_OUTPUT).values()
+        derived = {'soil_health_score': FEATURE_NAMES.index('soil_health_score')}
+        multi = MultiOutputAgriculturePredictor(forest, forest_targets, forest_targets,
+                                                target_scaler.mean_, target_scaler.scale_, derived)
+        y_true, y_pred = df['soil_health_score'].values, X[:, derived['soil_health_score']]
+        multi_metrics['soil_health_score'] = {
+            'type': 'derived',
+            'r2_score': r2_score(y_true, y_pred),
+            'mae': mean_absolute_error(y_true, y_pred),
+            'rmse': float(np.sqrt(mean_squared_error(y_true, y_pred)))
+        }
+        multi.results = multi_metrics
+        multi.feature_importance[MULTI_OUTPUT] = forest.feature_importances_
+
+    for target_name in TARGETS:
+        if target_name not in candidates:
+            continue
+        if target_name in REGRESSION_TARGETS:
+            model, metrics = candidates[target_name]['Random Forest Regressor']
+            scaler = None
+        else:
+            best_name = max(CLASSIFIERS, key=lambda algorithm: candidates[target_name][algorithm][1]['f1_score'])
+            model, metrics = candidates[target_name][best_name]
+            scaler = cache.load_scaler(target_name)
+            for algorithm in CLASSIFIERS:
+                log(f"   {target_name:20} {algorithm:20} F1 = {candidates[target_name][algorithm][1]['f1_score']:.3f}"
+                    f"{' ✅' if algorithm == best_name else ''}")
+
+        predictor.models[target_name] = model
+        predictor.scalers[target_name] = scaler
+        predictor.results[target_name] = metrics
+        if hasattr(model, 'feature_importances_'):
+            predictor.feature_importance[target_name] = model.feature_importances_
+    timings['select_seconds'] = time.perf_counter() - start
+    timings['total_seconds'] = time.perf_counter() - total_start
+    timings['workers'] = workers
+    timings['skipped_targets'] = skipped
+
+    return predictor, multi, df, timings
+
+
+def dump_atomic(obj, path):
+    """joblib.dump under a temporary name, then swapped in; a reloading app never sees half a model"""
+    temp_path = path + ".tmp"
+    joblib.dump(obj, temp_path)
+    os.replace(temp_path, path)
+
+
+def write_json_atomic(data, path):
+    """json.dump the same way; the model registry hot-reloads the feature config"""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def save_artifacts(predictor, df, timings, output_dir=DEFAULT_OUTPUT_DIR, multi=None):
+    """Write the predictor and config JSONs in the Week 2 notebook's layout"""
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+
+    predictor_file = os.path.join(output_dir, os.path.basename(MODEL_PATHS['per_target']))
+    dump_atomic(predictor, predictor_file)
+    if multi is not None:
+        dump_atomic(multi, os.path.join(output_dir, os.path.basename(MODEL_PATHS['multi_output'])))
+
+    feature_config = {
+        'feature_names': FEATURE_NAMES,
+        'feature_count': len(FEATURE_NAMES),
+        'target_variables': [t for t in TARGETS if t in df.columns],
+        'model_count': len(predictor.models),
+        'feature_importance_available': bool(predictor.feature_importance),
+        'complete_functionality': True
+    }
+    write_json_atomic(feature_config, os.path.join(output_dir, "complete_feature_config.json"))
+
+    rate = lambda column: df[column].mean() * 100
+    system_config = {
+        'system_info': {
+            'name': 'Complete Sustainable Agriculture AI System',
+            'version': '2.0 - Complete Functionality',
+            'theme': 'Complete chemical-free organic solutions for Indian farmers',
+            'created_date': datetime.now().isoformat(),
+            'training_samples': len(df),
+            'features': FEATURE_NAMES,
+            'targets': list(predictor.models.keys()),
+            'all_functionality_preserved': True
+        },
+        'complete_model_performance': predictor.results,
+        **({'multi_output_model_performance': multi.results} if multi is not None else {}),
+        'complete_organic_treatments': {
+            'categories': len(predictor.organic_treatments),
+            'total_solutions': sum(len(t['solutions']) for t in predictor.organic_treatments.values()),
+            'cost_range': '₹500-15,000/acre',
+            'sustainability_focus': '95-100% organic solutions',
+            'all_treatments_included': True
+        },
+        'complete_agricultural_impact': {
+            'deficiency_detection_rate': f"{rate('any_deficiency'):.1f}%",
+            'zinc_deficiency_rate': f"{rate('zinc_deficiency'):.1f}%",
+            'iron_deficiency_rate': f"{rate('iron_deficiency'):.1f}%",
+            'multiple_deficiency_rate': f"{rate('multiple_deficiency'):.1f}%",
+            'soil_health_average': f"{df['soil_health_score'].mean():.3f}",
+            'farmers_impacted_per_100k': int(rate('any_deficiency') * 1000),
+            'expected_benefits': {
+                'chemical_reduction': '40-60%',
+                'nutrition_improvement': '25-35%',
+                'income_increase': '15-30%',
+                'soil_health_improvement': '20-40%',
+                'sustainability_increase': '95-100%'
+            }
+        },
+        'complete_deployment_ready': {
+            'model_persistence': True,
+            'feature_scaling': True,
+            'error_handling': True,
+            'batch_processing': True,
+            'real_time_prediction': True,
+            'severity_classification': True,
+            'treatment_recommendation': True,
+            'all_functionality_ready': True
+        }
+    }
+
+    timings['save_seconds'] = time.perf_counter() - start
+    timings['total_seconds'] += timings['save_seconds']
+    system_config['training_timings'] = timings
+    write_json_atomic(system_config, os.path.join(output_dir, "complete_system_config.json"))
+    return predictor_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the Nutrify AI models")
+    parser.add_argument("--data", default=TRAINING_DATA_PATH,
+                        help="Feature CSV (Week 1 layout) or raw lab CSV with N,P,K,ph,temperature,humidity,rainfall")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR,
+                        help=f"Where the predictor and configs are written (the app loads {MODEL_DIR})")
+    parser.add_argument("--workers", type=int, default=None, help="Training processes (default: all CPUs)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Cached train/test splits")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--multi-output", action="store_true",
+                        help="Also train one forest over all targets (NUTRIFY_MODEL_LAYOUT=multi_output)")
+    args = parser.parse_args()
+
+    predictor, multi, df, timings = train(args.data, args.workers, args.cache_dir, args.seed,
+                                          multi_output=args.multi_output)
+    predictor_file = save_artifacts(predictor, df, timings, args.output_dir, multi)
+
+    print(f"\n✅ {len(predictor.models)} models -> {predictor_file}")
+    if multi is not None:
+        print(f"✅ Multi-output forest ({len(multi.models)} targets) -> "
+              f"{os.path.join(args.output_dir, os.path.basename(MODEL_PATHS['multi_output']))}")
+    for stage in ('load_data', 'splits', 'fit', 'select', 'save', 'total'):
+        print(f"   {stage:10} {timings[f'{stage}_seconds']:8.2f}s")
+    print(f"   split cache hits: {timings['split_cache_hits']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,132 +1,145 @@
 """
 🌐 Simple Multi-lingual Support for Nutrify AI
+Per-language catalogs in locales/<code>.json, loaded on first use into a
+read-only cache shared by every session
+
+Adding a language: put its file in locales/ and its name in locales/languages.json.
+
+Usage: python translations.py [--language Hindi] [--page results]
 """
 
+import argparse
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'locales')
+DEFAULT_LANGUAGE = "English"
+
+_EMPTY = MappingProxyType({})
+
+
+class Catalog:
+    """One language's texts, compiled over the default language so every lookup is a single dict hit"""
+
+    def __init__(self, language, pages, treatments=None, base=None):
+        self.language = language
+        compiled_pages = {}
+        for name in dict.fromkeys([*(base.pages if base else ()), *pages]):
+            texts = dict(base.pages.get(name, _EMPTY)) if base else {}
+            texts.update(pages.get(name, {}))
+            compiled_pages[name] = MappingProxyType(texts)
+        self.pages = MappingProxyType(compiled_pages)
+        self.texts = MappingProxyType({key: text for texts in compiled_pages.values() for key, text in texts.items()})
+        self.treatments = MappingProxyType({
+            concern: MappingProxyType({**treatment, 'solutions': tuple(treatment['solutions'])})
+            for concern, treatment in (treatments or {}).items()
+        })
+
+    def get(self, key):
+        return self.texts.get(key, key)
+
+    def page(self, name):
+        """Read-only texts of one page, looked up once per render"""
+        return self.pages.get(name, self.texts)
+
+    def treatment(self, concern):
+        """Translated title, solutions, cost and timeline of a treatment, or None to keep the predictor's"""
+        return self.treatments.get(concern)
+
+
+_languages = None
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def available_languages():
+    """Language name -> catalog code, from locales/languages.json (catalogs themselves stay unloaded)"""
+    global _languages
+    if _languages is None:
+        with open(os.path.join(LOCALES_DIR, 'languages.json'), encoding='utf-8') as f:
+            _languages = MappingProxyType(json.load(f))
+    return _languages
+
+
+def get_catalog(language=DEFAULT_LANGUAGE):
+    """The process-wide catalog of a language, read from disk the first time any session asks for it"""
+    # After the first load this is one dict lookup without the lock
+    catalog = _catalogs.get(language)
+    if catalog is not None:
+        return catalog
+    code = available_languages().get(language)
+    if code is None:
+        return get_catalog(DEFAULT_LANGUAGE)
+    base = None if language == DEFAULT_LANGUAGE else get_catalog(DEFAULT_LANGUAGE)
+    with _catalogs_lock:
+        if language not in _catalogs:
+            with open(os.path.join(LOCALES_DIR, f'{code}.json'), encoding='utf-8') as f:
+                data = json.load(f)
+            _catalogs[language] = Catalog(language, data.get('pages', {}), data.get('treatments'), base)
+        return _catalogs[language]
+
+
+def loaded_languages():
+    return list(_catalogs)
+
+
 class TranslationManager:
-    def __init__(self):
-        self.current_language = "English"
-        self.translations = {
-            "English": {
-                "welcome": "Welcome to Nutrify AI",
-                "soil_analysis": "Soil Analysis",
-                "ai_assistant": "AI Assistant",
-                "analytics": "Analytics",
-                "select_language": "Select Language",
-                "enter_soil_params": "Enter Soil Parameters",
-                "analyze_soil": "Analyze Soil",
-                "nitrogen": "Nitrogen (N) - kg/hectare",
-                "phosphorus": "Phosphorus (P) - kg/hectare",
-                "potassium": "Potassium (K) - kg/hectare",
-                "ph_level": "pH Level",
-                "temperature": "Temperature (°C)",
-                "humidity": "Humidity (%)",
-                "rainfall": "Rainfall (mm)",
-                "deficiency_analysis": "Deficiency Analysis",
-                "treatment_plan": "Treatment Plan",
-                "visualizations": "Visualizations",
-                "soil_health_score": "Soil Health Score",
-                "status": "Status",
-                "excellent": "Excellent",
-                "good": "Good",
-                "fair": "Fair",
-                "poor": "Poor",
-                "normal": "Normal",
-                "detected": "DETECTED",
-                "primary_issue": "Primary Issue",
-                "severity": "Severity",
-                "timeline": "Timeline",
-                "cost": "Cost",
-                "sustainability": "Sustainability",
-                "recommended_solutions": "Recommended Organic Solutions",
-                "npk_levels": "NPK Levels",
-                "ph_analysis": "pH Analysis",
-                "environmental_factors": "Environmental Factors",
-                "chat_with_ai": "Chat with Nutrify AI",
-                "ask_questions": "Ask questions about soil health, farming practices, or get personalized advice!",
-                "ask_placeholder": "Ask about soil health, farming, or treatments...",
-                "thinking": "Thinking...",
-                "system_performance": "System Performance",
-                "overall_accuracy": "Overall Accuracy",
-                "deficiency_detection": "Deficiency Detection",
-                "organic_solutions": "Organic Solutions",
-                "farmers_helped": "Farmers Helped",
-                "agricultural_impact": "Agricultural Impact",
-                "deficiency_rate": "Deficiency Rate",
-                "zinc_deficiency": "Zinc Deficiency",
-                "iron_deficiency": "Iron Deficiency",
-                "multiple_deficiencies": "Multiple Deficiencies",
-                "soil_health_average": "Soil Health Average",
-                "impact": "Impact",
-                "high": "High",
-                "critical": "Critical",
-                "moderate": "Moderate",
-                "severe": "Severe",
-                "fair": "Fair"
-            },
-            "Hindi": {
-                "welcome": "न्यूट्रिफाई AI में आपका स्वागत है",
-                "soil_analysis": "मिट्टी विश्लेषण",
-                "ai_assistant": "AI सहायक",
-                "analytics": "विश्लेषण",
-                "select_language": "भाषा चुनें",
-                "enter_soil_params": "मिट्टी के मापदंड दर्ज करें",
-                "analyze_soil": "मिट्टी का विश्लेषण करें",
-                "nitrogen": "नाइट्रोजन (N) - किलो/हेक्टेयर",
-                "phosphorus": "फॉस्फोरस (P) - किलो/हेक्टेयर",
-                "potassium": "पोटैशियम (K) - किलो/हेक्टेयर",
-                "ph_level": "pH स्तर",
-                "temperature": "तापमान (°C)",
-                "humidity": "आर्द्रता (%)",
-                "rainfall": "वर्षा (मिमी)",
-                "deficiency_analysis": "कमी का पता लगाना",
-                "treatment_plan": "उपचार योजना",
-                "visualizations": "विज़ुअलाइज़ेशन",
-                "soil_health_score": "मिट्टी स्वास्थ्य स्कोर",
-                "status": "स्थिति",
-                "excellent": "उत्कृष्ट",
-                "good": "अच्छा",
-                "fair": "ठीक",
-                "poor": "खराब",
-                "normal": "सामान्य",
-                "detected": "पता चला",
-                "primary_issue": "मुख्य समस्या",
-                "severity": "गंभीरता",
-                "timeline": "समयसीमा",
-                "cost": "लागत",
-                "sustainability": "सततता",
-                "recommended_solutions": "अनुशंसित जैविक समाधान",
-                "npk_levels": "NPK स्तर",
-                "ph_analysis": "pH विश्लेषण",
-                "environmental_factors": "पर्यावरणीय कारक",
-                "chat_with_ai": "न्यूट्रिफाई AI के साथ चैट करें",
-                "ask_questions": "मिट्टी के स्वास्थ्य, खेती की प्रथाओं, या व्यक्तिगत सलाह के बारे में प्रश्न पूछें!",
-                "ask_placeholder": "मिट्टी के स्वास्थ्य, खेती, या उपचारों के बारे में पूछें...",
-                "thinking": "सोच रहा है...",
-                "system_performance": "सिस्टम प्रदर्शन",
-                "overall_accuracy": "समग्र सटीकता",
-                "deficiency_detection": "कमी का पता लगाना",
-                "organic_solutions": "जैविक समाधान",
-                "farmers_helped": "किसानों की मदद",
-                "agricultural_impact": "कृषि प्रभाव",
-                "deficiency_rate": "कमी दर",
-                "zinc_deficiency": "जिंक की कमी",
-                "iron_deficiency": "आयरन की कमी",
-                "multiple_deficiencies": "बहुविध कमी",
-                "soil_health_average": "मिट्टी स्वास्थ्य औसत",
-                "impact": "प्रभाव",
-                "high": "उच्च",
-                "critical": "महत्वपूर्ण",
-                "moderate": "मध्यम",
-                "severe": "गंभीर",
-                "fair": "ठीक"
-            }
-        }
-    
+    """A session's language choice; switching only points at another shared catalog"""
+
+    def __init__(self, language=DEFAULT_LANGUAGE):
+        self.current_language = DEFAULT_LANGUAGE
+        self.catalog = get_catalog(DEFAULT_LANGUAGE)
+        self.set_language(language)
+
+    @property
+    def languages(self):
+        return list(available_languages())
+
     def set_language(self, language: str):
         """Set the current language"""
-        if language in self.translations:
+        if language != self.current_language and language in available_languages():
             self.current_language = language
-    
+            self.catalog = get_catalog(language)
+
     def get_text(self, key: str) -> str:
         """Get translated text for the current language"""
-        return self.translations[self.current_language].get(key, key)
+        return self.catalog.texts.get(key, key)
+
+    def page(self, name):
+        """Texts of one page in the current language"""
+        return self.catalog.page(name)
+
+    def treatment(self, concern):
+        return self.catalog.treatment(concern)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load a translation catalog and time its lookups")
+    parser.add_argument("--language", default="Hindi", choices=list(available_languages()))
+    parser.add_argument("--page", default="results")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manager = TranslationManager(args.language)
+    loaded = time.perf_counter() - start
+
+    start = time.perf_counter()
+    switches = 10000
+    for i in range(switches):
+        manager.set_language(DEFAULT_LANGUAGE if i % 2 else args.language)
+    switch_ns = (time.perf_counter() - start) / switches * 1e9
+
+    manager.set_language(args.language)
+    texts = manager.page(args.page)
+    for key in list(texts)[:8]:
+        print(f"{key:24} {texts[key]}")
+    print(f"\nLoaded {', '.join(loaded_languages())} in {loaded * 1000:.1f} ms "
+          f"({len(manager.catalog.texts)} texts, {len(manager.catalog.treatments)} treatments); "
+          f"language switch {switch_ns:.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+🌲 Compiled Tree Inference Engine for Nutrify AI
+Flattens the saved RandomForest/GradientBoosting models into contiguous NumPy
+node arrays and scores all targets in a single vectorized pass
+
+Usage:
+    python tree_engine.py export [--model PATH] [--output PATH]
+    python tree_engine.py check [--model PATH] [--engine PATH] [--rows 10000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from predictor import load_predictor, MODEL_DIR, MODEL_PATH
+
+ENGINE_PATH = os.path.join(MODEL_DIR, "complete_agriculture_predictor_trees.npz")
+
+# Rows walked together in one block of a batch prediction
+BLOCK_ROWS = 256
+# Above about 1,200 rows sklearn's compiled tree walk beats the NumPy one on the
+# 500-tree model (benchmarks/bench_tree_engine.py prints the crossover), so
+# predict_batch only hands the engine batches up to this size
+MAX_BATCH_ROWS = 1000
+
+# Per-target model kinds the engine knows how to evaluate
+RF_CLASSIFIER = 'rf_classifier'
+GB_CLASSIFIER = 'gb_classifier'
+RF_REGRESSOR = 'rf_regressor'
+LINEAR_CLASSIFIER = 'linear_classifier'
+
+
+def _tree_arrays(tree, node_offset, value_fn):
+    """Flatten one fitted sklearn tree, with node ids shifted by node_offset"""
+    t = tree.tree_
+    is_leaf = t.children_left == -1
+    own_ids = np.arange(t.node_count) + node_offset
+
+    # Leaves point at themselves so every tree can be walked a fixed number of steps
+    left = np.where(is_leaf, own_ids, t.children_left + node_offset)
+    right = np.where(is_leaf, own_ids, t.children_right + node_offset)
+    feature = np.where(is_leaf, 0, t.feature)
+    threshold = np.where(is_leaf, 0.0, t.threshold)
+    return feature, threshold, np.column_stack([left, right]), value_fn(t.value)
+
+
+def _model_kind(model):
+    name = type(model).__name__
+    if name in ('RandomForestClassifier', 'ExtraTreesClassifier'):
+        return RF_CLASSIFIER
+    if name == 'GradientBoostingClassifier':
+        return GB_CLASSIFIER
+    if name in ('RandomForestRegressor', 'ExtraTreesRegressor'):
+        return RF_REGRESSOR
+    if name == 'LogisticRegression':
+        return LINEAR_CLASSIFIER
+    raise ValueError(f"Unsupported model type for compilation: {name}")
+
+
+def _normalized_proba(value):
+    """Leaf class fractions, normalized the way DecisionTreeClassifier.predict_proba does"""
+    proba = value[:, 0, :].astype(np.float64)
+    normalizer = proba.sum(axis=1, keepdims=True)
+    normalizer[normalizer == 0.0] = 1.0
+    return proba / normalizer
+
+
+def floor_float32(values):
+    """Largest float32 at or below each value, so float32 inputs compare exactly as against float64"""
+    values = np.asarray(values, dtype=np.float64)
+    rounded = values.astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+def walk_tables(arrays, n_features, compact=False):
+    """The per-node tables the tree walk gathers from
+
+    compact: int32 node ids and float32 thresholds (as mmap_artifact stores them) instead
+    of intp and float64. Leaf values stay float64: float32 ones move a few soil health
+    scores across the 0.4/0.6 plan thresholds.
+    """
+    index_dtype = np.int32 if compact else np.intp
+    tree_input = arrays['tree_input'].astype(np.intp)
+    tree_sizes = np.diff(np.append(arrays['tree_root'], len(arrays['feature'])))
+    node_input = np.repeat(tree_input, tree_sizes)
+    threshold = floor_float32(arrays['threshold']) if compact else arrays['threshold']
+
+    # Nodes are addressed by doubled ids so a child is children[node + go_right]
+    # without a multiply, and each node's column already says which target's
+    # scaled copy of the row it reads
+    return {
+        'input_column': np.repeat(node_input * n_features + arrays['feature'], 2).astype(index_dtype),
+        'threshold': np.repeat(threshold, 2),
+        'children': (2 * arrays['children'].reshape(-1)).astype(index_dtype),
+        'leaf_value_0': np.repeat(arrays['value'][:, 0], 2),
+        'leaf_value_1': np.repeat(arrays['value'][:, 1], 2),
+        'roots': (2 * arrays['tree_root']).astype(index_dtype),
+        'scaler_mean': arrays['scaler_mean'],
+        'scaler_scale': arrays['scaler_scale']
+    }
+
+
+class CompiledTreeEnsemble:
+    """All targets' trees as contiguous node arrays, evaluated in one pass"""
+
+    max_batch_rows = MAX_BATCH_ROWS
+
+    def __init__(self, arrays, meta, tables=None):
+        """tables: walk_tables() output to use as is (e.g. memory-mapped); built from arrays otherwise"""
+        self.meta = meta
+        self.targets = meta['targets']
+        self.n_features = meta['n_features']
+        self.max_depth = meta['max_depth']
+        # Engines saved before per-tree depths were recorded walk every tree max_depth levels
+        self.tree_depth = np.array(meta.get('tree_depth') or [self.max_depth] * sum(
+            last - first for first, last in meta['tree_ranges'].values()), dtype=np.intp)
+
+        self.arrays = arrays
+        if tables is None:
+            tables = walk_tables(arrays, self.n_features)
+        self._set_walk_tables(tables)
+
+        # Tree-based targets own contiguous tree ranges
+        self._tree_targets = [t for t in self.targets if meta['kinds'][t] != LINEAR_CLASSIFIER]
+        self._tree_ranges = [tuple(meta['tree_ranges'][t]) for t in self._tree_targets]
+        self._finishers = [
+            (meta['kinds'][t], np.diff(meta['tree_ranges'][t])[0],
+             np.array(meta['classes'].get(t, [])), meta['init'].get(t, 0.0))
+            for t in self._tree_targets
+        ]
+
+    def _set_walk_tables(self, tables):
+        self.scaler_mean = tables['scaler_mean']
+        self.scaler_scale = tables['scaler_scale']
+        self._input_column = tables['input_column']
+        self._threshold = tables['threshold']
+        self._children = tables['children']
+        self._leaf_values = [tables['leaf_value_0'], tables['leaf_value_1']]
+        self._row_width = len(self.scaler_mean) * self.n_features
+
+        # Trees are walked deepest first, so the trees still walking at any level are a
+        # prefix of the walk order and shallow trees stop early without any compaction
+        order = np.argsort(-self.tree_depth, kind='stable')
+        self._walk_roots = np.asarray(tables['roots']).take(order)
+        self._walk_unorder = np.argsort(order)
+        self._walking_trees = [int(np.sum(self.tree_depth > level)) for level in range(self.max_depth)]
+
+    @classmethod
+    def from_predictor(cls, predictor):
+        """Compile every fitted model of a CompleteSustainableAgriculturePredictor"""
+        targets = list(predictor.models.keys())
+        n_features = None
+        features, thresholds, children, values = [], [], [], []
+        tree_root, tree_input = [], []
+        kinds, tree_ranges, classes, init, linear = {}, {}, {}, {}, {}
+        node_offset, tree_depth = 0, []
+
+        scaler_mean, scaler_scale = [], []
+        for input_idx, target_name in enumerate(targets):
+            model = predictor.models[target_name]
+            scaler = predictor.scalers.get(target_name)
+            kind = _model_kind(model)
+            kinds[target_name] = kind
+            n_features = model.n_features_in_
+
+            # Unscaled targets use mean 0 / scale 1, which leaves the inputs bit-identical
+            scaler_mean.append(scaler.mean_ if scaler is not None else np.zeros(n_features))
+            scaler_scale.append(scaler.scale_ if scaler is not None else np.ones(n_features))
+
+            if kind == LINEAR_CLASSIFIER:
+                if len(model.classes_) != 2:
+                    raise ValueError(f"{target_name}: only binary linear models can be compiled")
+                linear[target_name] = {'coef': model.coef_[0].tolist(),
+                                       'intercept': float(model.intercept_[0])}
+                classes[target_name] = model.classes_.tolist()
+                continue
+
+            if kind == RF_CLASSIFIER:
+                if len(model.classes_) != 2:
+                    raise ValueError(f"{target_name}: only binary forests can be compiled")
+                estimators = model.estimators_
+                value_fn = _normalized_proba
+                classes[target_name] = model.classes_.tolist()
+            elif kind == GB_CLASSIFIER:
+                if model.estimators_.shape[1] != 1:
+                    raise ValueError(f"{target_name}: only binary gradient boosting can be compiled")
+                estimators = model.estimators_[:, 0]
+                learning_rate = model.learning_rate
+                value_fn = lambda v, lr=learning_rate: np.column_stack([lr * v[:, 0, 0], np.zeros(len(v))])
+                classes[target_name] = model.classes_.tolist()
+                # The raw score is init + learning_rate * (sum of tree outputs); only the
+                # public API is needed to recover init
+                zero_row = np.zeros((1, n_features), dtype=np.float32)
+                stages = sum(learning_rate * tree.predict(zero_row)[0] for tree in estimators)
+                init[target_name] = float(model.decision_function(zero_row)[0] - stages)
+            else:
+                estimators = model.estimators_
+                value_fn = lambda v: np.column_stack([v[:, 0, 0], np.zeros(len(v))])
+
+            first_tree = len(tree_root)
+            for estimator in estimators:
+                f, th, ch, val = _tree_arrays(estimator, node_offset, value_fn)
+                features.append(f)
+                thresholds.append(th)
+                children.append(ch)
+                values.append(val)
+                tree_root.append(node_offset)
+                tree_input.append(input_idx)
+                node_offset += len(f)
+                tree_depth.append(int(estimator.tree_.max_depth))
+            tree_ranges[target_name] = [first_tree, len(tree_root)]
+
+        arrays = {
+            'feature': np.concatenate(features).astype(np.int32) if features else np.zeros(0, np.int32),
+            'threshold': np.concatenate(thresholds) if thresholds else np.zeros(0),
+            'children': np.concatenate(children).astype(np.int32) if children else np.zeros((0, 2), np.int32),
+            'value': np.concatenate(values) if values else np.zeros((0, 2)),
+            'tree_root': np.array(tree_root, dtype=np.int32),
+            'tree_input': np.array(tree_input, dtype=np.int32),
+            'scaler_mean': np.array(scaler_mean, dtype=np.float64),
+            'scaler_scale': np.array(scaler_scale, dtype=np.float64)
+        }
+        meta = {
+            'targets': targets, 'kinds': kinds, 'tree_ranges': tree_ranges,
+            'classes': classes, 'init': init, 'linear': linear,
+            'n_features': int(n_features), 'max_depth': max(tree_depth, default=0),
+            'tree_depth': tree_depth
+        }
+        return cls(arrays, meta)
+
+    def save(self, path=ENGINE_PATH):
+        """Save node arrays and metadata to a single .npz file"""
+        # The registry reloads the engine when the file changes, so it must never be half written
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, meta=np.array(json.dumps(self.meta)), **self.arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=ENGINE_PATH):
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            arrays = {name: data[name] for name in data.files if name != 'meta'}
+        return cls(arrays, meta)
+
+    def predict(self, X):
+        """Predict every target for one row or a batch; returns {target: array}"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        # Walk large batches in blocks so the per-level gathers stay cache sized
+        if len(X) > BLOCK_ROWS:
+            blocks = [self.predict(X[i:i + BLOCK_ROWS]) for i in range(0, len(X), BLOCK_ROWS)]
+            return {t: np.concatenate([block[t] for block in blocks]) for t in self.targets}
+
+        # Same ops as StandardScaler.transform; the float32 round trip matches the
+        # trees' input cast while keeping the comparisons in float64
+        scaled = (X[:, None, :] - self.scaler_mean) / self.scaler_scale
+        outputs = {}
+
+        if self._tree_targets:
+            n_rows = len(X)
+            flat_inputs = scaled.astype(np.float32).astype(np.float64).reshape(-1)
+            # One row of node ids per tree, in walk order
+            node = np.repeat(self._walk_roots[:, None], n_rows, axis=1)
+            row_offset = np.arange(n_rows, dtype=node.dtype) * self._row_width
+
+            for walking_trees in self._walking_trees:
+                walking = node[:walking_trees]
+                column = self._input_column.take(walking)
+                if n_rows > 1:
+                    column += row_offset
+                walking += flat_inputs.take(column) > self._threshold.take(walking)
+                node[:walking_trees] = self._children.take(walking)
+
+            node = node.take(self._walk_unorder, axis=0)
+            for i, target_name in enumerate(self._tree_targets):
+                # Running sums add the trees one at a time as sklearn does, so a soil health
+                # score sitting on a plan threshold (0.6) rounds the same way
+                first, last = self._tree_ranges[i]
+                n_values = 2 if self._finishers[i][0] == RF_CLASSIFIER else 1
+                sums = [np.cumsum(values.take(node[first:last]), axis=0)[-1]
+                        for values in self._leaf_values[:n_values]]
+                outputs[target_name] = self._finish(self._finishers[i], *sums)
+
+        for target_name, params in self.meta['linear'].items():
+            input_idx = self.targets.index(target_name)
+            decision = scaled[:, input_idx] @ np.array(params['coef']) + params['intercept']
+            outputs[target_name] = np.array(self.meta['classes'][target_name])[(decision > 0).astype(int)]
+
+        return {target_name: outputs[target_name] for target_name in self.targets}
+
+    @staticmethod
+    def _finish(finisher, summed_0, summed_1=None):
+        """Turn summed leaf values into the estimator's predict() output"""
+        kind, n_trees, classes, init = finisher
+        if kind == RF_CLASSIFIER:
+            # Same divide-then-argmax as RandomForestClassifier.predict
+            return classes[(summed_1 / n_trees > summed_0 / n_trees).astype(np.intp)]
+        if kind == GB_CLASSIFIER:
+            return classes[(init + summed_0 > 0).astype(np.intp)]
+        return summed_0 / n_trees
+
+
+def check_parity(predictor, engine, X):
+    """Compare engine outputs with the sklearn models target by target"""
+    compiled = engine.predict(X)
+    report = {}
+    for target_name, model in predictor.models.items():
+        scaler = predictor.scalers.get(target_name)
+        expected = model.predict(scaler.transform(X) if scaler else X)
+        if engine.meta['kinds'][target_name] == RF_REGRESSOR:
+            report[target_name] = {'max_abs_diff': float(np.max(np.abs(expected - compiled[target_name])))}
+        else:
+            report[target_name] = {'mismatches': int(np.sum(expected != compiled[target_name]))}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and check the compiled tree engine")
+    parser.add_argument("command", choices=["export", "check"])
+    parser.add_argument("--model", default=MODEL_PATH, help="Path to the saved predictor")
+    parser.add_argument("--engine", "--output", dest="engine", default=ENGINE_PATH,
+                        help="Path of the compiled .npz engine")
+    parser.add_argument("--rows", type=int, default=10000, help="Random rows used by check")
+    args = parser.parse_args()
+
+    predictor = load_predictor(args.model)
+
+    if args.command == "export":
+        from model_registry import file_sha256
+
+        engine = CompiledTreeEnsemble.from_predictor(predictor)
+        # Lets consumers detect an engine left behind by a retrained model
+        engine.meta['source_sha256'] = file_sha256(args.model)
+        engine.save(args.engine)
+        print(f"✅ Compiled {len(engine.arrays['tree_root'])} trees ({len(engine.arrays['feature']):,} nodes) -> {args.engine}")
+    else:
+        from feature_engineering import RAW_FEATURES, INPUT_RANGES, engineer_features
+
+        engine = CompiledTreeEnsemble.load(args.engine)
+        rng = np.random.default_rng(0)
+        raw = np.column_stack([rng.uniform(*INPUT_RANGES[c], args.rows) for c in RAW_FEATURES])
+        for target_name, result in check_parity(predictor, engine, engineer_features(raw)).items():
+            print(f"{target_name:22}: {result}")
+
+
+if __name__ == "__main__":
+    main()